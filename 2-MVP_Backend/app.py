@@ -1,91 +1,362 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
-from models.commands import validate_commands, BuildStructureParams, RotateCameraParams
-from executor.structure import build_structure
-from executor.view import compute_set_view, compute_rotate_camera
-from nlp.llm_client import generate_commands
-from utils.error_handlers import NLPError, ExecutionError
-import json
+from models.commands import validate_commands, BuildStructureParams
+from executor.structure import STRUCTURE_MIMETYPES, structure_etag, structure_file, structure_filename
+from executor.cache import download_cache, structure_cache
+from executor.artifacts import artifact_store, open_artifact
+from executor.dispatch import execute_commands
+from executor.session import session_store, parse_session_id, run_session_commands
+from nlp.llm_client import generate_commands, stream_commands, llm_single_flight
+from nlp.fast_path import parse_prompt, fast_path_stats
+from nlp.prompt_cache import prompt_cache
+from utils.error_handlers import NLPError, ExecutionError, ValidationError
+from utils.sse import format_sse
+from utils.timing import StageTimer
+from utils.compression import negotiate_encoding, is_compressible, compress, etag_matches, representation_etag, add_vary
+from utils.profiling import requested_profile, profile_request
+from utils.warmup import warm_up, readiness
+from utils.metrics import metrics, request_seconds, response_bytes, errors_total, CONTENT_TYPE as METRICS_CONTENT_TYPE
 import time
-from functools import wraps
+from pydantic import ValidationError as PydanticValidationError
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from config import BATCH_MAX_CONCURRENCY, BATCH_MAX_ITEMS, COMPRESSION_MIN_BYTES, ARTIFACT_CACHE_SECONDS, WARMUP_ON_START
 
 app = Flask(__name__)
 CORS(app)
 
-def timing_decorator(f):
-    @wraps(f)
-    def wrap(*args, **kwargs):
-        time1 = time.time()
-        result = f(*args, **kwargs)
-        time2 = time.time()
-        app.logger.info(f"Request took {round((time2-time1)*1000, 2)} ms")
-        return result
-    return wrap
-
-# Define ValidationError if it's not already defined elsewhere
-class ValidationError(Exception):
-    """Custom exception for validation errors."""
-    pass
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses are timed until their headers are sent and have no size.
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    start = g.get("request_start")
+    if start is not None:
+        request_seconds.observe(time.perf_counter() - start, endpoint, request.method, str(response.status_code))
+    if response.content_length is not None:
+        response_bytes.observe(response.content_length, endpoint)
+    return response
+
+# Registered after the metrics hook so it runs first and the metrics see the compressed size.
+@app.after_request
+def compress_response(response):
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code != 200
+        or "Content-Encoding" in response.headers
+        or not is_compressible(response.content_type)
+    ):
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return response
+    response.headers["Vary"] = add_vary(response.headers.get("Vary"))
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
 
 @app.errorhandler(NLPError)
 def handle_nlp_error(e):
+    errors_total.inc(type(e).__name__)
     return jsonify({"error": str(e)}), 400
 
 @app.errorhandler(ValidationError)
 def handle_validation_error(e):
+    errors_total.inc(type(e).__name__)
     return jsonify({"error": str(e)}), 400
 
 @app.errorhandler(ExecutionError)
 def handle_execution_error(e):
+    errors_total.inc(type(e).__name__)
     return jsonify({"error": str(e)}), 500
 
 @app.errorhandler(Exception)
 def handle_generic_error(e):
+    errors_total.inc(type(e).__name__)
     app.logger.error(f"An unexpected error occurred: {e}", exc_info=True)
     return jsonify({"error": "An unexpected error occurred."}), 500
 
+def prompt_to_commands(prompt: str) -> list:
+    """Translates a prompt into raw commands, via the fast path or the LLM."""
+    try:
+        # Common prompts are translated locally; everything else goes to the LLM.
+        generated_commands = parse_prompt(prompt)
+        if generated_commands is None:
+            generated_commands = generate_commands(prompt)
+    except Exception as e: # Catching generic exception from LLM client for now, can be refined to NLPError if LLMClient raises it
+        raise NLPError(f"Error generating commands from NLP: {str(e)}")
+    return generated_commands
+
+def run_commands(raw_commands: list, session_id: str = None, timer: StageTimer = None) -> list:
+    """
+    Validates raw commands and executes them, running independent ones concurrently.
+
+    With a session ID, camera commands continue from the session's view and
+    return only the changed view fields; the session is updated only if every
+    command succeeds. The "validate" and "execute" stages are recorded on
+    ``timer`` if one is given.
+    """
+    timer = timer or StageTimer()
+    with timer.stage("validate"):
+        try:
+            validated_commands = validate_commands(raw_commands)
+        except ValueError as e:
+            raise ValidationError({"error": "Command validation failed", "details": str(e)})
+
+    with timer.stage("execute"):
+        if session_id is None:
+            return execute_commands(validated_commands)
+        with session_store.lock(session_id):
+            results, state = run_session_commands(validated_commands, session_store.get(session_id))
+            session_store.put(session_id, state)
+        return results
+
 @app.route("/api/commands", methods=["POST"])
-@timing_decorator
 def commands():
     data = request.json
     prompt = data.get("prompt")
+    session_id = parse_session_id(request.headers.get("X-Session-ID"), data)
 
     if not prompt:
         raise ValidationError("No prompt provided")
+    profile_modes = requested_profile(request.headers.get("X-Profile"), request.args.get("profile"))
+
+    timer = StageTimer()
+    with profile_request(profile_modes, prompt) as profile:
+        with timer.stage("nlp"):
+            raw_commands = prompt_to_commands(prompt)
+        results = run_commands(raw_commands, session_id, timer)
+
+        with timer.stage("encode"):
+            response = jsonify(results)
+    response.headers["Server-Timing"] = timer.server_timing()
+    if profile is not None:
+        response.headers["X-Profile-ID"] = profile.id
+    if session_id is not None:
+        response.headers["X-Session-ID"] = session_id
+    return response, 200
+
+def stream_results(prompt: str, session_id: str = None):
+    """
+    Yields one SSE event per command as soon as it has been executed.
+
+    Commands come from the fast path or, one tool call at a time, from the
+    streaming LLM call. Each is validated and executed in order, so camera
+    commands see the view left by the previous ones. The first failure is
+    sent as an ``error`` event and ends the stream; otherwise a final
+    ``done`` event carries the number of commands.
+    """
+    lock = session_store.lock(session_id) if session_id is not None else nullcontext()
+    with lock:
+        state = session_store.get(session_id) if session_id is not None else None
+        raw_commands = parse_prompt(prompt)
+        raw_commands = iter(raw_commands) if raw_commands is not None else stream_commands(prompt)
+        index = 0
+        while True:
+            try:
+                try:
+                    raw_command = next(raw_commands)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    raise NLPError(f"Error generating commands from NLP: {str(e)}")
+                try:
+                    command = validate_commands([raw_command])[0]
+                except ValueError as e:
+                    raise ValidationError({"error": "Command validation failed", "details": str(e)})
+                results, state = run_session_commands([command], state, deltas=session_id is not None)
+                if session_id is not None:
+                    session_store.put(session_id, state)
+            except (NLPError, ValidationError, ExecutionError) as e:
+                errors_total.inc(type(e).__name__)
+                yield format_sse("error", {"index": index, "error": str(e), "type": type(e).__name__})
+                return
+            except Exception as e:
+                errors_total.inc(type(e).__name__)
+                app.logger.error(f"An unexpected error occurred while streaming: {e}", exc_info=True)
+                yield format_sse("error", {"index": index, "error": "An unexpected error occurred.", "type": "Exception"})
+                return
+            yield format_sse("result", {"index": index, "command": command.command, "result": results[0]})
+            index += 1
+        yield format_sse("done", {"count": index})
+
+@app.route("/api/commands/stream", methods=["POST"])
+def commands_stream():
+    """Streaming variant of ``/api/commands``: results are sent as Server-Sent Events."""
+    data = request.json or {}
+    prompt = data.get("prompt")
+    session_id = parse_session_id(request.headers.get("X-Session-ID"), data)
+
+    if not prompt:
+        raise ValidationError("No prompt provided")
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if session_id is not None:
+        headers["X-Session-ID"] = session_id
+    return Response(stream_with_context(stream_results(prompt, session_id)), mimetype="text/event-stream", headers=headers)
 
+def run_batch_item(item) -> dict:
+    """
+    Runs one batch item, either ``{"prompt": ...}`` or ``{"commands": [...]}``.
+
+    Errors are reported in the item instead of being raised, so one failure
+    does not abort the rest of the batch.
+    """
     try:
-        generated_commands = generate_commands(prompt)
-    except Exception as e: # Catching generic exception from LLM client for now, can be refined to NLPError if LLMClient raises it
-        raise NLPError(f"Error generating commands from NLP: {str(e)}")
+        if not isinstance(item, dict):
+            raise ValidationError("Batch item must be an object with a 'prompt' or 'commands' field")
+        if item.get("commands") is not None:
+            if not isinstance(item["commands"], list):
+                raise ValidationError("'commands' must be a list")
+            raw_commands = item["commands"]
+        elif item.get("prompt"):
+            raw_commands = prompt_to_commands(item["prompt"])
+        else:
+            raise ValidationError("No prompt provided")
+        return {"results": run_commands(raw_commands)}
+    except (NLPError, ValidationError, ExecutionError) as e:
+        errors_total.inc(type(e).__name__)
+        return {"error": str(e), "type": type(e).__name__}
+    except Exception as e:
+        errors_total.inc(type(e).__name__)
+        app.logger.error(f"An unexpected error occurred in batch item: {e}", exc_info=True)
+        return {"error": "An unexpected error occurred.", "type": "Exception"}
+
+@app.route("/api/commands/batch", methods=["POST"])
+def commands_batch():
+    """
+    Runs many prompts (or pre-formed command lists) in one request.
+
+    Items run concurrently on a thread pool of at most ``BATCH_MAX_CONCURRENCY``
+    workers (optionally lowered per request with ``concurrency``); the response
+    lists one result or error per item, in request order.
+    """
+    data = request.json or {}
+    items = data.get("items")
+
+    if not isinstance(items, list) or not items:
+        raise ValidationError("No batch items provided")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValidationError(f"Too many batch items: {len(items)} (maximum {BATCH_MAX_ITEMS})")
+
+    concurrency = data.get("concurrency", BATCH_MAX_CONCURRENCY)
+    if not isinstance(concurrency, int) or concurrency < 1:
+        raise ValidationError("'concurrency' must be a positive integer")
+    workers = min(concurrency, BATCH_MAX_CONCURRENCY, len(items))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(run_batch_item, items))
+
+    return jsonify([{"index": i, **outcome} for i, outcome in enumerate(outcomes)]), 200
+
+@app.route("/api/structures/download", methods=["GET", "POST"])
+def download_structure():
+    """
+    Materializes the full supercell for a (possibly descriptor-mode) buildStructure params object.
 
+    Params come from the JSON body, or from the query string for GET. The
+    body is compressed according to ``Accept-Encoding`` (precompressed
+    bodies are cached), and ``If-None-Match`` with the current ETag gets a
+    304 without sending the file.
+    """
+    data = request.args.to_dict() if request.method == "GET" else (request.json or {})
     try:
-        validated_commands = validate_commands(generated_commands)
-    except ValueError as e:
-        raise ValidationError({"error": "Command validation failed", "details": str(e)})
+        params = BuildStructureParams(**data)
+    except PydanticValidationError as e:
+        raise ValidationError(f"Invalid structure parameters: {e}")
 
-    results = []
-    for command in validated_commands:
-        command_type = command.command
-        command_args = command.params.model_dump()
+    headers = {
+        "Content-Disposition": f'attachment; filename="{structure_filename(params)}"',
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+    etag = structure_etag(params)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status=304, headers={**headers, "ETag": representation_etag(etag, encoding)})
 
+    body, headers["ETag"] = structure_file(params, encoding)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(body, mimetype=STRUCTURE_MIMETYPES[params.format], headers=headers)
+
+@app.route("/api/structures/<structure_id>", methods=["GET"])
+def get_structure_artifact(structure_id):
+    """
+    Serves a file from the artifact store, in the format it was built in or ``?format=``.
+
+    The file is sent from disk (``sendfile`` where the server supports it)
+    and honours ``Range``, ``If-Range`` and ``If-None-Match``. Its content
+    never changes for a given ID and format, so it may be cached for good.
+    A file pruned by another worker before it is opened is built again, once.
+    """
+    for _ in range(2):
+        found = open_artifact(structure_id, request.args.get("format"))
+        if found is None:
+            break
+        path, fmt = found
         try:
-            if command_type == "buildStructure":
-                build_params = BuildStructureParams(**command_args)
-                result = build_structure(build_params)
-            elif command_type == "set_view":
-                result = compute_set_view(command_args)
-            elif command_type == "rotateCamera":
-                rotate_params = RotateCameraParams(**command_args)
-                # For testing, provide a default prev_view. In a real app, this would come from the frontend.
-                default_prev_view = {"quaternion": [0, 0, 0, 1], "translation": [0, 0, 0], "zoom": 1}
-                result = compute_rotate_camera(default_prev_view, rotate_params.axis, rotate_params.angle)
-            else:
-                raise ExecutionError(f"Unknown command type: {command_type}")
-            results.append(result)
-        except Exception as e:
-            raise ExecutionError(f"Error executing command {command_type}: {str(e)}")
-
-    return jsonify(results), 200
+            response = send_file(
+                path,
+                mimetype=STRUCTURE_MIMETYPES[fmt],
+                conditional=True,
+                etag=f"{structure_id}-{fmt}",
+                max_age=ARTIFACT_CACHE_SECONDS,
+            )
+            break
+        except FileNotFoundError:
+            found = None
+    if found is None:
+        return jsonify({"error": f"Unknown structure: {structure_id}"}), 404
+    response.headers["Cache-Control"] = f"public, max-age={ARTIFACT_CACHE_SECONDS}, immutable"
+    return response
+
+@app.route("/api/sessions/<session_id>", methods=["GET"])
+def get_session(session_id):
+    """Returns a session's full view and active structure, so a client can resynchronize."""
+    session_id = parse_session_id(session_id, None)
+    state = session_store.get(session_id)
+    if state is None:
+        return jsonify({"error": f"Unknown session: {session_id}"}), 404
+    return jsonify({"sessionId": session_id, "view": state.get("view"), "structure": state.get("structure")}), 200
+
+@app.route("/api/sessions/<session_id>", methods=["DELETE"])
+def delete_session(session_id):
+    session_store.delete(parse_session_id(session_id, None))
+    return "", 204
+
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify({"structure": structure_cache.stats(), "downloads": download_cache.stats(), "sessions": session_store.stats(), "artifacts": artifact_store.stats()}), 200
+
+@app.route("/api/nlp/stats", methods=["GET"])
+def nlp_stats():
+    return jsonify({
+        "fastPath": fast_path_stats(),
+        "promptCache": prompt_cache.stats(),
+        "singleFlight": llm_single_flight.stats(),
+    }), 200
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness probe: 200 once this worker is warmed up (or warm-up is disabled), 503 before."""
+    status = readiness()
+    return jsonify(status), 200 if status["ready"] else 503
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Per-stage latency histograms, response sizes, error counts and cache counters in Prometheus text format."""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+if WARMUP_ON_START:
+    warm_up()
 
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
\ No newline at end of file
@@ -0,0 +1,514 @@
+import asyncio
+import logging
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from pydantic import ValidationError as PydanticValidationError
+
+from config import (
+    EXECUTOR_POOL, EXECUTOR_WORKERS, LLM_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY, BATCH_MAX_ITEMS, COMPRESSION_MIN_BYTES,
+    ARTIFACT_CACHE_SECONDS, WARMUP_ON_START,
+)
+from executor.cache import download_cache, structure_cache
+from executor.artifacts import artifact_store, open_artifact
+from executor.dispatch import execute_commands
+from executor.structure import STRUCTURE_MIMETYPES, structure_etag, structure_file, structure_filename
+from executor.session import session_store, parse_session_id, run_session_commands
+from models.commands import validate_commands, BuildStructureParams
+from nlp.llm_client import agenerate_commands, astream_commands, async_llm_single_flight
+from nlp.fast_path import parse_prompt, fast_path_stats
+from nlp.prompt_cache import prompt_cache
+from utils.error_handlers import NLPError, ExecutionError, ValidationError
+from utils.sse import format_sse
+from utils.timing import StageTimer
+from utils.compression import negotiate_encoding, is_compressible, compress, etag_matches, representation_etag, add_vary
+from utils.profiling import requested_profile, profile_request
+from utils.warmup import warm_up, readiness
+from utils.metrics import metrics, request_seconds, response_bytes, errors_total, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+logger = logging.getLogger(__name__)
+
+# Created lazily so importing this module (or forking workers) does not spawn pool threads/processes.
+_pool = None
+_llm_semaphore = None
+# Per-session asyncio locks; an entry disappears once no request holds it.
+_session_locks = weakref.WeakValueDictionary()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        if EXECUTOR_POOL == "process":
+            _pool = ProcessPoolExecutor(max_workers=EXECUTOR_WORKERS, initializer=warm_up if WARMUP_ON_START else None)
+        else:
+            _pool = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="executor")
+    return _pool
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+def get_session_lock(session_id: str) -> asyncio.Lock:
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+async def run_in_pool(fn, *args):
+    """Runs a CPU-bound callable on the executor pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), fn, *args)
+
+class MetricsMiddleware:
+    """
+    Records the duration, status and body size of every HTTP request.
+
+    Replaces the Flask app's per-request hooks. Streamed responses are timed
+    until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = ["500"]
+        size = [0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope.
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            request_seconds.observe(time.perf_counter() - start, endpoint, scope["method"], status[0])
+            response_bytes.observe(size[0], endpoint)
+
+class CompressionMiddleware:
+    """
+    Compresses complete JSON and text responses according to ``Accept-Encoding``.
+
+    Counterpart of the Flask app's ``compress_response`` hook. Streamed
+    responses (Server-Sent Events), files served with range support and
+    bodies the endpoint already encoded pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding")
+        held = None
+
+        async def send_wrapper(message):
+            nonlocal held
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] == 200
+                    and "content-encoding" not in headers
+                    and "accept-ranges" not in headers  # Ranges refer to the identity bytes.
+                    and is_compressible(headers.get("content-type"))
+                ):
+                    # Wait for the body to know whether it is complete and large enough.
+                    held = message
+                    return
+            elif message["type"] == "http.response.body" and held is not None:
+                start, held = held, None
+                if not message.get("more_body", False):
+                    message = self._compress(start, message, accept_encoding)
+                await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compress(start: dict, message: dict, accept_encoding) -> dict:
+        body = message.get("body", b"")
+        if len(body) < COMPRESSION_MIN_BYTES:
+            return message
+        headers = MutableHeaders(scope=start)
+        headers["Vary"] = add_vary(headers.get("vary"))
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            return message
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(body))
+        return {**message, "body": body}
+
+async def handle_nlp_error(request: Request, e: NLPError):
+    errors_total.inc(type(e).__name__)
+    return JSONResponse({"error": str(e)}, status_code=400)
+
+async def handle_validation_error(request: Request, e: ValidationError):
+    errors_total.inc(type(e).__name__)
+    return JSONResponse({"error": str(e)}, status_code=400)
+
+async def handle_execution_error(request: Request, e: ExecutionError):
+    errors_total.inc(type(e).__name__)
+    return JSONResponse({"error": str(e)}, status_code=500)
+
+async def handle_generic_error(request: Request, e: Exception):
+    errors_total.inc(type(e).__name__)
+    logger.error(f"An unexpected error occurred: {e}", exc_info=True)
+    return JSONResponse({"error": "An unexpected error occurred."}, status_code=500)
+
+async def prompt_to_commands(prompt: str) -> list:
+    """Translates a prompt into raw commands, via the fast path or the LLM."""
+    try:
+        # Common prompts are translated locally; everything else goes to the LLM.
+        generated_commands = parse_prompt(prompt)
+        if generated_commands is None:
+            async with get_llm_semaphore():
+                generated_commands = await agenerate_commands(prompt)
+    except Exception as e:
+        raise NLPError(f"Error generating commands from NLP: {str(e)}")
+    return generated_commands
+
+def _validate(raw_commands: list, timer: StageTimer) -> list:
+    with timer.stage("validate"):
+        try:
+            return validate_commands(raw_commands)
+        except ValueError as e:
+            raise ValidationError({"error": "Command validation failed", "details": str(e)})
+
+def run_commands_inline(raw_commands: list, session_id: str = None, timer: StageTimer = None) -> list:
+    """
+    Synchronous :func:`run_commands` for profiled requests.
+
+    Validation and execution run on the event loop thread with no ``await``
+    in between, so no other request's coroutines can run while cProfile and
+    tracemalloc are recording. The caller holds the session lock.
+    """
+    timer = timer or StageTimer()
+    validated_commands = _validate(raw_commands, timer)
+    with timer.stage("execute"):
+        if session_id is None:
+            return execute_commands(validated_commands)
+        results, state = run_session_commands(validated_commands, session_store.get(session_id))
+        session_store.put(session_id, state)
+        return results
+
+async def run_commands(raw_commands: list, session_id: str = None, timer: StageTimer = None) -> list:
+    """
+    Validates raw commands and executes them on the executor pool, off the event loop.
+
+    Sessions and stage timing behave as in ``app.run_commands``; the session
+    state is read and written on the event loop and only the execution runs
+    on the pool.
+    """
+    timer = timer or StageTimer()
+    validated_commands = _validate(raw_commands, timer)
+    with timer.stage("execute"):
+        if session_id is None:
+            return await run_in_pool(execute_commands, validated_commands)
+        async with get_session_lock(session_id):
+            results, state = await run_in_pool(run_session_commands, validated_commands, session_store.get(session_id))
+            session_store.put(session_id, state)
+        return results
+
+async def commands(request: Request):
+    """Async implementation of ``POST /api/commands`` with the same request/response contract as ``app.py``."""
+    data = await request.json()
+    prompt = data.get("prompt")
+    session_id = parse_session_id(request.headers.get("X-Session-ID"), data)
+
+    if not prompt:
+        raise ValidationError("No prompt provided")
+    profile_modes = requested_profile(request.headers.get("X-Profile"), request.query_params.get("profile"))
+
+    timer = StageTimer()
+    with timer.stage("nlp"):
+        raw_commands = await prompt_to_commands(prompt)
+    if profile_modes:
+        # Only synchronous work is profiled: during an await the event loop
+        # runs other requests, which the profile would record as this one's.
+        async with _optional_session_lock(session_id):
+            with profile_request(profile_modes, prompt) as profile:
+                results = run_commands_inline(raw_commands, session_id, timer)
+                with timer.stage("encode"):
+                    response = JSONResponse(results, status_code=200)
+    else:
+        profile = None
+        results = await run_commands(raw_commands, session_id, timer)
+        with timer.stage("encode"):
+            response = JSONResponse(results, status_code=200)
+    response.headers["Server-Timing"] = timer.server_timing()
+    if profile is not None:
+        response.headers["X-Profile-ID"] = profile.id
+    if session_id is not None:
+        response.headers["X-Session-ID"] = session_id
+    return response
+
+@asynccontextmanager
+async def _optional_session_lock(session_id):
+    if session_id is None:
+        yield
+    else:
+        async with get_session_lock(session_id):
+            yield
+
+async def _iterate(commands: list):
+    for command in commands:
+        yield command
+
+async def stream_results(prompt: str, session_id: str = None):
+    """Async counterpart of ``app.stream_results``; executors run on the pool."""
+    async with _optional_session_lock(session_id):
+        state = session_store.get(session_id) if session_id is not None else None
+        fast_path_commands = parse_prompt(prompt)
+        raw_commands = None
+        semaphore_held = False
+        index = 0
+        try:
+            if fast_path_commands is not None:
+                raw_commands = _iterate(fast_path_commands)
+            else:
+                # The semaphore caps concurrent OpenAI calls; it is held until the stream ends.
+                await get_llm_semaphore().acquire()
+                semaphore_held = True
+                raw_commands = astream_commands(prompt)
+            while True:
+                try:
+                    try:
+                        raw_command = await raw_commands.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    except Exception as e:
+                        raise NLPError(f"Error generating commands from NLP: {str(e)}")
+                    try:
+                        command = validate_commands([raw_command])[0]
+                    except ValueError as e:
+                        raise ValidationError({"error": "Command validation failed", "details": str(e)})
+                    results, state = await run_in_pool(run_session_commands, [command], state, session_id is not None)
+                    if session_id is not None:
+                        session_store.put(session_id, state)
+                except (NLPError, ValidationError, ExecutionError) as e:
+                    errors_total.inc(type(e).__name__)
+                    yield format_sse("error", {"index": index, "error": str(e), "type": type(e).__name__})
+                    return
+                except Exception as e:
+                    errors_total.inc(type(e).__name__)
+                    logger.error(f"An unexpected error occurred while streaming: {e}", exc_info=True)
+                    yield format_sse("error", {"index": index, "error": "An unexpected error occurred.", "type": "Exception"})
+                    return
+                yield format_sse("result", {"index": index, "command": command.command, "result": results[0]})
+                index += 1
+            yield format_sse("done", {"count": index})
+        finally:
+            if raw_commands is not None:
+                await raw_commands.aclose()
+            if semaphore_held:
+                get_llm_semaphore().release()
+
+async def commands_stream(request: Request):
+    """Async implementation of ``POST /api/commands/stream`` (Server-Sent Events)."""
+    data = await request.json()
+    prompt = data.get("prompt")
+    session_id = parse_session_id(request.headers.get("X-Session-ID"), data)
+
+    if not prompt:
+        raise ValidationError("No prompt provided")
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if session_id is not None:
+        headers["X-Session-ID"] = session_id
+    return StreamingResponse(stream_results(prompt, session_id), media_type="text/event-stream", headers=headers)
+
+async def run_batch_item(item) -> dict:
+    """Async counterpart of ``app.run_batch_item``: errors are reported per item."""
+    try:
+        if not isinstance(item, dict):
+            raise ValidationError("Batch item must be an object with a 'prompt' or 'commands' field")
+        if item.get("commands") is not None:
+            if not isinstance(item["commands"], list):
+                raise ValidationError("'commands' must be a list")
+            raw_commands = item["commands"]
+        elif item.get("prompt"):
+            raw_commands = await prompt_to_commands(item["prompt"])
+        else:
+            raise ValidationError("No prompt provided")
+        return {"results": await run_commands(raw_commands)}
+    except (NLPError, ValidationError, ExecutionError) as e:
+        errors_total.inc(type(e).__name__)
+        return {"error": str(e), "type": type(e).__name__}
+    except Exception as e:
+        errors_total.inc(type(e).__name__)
+        logger.error(f"An unexpected error occurred in batch item: {e}", exc_info=True)
+        return {"error": "An unexpected error occurred.", "type": "Exception"}
+
+async def commands_batch(request: Request):
+    """Async implementation of ``POST /api/commands/batch`` with the same contract as ``app.py``."""
+    data = await request.json()
+    items = data.get("items")
+
+    if not isinstance(items, list) or not items:
+        raise ValidationError("No batch items provided")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValidationError(f"Too many batch items: {len(items)} (maximum {BATCH_MAX_ITEMS})")
+
+    concurrency = data.get("concurrency", BATCH_MAX_CONCURRENCY)
+    if not isinstance(concurrency, int) or concurrency < 1:
+        raise ValidationError("'concurrency' must be a positive integer")
+    semaphore = asyncio.Semaphore(min(concurrency, BATCH_MAX_CONCURRENCY))
+
+    async def run_limited(item):
+        async with semaphore:
+            return await run_batch_item(item)
+
+    outcomes = await asyncio.gather(*(run_limited(item) for item in items))
+
+    return JSONResponse([{"index": i, **outcome} for i, outcome in enumerate(outcomes)], status_code=200)
+
+async def download_structure(request: Request):
+    """Async implementation of ``GET``/``POST /api/structures/download``; building and compression run on the pool."""
+    data = dict(request.query_params) if request.method == "GET" else await request.json()
+    try:
+        params = BuildStructureParams(**(data or {}))
+    except PydanticValidationError as e:
+        raise ValidationError(f"Invalid structure parameters: {e}")
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{structure_filename(params)}"',
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    etag = await run_in_pool(structure_etag, params)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={**headers, "ETag": representation_etag(etag, encoding)})
+
+    body, headers["ETag"] = await run_in_pool(structure_file, params, encoding)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=STRUCTURE_MIMETYPES[params.format], headers=headers)
+
+async def get_structure_artifact(request: Request):
+    """
+    Async implementation of ``GET /api/structures/<id>``.
+
+    Writing a missing format variant runs on the pool; the file is then
+    streamed from disk with ``Range`` support. ``If-None-Match`` is checked
+    here because ``FileResponse`` only handles ranges. A file pruned by
+    another worker before it is opened is built again, once.
+    """
+    structure_id = request.path_params["structure_id"]
+    for _ in range(2):
+        found = await run_in_pool(open_artifact, structure_id, request.query_params.get("format"))
+        if found is None:
+            break
+        path, fmt = found
+        try:
+            stat_result = os.stat(path)
+            break
+        except FileNotFoundError:
+            found = None
+    if found is None:
+        return JSONResponse({"error": f"Unknown structure: {structure_id}"}, status_code=404)
+    headers = {
+        "ETag": f'"{structure_id}-{fmt}"',
+        "Cache-Control": f"public, max-age={ARTIFACT_CACHE_SECONDS}, immutable",
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response = FileResponse(path, media_type=STRUCTURE_MIMETYPES[fmt], stat_result=stat_result)
+    response.headers.update(headers)
+    return response
+
+async def get_session(request: Request):
+    """Async implementation of ``GET /api/sessions/<id>``."""
+    session_id = parse_session_id(request.path_params["session_id"], None)
+    state = session_store.get(session_id)
+    if state is None:
+        return JSONResponse({"error": f"Unknown session: {session_id}"}, status_code=404)
+    return JSONResponse({"sessionId": session_id, "view": state.get("view"), "structure": state.get("structure")}, status_code=200)
+
+async def delete_session(request: Request):
+    session_store.delete(parse_session_id(request.path_params["session_id"], None))
+    return Response(status_code=204)
+
+async def cache_stats(request: Request):
+    return JSONResponse(
+        {"structure": structure_cache.stats(), "downloads": download_cache.stats(), "sessions": session_store.stats(), "artifacts": artifact_store.stats()}, status_code=200
+    )
+
+async def nlp_stats(request: Request):
+    return JSONResponse({
+        "fastPath": fast_path_stats(),
+        "promptCache": prompt_cache.stats(),
+        "singleFlight": async_llm_single_flight.stats(),
+    }, status_code=200)
+
+async def readyz(request: Request):
+    """Async implementation of ``GET /readyz``."""
+    status = readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+async def prometheus_metrics(request: Request):
+    """Async implementation of ``GET /metrics``."""
+    return Response(metrics.render(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+@asynccontextmanager
+async def lifespan(app):
+    if WARMUP_ON_START:
+        # Off the event loop, although nothing is served until it finishes.
+        await asyncio.to_thread(warm_up)
+    yield
+
+app = Starlette(
+    routes=[
+        Route("/api/commands", commands, methods=["POST"]),
+        Route("/api/commands/batch", commands_batch, methods=["POST"]),
+        Route("/api/commands/stream", commands_stream, methods=["POST"]),
+        Route("/api/structures/download", download_structure, methods=["GET", "POST"]),
+        Route("/api/structures/{structure_id}", get_structure_artifact, methods=["GET"]),
+        Route("/api/sessions/{session_id}", get_session, methods=["GET"]),
+        Route("/api/sessions/{session_id}", delete_session, methods=["DELETE"]),
+        Route("/api/cache/stats", cache_stats, methods=["GET"]),
+        Route("/api/nlp/stats", nlp_stats, methods=["GET"]),
+        Route("/readyz", readyz, methods=["GET"]),
+        Route("/metrics", prometheus_metrics, methods=["GET"]),
+    ],
+    middleware=[
+        Middleware(MetricsMiddleware),
+        Middleware(CompressionMiddleware),
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]),
+    ],
+    exception_handlers={
+        NLPError: handle_nlp_error,
+        ValidationError: handle_validation_error,
+        ExecutionError: handle_execution_error,
+        Exception: handle_generic_error,
+    },
+    lifespan=lifespan,
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run("asgi:app", port=5001)
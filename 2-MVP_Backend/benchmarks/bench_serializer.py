@@ -0,0 +1,42 @@
+"""
+Compares the vectorized serializer in executor/serializer.py against ase.io.write.
+
+Run from the 2-MVP_Backend directory:
+
+    python -m benchmarks.bench_serializer
+"""
+import time
+
+from ase.build import bulk
+
+from executor.serializer import serialize
+from executor.structure import _write_with_ase
+
+SIZES = [1, 5, 10, 20, 30]
+FORMATS = ["pdb", "xyz", "cif"]
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'format':<6} {'atoms':>9} {'ase (ms)':>10} {'numpy (ms)':>11} {'speedup':>8}")
+    for n in SIZES:
+        atoms = bulk("Al", "fcc", cubic=True) * (n, n, n)
+        for fmt in FORMATS:
+            ase_time = best_of(lambda: _write_with_ase(atoms, fmt))
+            numpy_time = best_of(lambda: serialize(fmt, atoms.numbers, atoms.positions, atoms.cell.array))
+            print(
+                f"{fmt:<6} {len(atoms):>9} {ase_time * 1000:>10.2f} {numpy_time * 1000:>11.2f} "
+                f"{ase_time / numpy_time:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compares discriminated batch validation in models/commands.py against
+validating each command through the plain ``Command`` union.
+
+Run from the 2-MVP_Backend directory:
+
+    python -m benchmarks.bench_validation
+"""
+import time
+
+from models.commands import Command, validate_commands
+
+COMMANDS = [
+    {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc", "nx": 3, "ny": 3, "nz": 3}},
+    {"command": "rotateCamera", "params": {"axis": "x", "angle": 90}},
+    {"command": "setView", "params": {"viewObject": {
+        "quaternion": {"x": 0, "y": 0, "z": 0, "w": 1},
+        "translation": {"x": 0, "y": 0, "z": 0},
+        "zoom": 1,
+    }}},
+    {"command": "displayMessage", "params": {"message": "Done", "type": "info"}},
+    {"command": "resetView", "params": {}},
+]
+BATCH_SIZES = [1, 10, 100]
+ITERATIONS = 2000
+
+
+def per_command(raw):
+    return [Command(**cmd) for cmd in raw]
+
+
+def time_per_batch(fn, raw, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(raw)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    print(f"{'commands':>9} {'union (us)':>11} {'discriminated (us)':>19} {'speedup':>8}")
+    for size in BATCH_SIZES:
+        raw = (COMMANDS * size)[:size]
+        iterations = max(ITERATIONS // size, 20)
+        union_time = time_per_batch(per_command, raw, iterations)
+        batch_time = time_per_batch(validate_commands, raw, iterations)
+        print(
+            f"{size:>9} {union_time * 1e6:>11.1f} {batch_time * 1e6:>19.1f} "
+            f"{union_time / batch_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
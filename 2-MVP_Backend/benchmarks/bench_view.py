@@ -0,0 +1,64 @@
+"""
+Compares the batched quaternion helpers in executor/view.py against applying
+one scipy ``Rotation`` composition per camera command.
+
+Run from the 2-MVP_Backend directory:
+
+    python -m benchmarks.bench_view
+"""
+import time
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+from executor.view import compose_rotations, compute_rotate_camera, compute_set_view, rotate_views
+
+SIZES = [1, 10, 100, 1000]
+START = {"quaternion": [0.0, 0.0, 0.0, 1.0], "translation": [0.0, 0.0, 0.0], "zoom": 1.0}
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def scipy_sequence(axes, angles):
+    rotation = R.from_quat(START["quaternion"])
+    for axis, angle in zip(axes, angles):
+        rotation = R.from_rotvec(np.radians(angle) * np.asarray(axis) / np.linalg.norm(axis)) * rotation
+    return rotation.as_quat()
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'rotations':>9} {'scipy (ms)':>11} {'loop (ms)':>10} {'batched (ms)':>13} {'speedup':>8}")
+    for n in SIZES:
+        axes = [tuple(axis) for axis in rng.normal(size=(n, 3))]
+        angles = rng.uniform(-180, 180, n).tolist()
+
+        def loop():
+            view = START
+            for axis, angle in zip(axes, angles):
+                view = compute_rotate_camera(view, axis, angle)
+
+        scipy_time = best_of(lambda: scipy_sequence(axes, angles))
+        loop_time = best_of(loop)
+        batch_time = best_of(lambda: compose_rotations(START, axes, angles))
+        print(
+            f"{n:>9} {scipy_time * 1000:>11.3f} {loop_time * 1000:>10.3f} {batch_time * 1000:>13.3f} "
+            f"{scipy_time / batch_time:>7.1f}x"
+        )
+
+    views = [START] * 1000
+    print(f"\nrotate_views, 1000 views: {best_of(lambda: rotate_views(views, 'y', 15)) * 1000:.3f} ms")
+    for face in ("111", "210"):
+        per_call = best_of(lambda: [compute_set_view(face) for _ in range(1000)]) / 1000
+        print(f"compute_set_view({face!r}): {per_call * 1e6:.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Drives ``/api/commands`` (or ``/api/commands/stream``) at a target concurrency
+and reports p50/p95/p99 latency and throughput, overall and per server stage.
+
+Server stages come from the ``Server-Timing`` header ("nlp", "validate",
+"execute"); for the streaming endpoint the time to the first result event is
+reported as "first_result". Pair it with the mock LLM server to measure the
+backend without calling OpenAI:
+
+    python -m benchmarks.mock_openai --port 8001 --latency-ms 800
+    OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=mock PROMPT_CACHE_PATH= uvicorn asgi:app --port 5001
+    python -m benchmarks.load_test --url http://localhost:5001/api/commands --concurrency 64 --requests 2000
+
+Leaving ``PROMPT_CACHE_PATH`` empty disables the prompt cache, so repeated
+prompts still reach the (mock) LLM.
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+DEFAULT_PROMPTS = [
+    "show me a copper crystal, a few cells across",
+    "I'd like to see iron in its usual structure and then look at it from the top",
+    "make a silicon diamond lattice and spin it a bit",
+    "give me a big chunk of aluminium",
+    "3x3x3 FCC Al",
+    "rotate 90 degrees around x",
+]
+_SERVER_TIMING = re.compile(r"([\w-]+);dur=([\d.]+)")
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """
+    Reads stage durations from a ``Server-Timing`` header.
+
+    Args:
+        header (Optional[str]): e.g. ``"nlp;dur=812.4, execute;dur=3.1"``.
+
+    Returns:
+        Dict[str, float]: Stage durations in seconds.
+    """
+    return {name: float(ms) / 1000 for name, ms in _SERVER_TIMING.findall(header or "")}
+
+
+def summarize(samples: List[float]) -> dict:
+    """
+    Summarizes latency samples.
+
+    Args:
+        samples (List[float]): Latencies in seconds.
+
+    Returns:
+        dict: ``count`` and ``mean``/``p50``/``p95``/``p99``/``max`` in milliseconds.
+    """
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(samples),
+        "mean": float(values.mean()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "max": float(values.max()),
+    }
+
+
+async def _one_request(http: httpx.AsyncClient, url: str, prompt: str, stream: bool, stages: Dict[str, List[float]]) -> bool:
+    start = time.perf_counter()
+    if stream:
+        async with http.stream("POST", url, json={"prompt": prompt}) as response:
+            ok = response.status_code == 200
+            first_result = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: result") and first_result is None:
+                    first_result = time.perf_counter() - start
+                    stages["first_result"].append(first_result)
+                elif line.startswith("event: error"):
+                    ok = False
+    else:
+        response = await http.post(url, json={"prompt": prompt})
+        ok = response.status_code == 200
+        if ok:
+            for name, seconds in parse_server_timing(response.headers.get("Server-Timing")).items():
+                stages[name].append(seconds)
+    if ok:
+        stages["total"].append(time.perf_counter() - start)
+    return ok
+
+
+async def run_load(
+    url: str,
+    prompts: List[str],
+    concurrency: int,
+    requests: Optional[int] = None,
+    duration: Optional[float] = None,
+    stream: bool = False,
+    timeout: float = 120.0,
+) -> dict:
+    """
+    Sends requests from ``concurrency`` workers until ``requests`` were sent or ``duration`` elapsed.
+
+    Args:
+        url (str): The endpoint to call.
+        prompts (List[str]): Prompts, used round-robin.
+        concurrency (int): Number of requests kept in flight.
+        requests (Optional[int]): Total number of requests.
+        duration (Optional[float]): Run time in seconds, if ``requests`` is not given.
+        stream (bool): Whether ``url`` is the SSE endpoint.
+        timeout (float): Per-request timeout in seconds.
+
+    Returns:
+        dict: Throughput, error count and a latency summary per stage.
+    """
+    stages: Dict[str, List[float]] = defaultdict(list)
+    counters = {"sent": 0, "ok": 0, "errors": 0}
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_prompt() -> Optional[str]:
+        if requests is not None and counters["sent"] >= requests:
+            return None
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+        prompt = prompts[counters["sent"] % len(prompts)]
+        counters["sent"] += 1
+        return prompt
+
+    async def worker(http: httpx.AsyncClient):
+        while (prompt := next_prompt()) is not None:
+            try:
+                ok = await _one_request(http, url, prompt, stream, stages)
+            except httpx.HTTPError:
+                ok = False
+            counters["ok" if ok else "errors"] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as http:
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "requests": counters["sent"],
+        "ok": counters["ok"],
+        "errors": counters["errors"],
+        "elapsed_s": elapsed,
+        "throughput_rps": counters["ok"] / elapsed if elapsed else 0.0,
+        "stages": {name: summarize(samples) for name, samples in sorted(stages.items())},
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['requests']} requests at concurrency {report['concurrency']} in {report['elapsed_s']:.2f} s: "
+        f"{report['throughput_rps']:.1f} req/s, {report['errors']} errors"
+    )
+    print(f"{'stage':<14} {'count':>7} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+    for name, s in report["stages"].items():
+        if s["count"]:
+            print(
+                f"{name:<14} {s['count']:>7} {s['mean']:>9.1f} {s['p50']:>9.1f} {s['p95']:>9.1f} "
+                f"{s['p99']:>9.1f} {s['max']:>9.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5001/api/commands")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=None, help="total requests (default 500 unless --duration)")
+    parser.add_argument("--duration", type=float, default=None, help="run for this many seconds instead")
+    parser.add_argument("--prompts", default=None, help="file with one prompt per line")
+    parser.add_argument("--stream", action="store_true", help="the URL is /api/commands/stream")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report to this file")
+    args = parser.parse_args()
+
+    prompts = DEFAULT_PROMPTS
+    if args.prompts:
+        with open(args.prompts, encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+    requests = args.requests if args.requests is not None or args.duration else 500
+
+    report = asyncio.run(run_load(args.url, prompts, args.concurrency, requests, args.duration, args.stream))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Local stand-in for the OpenAI chat completions API, for load testing without
+paying for (or being rate-limited by) the real service.
+
+It answers ``POST /v1/chat/completions`` (streaming and non-streaming) with
+tool calls after a simulated latency. Replies come from a recording when the
+prompt was recorded, otherwise from the rule-based fast path, otherwise a
+fixed buildStructure call. Point the backend at it with ``OPENAI_BASE_URL``.
+
+Run from the 2-MVP_Backend directory:
+
+    python -m benchmarks.mock_openai --port 8001 --latency lognormal --latency-ms 800
+    OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=mock uvicorn asgi:app --port 5001
+
+To record real replies for later replay, proxy to OpenAI:
+
+    python -m benchmarks.mock_openai --record recordings.jsonl --upstream https://api.openai.com/v1
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from nlp.fast_path import parse_prompt
+from nlp.prompt_cache import normalize_prompt
+
+DEFAULT_TOOL_CALLS = [{"name": "buildStructure", "arguments": {"element": "Al", "lattice": "fcc", "nx": 2, "ny": 2, "nz": 2}}]
+# Share of the latency spent before the first streamed chunk; the rest is
+# spread over the argument fragments.
+TIME_TO_FIRST_CHUNK = 0.2
+FRAGMENT_SIZE = 16
+
+
+def make_latency_sampler(kind: str, ms: float, jitter: float, seed: Optional[int] = None) -> Callable[[], float]:
+    """
+    Returns a function that draws one response latency in seconds.
+
+    Args:
+        kind (str): "fixed" (always ``ms``), "uniform" (``ms`` +/- ``jitter`` * ``ms``)
+                    or "lognormal" (median ``ms``, log-space sigma ``jitter``).
+        ms (float): Typical latency in milliseconds.
+        jitter (float): Spread, relative to ``ms`` or as a log-space sigma.
+        seed (Optional[int]): Seed for reproducible runs.
+
+    Returns:
+        Callable[[], float]: The sampler.
+
+    Raises:
+        ValueError: If ``kind`` is unknown.
+    """
+    rng = random.Random(seed)
+    if kind == "fixed":
+        return lambda: ms / 1000
+    if kind == "uniform":
+        return lambda: max(0.0, rng.uniform(ms * (1 - jitter), ms * (1 + jitter))) / 1000
+    if kind == "lognormal":
+        return lambda: ms * rng.lognormvariate(0.0, jitter) / 1000
+    raise ValueError(f"Unknown latency distribution: {kind}")
+
+
+def load_recordings(path: Optional[str]) -> Dict[str, List[dict]]:
+    """
+    Reads recorded replies from a JSONL file of ``{"prompt": ..., "tool_calls": [{"name", "arguments"}]}``.
+
+    Args:
+        path (Optional[str]): The file, or None for no recordings.
+
+    Returns:
+        Dict[str, List[dict]]: Tool calls keyed by normalized prompt.
+    """
+    recordings = {}
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        recordings[normalize_prompt(entry["prompt"])] = entry["tool_calls"]
+        except FileNotFoundError:
+            pass
+    return recordings
+
+
+def _last_user_prompt(messages: List[dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user" and isinstance(message.get("content"), str):
+            return message["content"]
+    return ""
+
+
+def _tool_calls_for(prompt: str, recordings: Dict[str, List[dict]]) -> List[dict]:
+    recorded = recordings.get(normalize_prompt(prompt))
+    if recorded is not None:
+        return recorded
+    commands = parse_prompt(prompt)
+    if commands is not None:
+        return [{"name": c["command"], "arguments": c["params"]} for c in commands]
+    return DEFAULT_TOOL_CALLS
+
+
+def _completion(model: str, tool_calls: List[dict]) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{i}",
+                        "type": "function",
+                        "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])},
+                    }
+                    for i, call in enumerate(tool_calls)
+                ],
+            },
+            "finish_reason": "tool_calls",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason: Optional[str] = None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def _stream_completion(model: str, tool_calls: List[dict], latency: float):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    fragments = []
+    for i, call in enumerate(tool_calls):
+        arguments = json.dumps(call["arguments"])
+        fragments.append((i, call["name"], ""))
+        fragments.extend((i, None, arguments[start:start + FRAGMENT_SIZE]) for start in range(0, len(arguments), FRAGMENT_SIZE))
+
+    await asyncio.sleep(latency * TIME_TO_FIRST_CHUNK)
+    yield _chunk(completion_id, model, {"role": "assistant", "content": None})
+    pause = latency * (1 - TIME_TO_FIRST_CHUNK) / max(len(fragments), 1)
+    for index, name, arguments in fragments:
+        await asyncio.sleep(pause)
+        tool_call = {"index": index, "function": {"arguments": arguments}}
+        if name is not None:
+            tool_call.update({"id": f"call_{index}", "type": "function"})
+            tool_call["function"]["name"] = name
+        yield _chunk(completion_id, model, {"tool_calls": [tool_call]})
+    yield _chunk(completion_id, model, {}, finish_reason="tool_calls")
+    yield "data: [DONE]\n\n"
+
+
+def create_app(
+    latency: Callable[[], float] = lambda: 0.0,
+    recordings_path: Optional[str] = None,
+    upstream: Optional[str] = None,
+) -> Starlette:
+    """
+    Builds the mock server.
+
+    Args:
+        latency (Callable[[], float]): Draws each response's latency in seconds.
+        recordings_path (Optional[str]): JSONL file of recorded replies. With
+                                         ``upstream`` it is appended to instead.
+        upstream (Optional[str]): Real API base URL to proxy to and record from.
+
+    Returns:
+        Starlette: The ASGI app.
+    """
+    recordings = load_recordings(recordings_path)
+    stats = {"requests": 0, "streamed": 0, "recorded": 0}
+
+    async def record(request: Request, body: dict) -> List[dict]:
+        import httpx
+
+        proxied = dict(body, stream=False)
+        async with httpx.AsyncClient(timeout=120) as http:
+            response = await http.post(
+                f"{upstream.rstrip('/')}/chat/completions",
+                json=proxied,
+                headers={"Authorization": request.headers.get("Authorization", "")},
+            )
+        response.raise_for_status()
+        message = response.json()["choices"][0]["message"]
+        tool_calls = [
+            {"name": call["function"]["name"], "arguments": json.loads(call["function"]["arguments"] or "{}")}
+            for call in message.get("tool_calls") or []
+        ]
+        prompt = _last_user_prompt(body.get("messages", []))
+        recordings[normalize_prompt(prompt)] = tool_calls
+        with open(recordings_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"prompt": prompt, "tool_calls": tool_calls}) + "\n")
+        stats["recorded"] += 1
+        return tool_calls
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "mock")
+        stats["requests"] += 1
+        if upstream:
+            tool_calls = await record(request, body)
+            delay = 0.0
+        else:
+            tool_calls = _tool_calls_for(_last_user_prompt(body.get("messages", [])), recordings)
+            delay = latency()
+        if body.get("stream"):
+            stats["streamed"] += 1
+            return StreamingResponse(_stream_completion(model, tool_calls, delay), media_type="text/event-stream")
+        await asyncio.sleep(delay)
+        return JSONResponse(_completion(model, tool_calls))
+
+    async def mock_stats(request: Request):
+        return JSONResponse(stats)
+
+    return Starlette(routes=[
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/stats", mock_stats, methods=["GET"]),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="typical (median) latency")
+    parser.add_argument("--latency-jitter", type=float, default=0.5, help="relative spread, or log-space sigma")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--recordings", "--record", dest="recordings", default=None, help="JSONL file of recorded replies")
+    parser.add_argument("--upstream", default=None, help="proxy to this API and append its replies to --record")
+    args = parser.parse_args()
+    if args.upstream and not args.recordings:
+        parser.error("--upstream needs --record FILE")
+
+    import uvicorn
+
+    app = create_app(
+        make_latency_sampler(args.latency, args.latency_ms, args.latency_jitter, args.seed),
+        args.recordings,
+        args.upstream,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Benchmark suite for structure building, view math, command validation and startup time.
+
+Results are written as JSON so runs on different commits can be compared:
+
+    python -m benchmarks.suite --output before.json
+    git checkout my-branch
+    python -m benchmarks.suite --output after.json --compare before.json
+
+``--compare`` prints every case whose median time changed by more than
+``--threshold`` (default 10%) and exits with status 1 if any case got
+slower. ``--quick`` stops at 10^4 atoms and 10^3 commands for a fast
+check; ``--only build,view`` runs a subset of the groups.
+
+The ``import`` group times ``import app`` and ``import asgi`` in fresh
+interpreters. ``import/app_eager`` also imports the lazily loaded
+dependencies and creates the OpenAI clients, as importing the app used to;
+``import/app_warm`` adds :func:`utils.warmup.warm_up`.
+
+Run from the 2-MVP_Backend directory.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from executor.cache import structure_cache
+from executor.structure import build_structure
+from executor.view import compose_rotations, compute_rotate_camera, compute_set_view, miller_quaternion
+from models.commands import BuildStructureParams, validate_commands
+
+LATTICES = [("sc", "Po", 1), ("bcc", "Fe", 2), ("fcc", "Al", 4), ("diamond", "Si", 8)]
+FORMATS = ["pdb", "xyz", "cif", "binary"]
+ATOM_TARGETS = [1, 100, 10_000, 1_000_000]
+COMMAND_COUNTS = [10, 1_000, 100_000]
+ROTATION_COUNTS = [1, 100, 10_000]
+START_VIEW = {"quaternion": [0.0, 0.0, 0.0, 1.0], "translation": [0.0, 0.0, 0.0], "zoom": 1.0}
+SAMPLE_COMMANDS = [
+    {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc", "nx": 3, "ny": 3, "nz": 3}},
+    {"command": "rotateCamera", "params": {"axis": "x", "angle": 90}},
+    {"command": "setView", "params": {"viewObject": {
+        "quaternion": {"x": 0, "y": 0, "z": 0, "w": 1},
+        "translation": {"x": 0, "y": 0, "z": 0},
+        "zoom": 1,
+    }}},
+    {"command": "displayMessage", "params": {"message": "Done", "type": "info"}},
+    {"command": "zoom", "params": {"factor": 1.5}},
+]
+
+
+def measure(fn: Callable[[], object], setup: Optional[Callable[[], object]] = None, repeats: int = 5, min_sample: float = 0.001) -> dict:
+    """
+    Times ``fn`` and returns per-call statistics.
+
+    Without ``setup``, fast functions are looped until one sample takes at
+    least ``min_sample`` seconds. With ``setup`` (e.g. clearing a cache),
+    every call is timed on its own with ``setup`` run untimed before it.
+    Slow cases (over a second per call) are repeated only three times.
+
+    Args:
+        fn (Callable[[], object]): The code to time.
+        setup (Optional[Callable[[], object]]): Untimed preparation before each call.
+        repeats (int): Number of samples.
+        min_sample (float): Minimum duration of one sample when looping.
+
+    Returns:
+        dict: ``median_s``, ``min_s``, ``stdev_s`` per call, plus ``repeats`` and ``loops``.
+    """
+    def sample(loops: int) -> float:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        return (time.perf_counter() - start) / loops
+
+    loops = 1
+    first = sample(loops)
+    while setup is None and first * loops < min_sample and loops < 1_000_000:
+        loops *= 10
+        first = sample(loops)
+    if first > 1.0:
+        repeats = min(repeats, 3)
+    samples = [first] + [sample(loops) for _ in range(repeats - 1)]
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeats": len(samples),
+        "loops": loops,
+    }
+
+
+def _case(name: str, params: dict, stats: dict) -> dict:
+    return {"name": name, "params": params, **stats}
+
+
+def bench_build(max_atoms: int) -> List[dict]:
+    """Cold and cached ``build_structure`` across lattices, formats and supercell sizes."""
+    results = []
+    for lattice, element, per_cell in LATTICES:
+        for target in ATOM_TARGETS:
+            if target > max_atoms:
+                continue
+            n = max(1, round((target / per_cell) ** (1 / 3)))
+            atoms = per_cell * n ** 3
+            for fmt in FORMATS:
+                params = BuildStructureParams(element=element, lattice=lattice, nx=n, ny=n, nz=n, format=fmt)
+                stats = measure(lambda: build_structure(params), setup=structure_cache.clear)
+                results.append(_case(
+                    f"build_structure/{lattice}/{fmt}/{atoms}",
+                    {"lattice": lattice, "element": element, "format": fmt, "reps": n, "atoms": atoms},
+                    stats,
+                ))
+
+    params = BuildStructureParams(element="Al", lattice="fcc", nx=10, ny=10, nz=10)
+    build_structure(params)
+    results.append(_case("build_structure/cached/pdb/4000", {"atoms": 4000}, measure(lambda: build_structure(params))))
+    params = BuildStructureParams(element="Al", lattice="fcc", nx=100, ny=100, nz=100, mode="descriptor")
+    results.append(_case("build_structure/descriptor/4000000", {"atoms": 4_000_000}, measure(lambda: build_structure(params))))
+    structure_cache.clear()
+    return results
+
+
+def bench_view(max_rotations: int) -> List[dict]:
+    """Preset and Miller-index set views, single rotations and batched rotation sequences."""
+    results = [
+        _case("compute_set_view/preset", {"face": "111"}, measure(lambda: compute_set_view("111"))),
+        _case("compute_set_view/miller_cached", {"face": "210"}, measure(lambda: compute_set_view("210"))),
+        _case(
+            "compute_set_view/miller_uncached", {"face": "(3, 2, 1)"},
+            measure(lambda: compute_set_view("(3, 2, 1)"), setup=miller_quaternion.cache_clear),
+        ),
+        _case("compute_rotate_camera/axis", {"axis": "y"}, measure(lambda: compute_rotate_camera(START_VIEW, "y", 30))),
+        _case(
+            "compute_rotate_camera/vector", {"axis": [1, 1, 1]},
+            measure(lambda: compute_rotate_camera(START_VIEW, (1, 1, 1), 30)),
+        ),
+    ]
+    rng = np.random.default_rng(0)
+    for n in ROTATION_COUNTS:
+        if n > max_rotations:
+            continue
+        axes = [tuple(axis) for axis in rng.normal(size=(n, 3))]
+        angles = rng.uniform(-180, 180, n).tolist()
+        results.append(_case(f"compose_rotations/{n}", {"rotations": n}, measure(lambda: compose_rotations(START_VIEW, axes, angles))))
+    return results
+
+
+def bench_validate(max_commands: int) -> List[dict]:
+    """``validate_commands`` on command lists of increasing length."""
+    results = []
+    for n in COMMAND_COUNTS:
+        if n > max_commands:
+            continue
+        raw = (SAMPLE_COMMANDS * (n // len(SAMPLE_COMMANDS) + 1))[:n]
+        results.append(_case(f"validate_commands/{n}", {"commands": n}, measure(lambda: validate_commands(raw))))
+    return results
+
+
+# Dependencies the app imports on first use instead of at startup.
+LAZY_MODULES = ["ase", "ase.build", "ase.io", "scipy.spatial.transform", "openai"]
+IMPORT_CASES = {
+    "app": "import app",
+    "asgi": "import asgi",
+    "app_eager": (
+        "import " + ", ".join(LAZY_MODULES) + "; import app; "
+        "from nlp.llm_client import get_client, get_async_client; get_client(); get_async_client()"
+    ),
+    "app_warm": "import app; from utils.warmup import warm_up; warm_up()",
+}
+
+
+def _import_seconds(code: str) -> float:
+    # Times the statement inside a fresh interpreter, so interpreter startup is excluded.
+    script = f"import time; start = time.perf_counter(); {code}; print(time.perf_counter() - start)"
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY") or "benchmark", "WARMUP_ON_START": "false"}
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def bench_import(repeats: int) -> List[dict]:
+    """Cold import time of the Flask and ASGI apps, with eager imports and with warm-up for comparison."""
+    results = []
+    for name, code in IMPORT_CASES.items():
+        samples = [_import_seconds(code) for _ in range(repeats)]
+        results.append(_case(f"import/{name}", {"code": code}, {
+            "median_s": statistics.median(samples),
+            "min_s": min(samples),
+            "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "repeats": len(samples),
+            "loops": 1,
+        }))
+    return results
+
+
+GROUPS = {"build": bench_build, "view": bench_view, "validate": bench_validate, "import": bench_import}
+
+
+def _metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import ase
+    import pydantic
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "ase": ase.__version__,
+        "pydantic": pydantic.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_suite(groups: List[str], quick: bool = False, max_atoms: Optional[int] = None) -> dict:
+    """
+    Runs the selected benchmark groups.
+
+    Args:
+        groups (List[str]): Names from ``GROUPS``.
+        quick (bool): Cap sizes at 10^4 atoms, 10^3 commands and 100 rotations, and time 3 imports instead of 7.
+        max_atoms (Optional[int]): Largest target structure size to build.
+
+    Returns:
+        dict: ``{"metadata": ..., "results": [...]}``.
+    """
+    limits = {
+        "build": max_atoms or (10_000 if quick else max(ATOM_TARGETS)),
+        "view": 100 if quick else max(ROTATION_COUNTS),
+        "validate": 1_000 if quick else max(COMMAND_COUNTS),
+        "import": 3 if quick else 7,
+    }
+    results = []
+    for group in groups:
+        for case in GROUPS[group](limits[group]):
+            print(f"{case['name']:<45} {case['median_s'] * 1000:>12.4f} ms", flush=True)
+            results.append(case)
+    return {"metadata": _metadata(), "results": results}
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10) -> List[dict]:
+    """
+    Lists the cases whose median time changed by more than ``threshold``.
+
+    Args:
+        current (dict): A report from :func:`run_suite`.
+        baseline (dict): An earlier report.
+        threshold (float): Relative change to report, e.g. 0.10 for 10%.
+
+    Returns:
+        List[dict]: ``name``, ``baseline_s``, ``current_s`` and ``ratio`` per
+        changed case, slowest first; ``ratio`` > 1 is a regression.
+    """
+    before: Dict[str, dict] = {case["name"]: case for case in baseline["results"]}
+    changes = []
+    for case in current["results"]:
+        old = before.get(case["name"])
+        if old is None or old["median_s"] <= 0:
+            continue
+        ratio = case["median_s"] / old["median_s"]
+        if abs(ratio - 1) > threshold:
+            changes.append({"name": case["name"], "baseline_s": old["median_s"], "current_s": case["median_s"], "ratio": ratio})
+    return sorted(changes, key=lambda change: change["ratio"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"comma-separated subset of {', '.join(GROUPS)}")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--max-atoms", type=int, default=None)
+    parser.add_argument("--compare", default=None, help="baseline JSON report")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    groups = [group.strip() for group in args.only.split(",") if group.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    report = run_suite(groups, args.quick, args.max_atoms)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(report['results'])} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            changes = compare(report, json.load(f), args.threshold)
+        for change in changes:
+            label = "slower" if change["ratio"] > 1 else "faster"
+            print(f"{change['name']:<45} {change['ratio']:>6.2f}x {label}")
+        if any(change["ratio"] > 1 for change in changes):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,103 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
\ No newline at end of file
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# OpenAI-compatible endpoint, e.g. http://localhost:8001/v1 for the local
+# mock server in benchmarks/mock_openai.py. Unset uses api.openai.com.
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# Chat model used to translate prompts into commands. It must support
+# parallel tool calls so multi-step prompts take a single round trip.
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
+
+# Structure cache: in-process LRU bounded by total bytes, plus an optional
+# on-disk store shared by every worker pointed at the same directory.
+STRUCTURE_CACHE_MAX_BYTES = int(os.getenv("STRUCTURE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+STRUCTURE_CACHE_DIR = os.getenv("STRUCTURE_CACHE_DIR") or None
+# ETags and precompressed bodies of structure downloads, kept in their own
+# in-process LRU so they neither evict structures nor skew its statistics.
+DOWNLOAD_CACHE_MAX_BYTES = int(os.getenv("DOWNLOAD_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Response compression: bodies of at least COMPRESSION_MIN_BYTES are sent
+# gzip- or zstd-compressed when the client's Accept-Encoding allows it.
+# zstd needs the optional zstandard package.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+
+# Structure artifacts: buildStructure with mode "artifact" (or any full build
+# of at least ARTIFACT_MIN_ATOMS atoms; 0 disables the switch) writes the
+# file to ARTIFACT_DIR and returns its ID for GET /api/structures/<id>.
+# Files are streamed to disk ARTIFACT_CHUNK_ATOMS atoms at a time, and the
+# least recently served ones are deleted beyond ARTIFACT_MAX_BYTES.
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "nlp_atomic_artifacts"))
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(1024 * 1024 * 1024)))
+ARTIFACT_MIN_ATOMS = int(os.getenv("ARTIFACT_MIN_ATOMS", "0"))
+ARTIFACT_CHUNK_ATOMS = int(os.getenv("ARTIFACT_CHUNK_ATOMS", "65536"))
+# Cache lifetime sent with artifact files; their content never changes.
+ARTIFACT_CACHE_SECONDS = int(os.getenv("ARTIFACT_CACHE_SECONDS", str(365 * 24 * 3600)))
+
+# Import ase.build, ase.io and the OpenAI SDK and create the LLM clients at
+# startup (see utils/warmup.py) instead of on the first request that needs
+# them. Off by default so tests and one-off scripts start quickly.
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "false").lower() in ("1", "true", "yes")
+# Structures built into the structure cache during warm-up, as comma-separated
+# element:lattice[:n] entries, e.g. "Cu:fcc:3,Fe:bcc:2".
+WARMUP_STRUCTURES = os.getenv("WARMUP_STRUCTURES", "")
+
+# Production server (gunicorn.conf.py): the master imports and warms the app
+# once, then forks SERVER_WORKERS workers that each run SERVER_THREADS
+# threads. Workers get SERVER_GRACEFUL_TIMEOUT seconds to finish in-flight
+# requests on restart, and are recycled after about SERVER_MAX_REQUESTS
+# requests (0 never recycles).
+SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:5001")
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", "4"))
+SERVER_WORKER_CLASS = os.getenv("SERVER_WORKER_CLASS", "gthread")
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "120"))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
+
+# Largest structure, in atoms, that buildStructure and computeBonds will
+# build. Larger requests are rejected with a 400 before any tiling.
+MAX_ATOMS = int(os.getenv("MAX_ATOMS", str(10_000_000)))
+
+# Structure serializer: "numpy" (vectorized, default) or "ase" (ase.io.write).
+STRUCTURE_WRITER = os.getenv("STRUCTURE_WRITER", "numpy")
+
+# Async (ASGI) entry point: pool used to run CPU-bound executors off the
+# event loop ("thread" or "process"), its size, and the cap on concurrent
+# in-flight LLM calls per process.
+EXECUTOR_POOL = os.getenv("EXECUTOR_POOL", "thread")
+EXECUTOR_WORKERS = int(os.getenv("EXECUTOR_WORKERS", str(os.cpu_count() or 1)))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "256"))
+
+# Prompt-to-commands cache shared by all workers through one SQLite file.
+# Set PROMPT_CACHE_PATH to an empty string to disable it.
+PROMPT_CACHE_PATH = os.getenv("PROMPT_CACHE_PATH", os.path.join(tempfile.gettempdir(), "nlp_atomic_prompt_cache.sqlite3"))
+PROMPT_CACHE_TTL_SECONDS = float(os.getenv("PROMPT_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "10000"))
+
+# /api/commands/batch: maximum items per request and items run concurrently.
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Threads used to run independent commands of one request concurrently.
+DISPATCH_WORKERS = int(os.getenv("DISPATCH_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Per-session viewer state (camera view and active structure). Sessions are
+# kept in process memory unless SESSION_STORE_PATH names a SQLite file
+# shared by every worker.
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH") or None
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", str(30 * 60)))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+
+# Opt-in per-request profiling. With PROFILE_DIR set, /api/commands requests
+# carrying "X-Profile: cpu,memory" (or ?profile=cpu,memory) run under
+# cProfile and/or tracemalloc and the results are written to PROFILE_DIR.
+# Unset disables profiling entirely; PROFILE_TOP_N bounds the summaries.
+PROFILE_DIR = os.getenv("PROFILE_DIR") or None
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "25"))
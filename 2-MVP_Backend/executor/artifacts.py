@@ -0,0 +1,269 @@
+import os
+import re
+import json
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+from config import ARTIFACT_DIR, ARTIFACT_MAX_BYTES, ARTIFACT_MIN_ATOMS, ARTIFACT_CHUNK_ATOMS
+from models.commands import BuildStructureParams
+from executor.cache import structure_cache_key
+from executor.serializer import iter_serialized
+from executor.structure import _conventional_cell, check_supercell_size
+from executor.tiling import tile_structure
+from utils.error_handlers import ExecutionError, ValidationError
+from utils.metrics import metrics, stage_seconds
+
+ARTIFACT_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+ARTIFACT_FORMATS = ("pdb", "xyz", "cif", "binary")
+_EXTENSIONS = {"pdb": "pdb", "xyz": "xyz", "cif": "cif", "binary": "bin"}
+
+
+def artifact_id(params: BuildStructureParams) -> str:
+    """
+    Computes the artifact ID of a structure: the same for every format and mode.
+
+    Args:
+        params (BuildStructureParams): The build parameters.
+
+    Returns:
+        str: A 64-character hex digest.
+    """
+    return structure_cache_key(params.model_copy(update={"format": "pdb", "mode": "full"}))
+
+
+def should_store_artifact(params: BuildStructureParams) -> bool:
+    """
+    Tells whether a build goes to the artifact store instead of the response body.
+
+    True for ``mode == "artifact"``, and for full builds of at least
+    ``ARTIFACT_MIN_ATOMS`` atoms when that threshold is set.
+    """
+    if params.mode == "artifact":
+        return True
+    if params.mode != "full" or ARTIFACT_MIN_ATOMS <= 0:
+        return False
+    try:
+        natoms = len(_conventional_cell(params)) * params.nx * params.ny * params.nz
+    except Exception:
+        return False  # Let build_structure report the error.
+    return natoms >= ARTIFACT_MIN_ATOMS
+
+
+class ArtifactStore:
+    """
+    Structure files on disk, addressed by a hash of their build parameters.
+
+    An artifact ID covers every format of one structure: the format a build
+    asks for is written at once, the others when first requested. Files are
+    streamed to disk in chunks of ``chunk_atoms`` atoms, so the full text
+    never exists in memory, and written under a temporary name and renamed so
+    several workers can share the directory. Past ``max_bytes`` the least
+    recently served files are deleted; the small metadata file of each
+    artifact is kept, so an old ID still works and is simply rebuilt.
+
+    The size of the directory is walked once and then tracked per process:
+    each write adds to it, and only a write that takes it past ``max_bytes``
+    walks the directory again to prune and to pick up other workers' files.
+    """
+
+    def __init__(self, directory: str = ARTIFACT_DIR, max_bytes: int = ARTIFACT_MAX_BYTES, chunk_atoms: int = ARTIFACT_CHUNK_ATOMS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_atoms = chunk_atoms
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.hits = 0
+        self.pruned = 0
+        self._total_bytes: Optional[int] = None
+
+    def _path(self, artifact_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, artifact_id[:2], f"{artifact_id}.{suffix}")
+
+    def path(self, artifact_id: str, fmt: str) -> str:
+        return self._path(artifact_id, _EXTENSIONS[fmt])
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def _write_atomic(self, path: str, chunks) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _read_metadata(self, artifact_id: str) -> Optional[dict]:
+        try:
+            with open(self._path(artifact_id, "json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _materialize(self, artifact_id: str, fmt: str, params: BuildStructureParams) -> Tuple[str, dict]:
+        # Writes one format variant (and the metadata on first use); returns the file path and metadata.
+        path = self.path(artifact_id, fmt)
+        metadata = self._read_metadata(artifact_id)
+        if metadata is not None and os.path.exists(path):
+            os.utime(path)
+            self._count("hits")
+            return path, metadata
+
+        try:
+            with stage_seconds.time("build"):
+                cell = _conventional_cell(params)
+                check_supercell_size(params, len(cell))
+                numbers, positions, supercell = tile_structure(
+                    cell.numbers, cell.positions, cell.cell.array, (params.nx, params.ny, params.nz)
+                )
+            with stage_seconds.time("serialize"):
+                self._write_atomic(path, iter_serialized(fmt, numbers, positions, supercell, self.chunk_atoms))
+            if metadata is None:
+                metadata = {
+                    **params.model_dump(exclude={"format", "mode"}),
+                    "format": fmt,
+                    "natoms": int(len(numbers)),
+                }
+                self._write_atomic(self._path(artifact_id, "json"), [json.dumps(metadata).encode("utf-8")])
+        except ValidationError:
+            raise
+        except OSError as e:
+            raise ExecutionError(f"Failed to write structure artifact: {e}")
+        except Exception as e:
+            raise ExecutionError(f"Failed to build structure: {e}")
+        self._count("writes")
+        self._track_write(path)
+        return path, metadata
+
+    def put(self, params: BuildStructureParams) -> dict:
+        """
+        Writes a structure to the store, unless it is already there.
+
+        Args:
+            params (BuildStructureParams): The build parameters; ``format`` picks the file written.
+
+        Returns:
+            dict: ``structureId``, ``format``, ``natoms``, ``bytes`` and the ``url`` to fetch it from.
+
+        Raises:
+            ValidationError: If the structure has more than ``MAX_ATOMS`` atoms.
+            ExecutionError: If the structure cannot be built or written.
+        """
+        art_id = artifact_id(params)
+        fmt = params.format.lower()
+        path, metadata = self._materialize(art_id, fmt, params)
+        return {
+            "structureId": art_id,
+            "format": fmt,
+            "natoms": metadata["natoms"],
+            "bytes": os.path.getsize(path),
+            "url": f"/api/structures/{art_id}?format={fmt}",
+        }
+
+    def open(self, art_id: str, fmt: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """
+        Finds the file of an artifact in a format, writing that variant if needed.
+
+        Args:
+            art_id (str): An ID returned by :meth:`put`.
+            fmt (Optional[str]): One of ``ARTIFACT_FORMATS``; defaults to the format first written.
+
+        Returns:
+            Optional[Tuple[str, str]]: The file path and its format, or None for an unknown ID.
+
+        Raises:
+            ValidationError: If the format is not supported.
+            ExecutionError: If the variant cannot be built or written.
+        """
+        if fmt is not None and fmt.lower() not in ARTIFACT_FORMATS:
+            raise ValidationError(f"Unsupported structure format: {fmt}. Must be one of {list(ARTIFACT_FORMATS)}")
+        if not ARTIFACT_ID_PATTERN.match(art_id):
+            return None
+        metadata = self._read_metadata(art_id)
+        if metadata is None:
+            return None
+        fmt = (fmt or metadata["format"]).lower()
+        params = BuildStructureParams(**{key: metadata[key] for key in ("element", "lattice", "nx", "ny", "nz", "a")}, format=fmt)
+        path, _ = self._materialize(art_id, fmt, params)
+        return path, fmt
+
+    def _track_write(self, path: str) -> None:
+        # Adds a new file to the tracked size and prunes only once it goes past max_bytes.
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += size
+            over = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over:
+            self._prune(keep=path)
+
+    def _prune(self, keep: str) -> None:
+        # Deletes the least recently served structure files beyond max_bytes and resets the tracked size.
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json") or name.startswith("tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            self._count("pruned")
+        with self._lock:
+            self._total_bytes = total
+
+    def stats(self) -> dict:
+        """
+        Returns this process's write/hit/prune counters and tracked size (None before the first write).
+
+        Returns:
+            dict: Counters suitable for JSON serialization.
+        """
+        with self._lock:
+            return {
+                "writes": self.writes,
+                "hits": self.hits,
+                "pruned": self.pruned,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "directory": self.directory,
+            }
+
+
+artifact_store = ArtifactStore()
+
+
+def open_artifact(art_id: str, fmt: Optional[str] = None) -> Optional[Tuple[str, str]]:
+    """Module-level :meth:`ArtifactStore.open` on the shared store, so it can be submitted to a process pool."""
+    return artifact_store.open(art_id, fmt)
+
+
+metrics.register_callback(
+    "nlp_atomic_artifact_operations_total",
+    "Structure artifact files written, served from disk and pruned by this process.",
+    lambda: {op: artifact_store.stats()[op] for op in ("writes", "hits", "pruned")},
+    kind="counter",
+    label="operation",
+)
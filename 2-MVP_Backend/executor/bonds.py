@@ -0,0 +1,189 @@
+import json
+import base64
+import itertools
+from typing import Tuple
+
+import numpy as np
+
+from models.commands import BuildStructureParams, ComputeBondsParams
+from executor.cache import structure_cache, structure_cache_key
+from executor.structure import _conventional_cell, check_supercell_size
+from executor.tiling import tile_structure
+from utils.error_handlers import ExecutionError, ValidationError
+from utils.metrics import stage_seconds
+
+
+def _half_shell(reach: np.ndarray):
+    # Bin offsets within ``reach`` that are lexicographically >= 0; together
+    # with their negatives they cover every neighbouring bin exactly once.
+    for offset in itertools.product(*(range(-r, r + 1) for r in reach)):
+        if offset >= (0, 0, 0):
+            yield np.asarray(offset)
+
+
+def find_bonds(
+    numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray, tolerance: float = 0.45
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds every pair of atoms closer than the sum of their covalent radii plus ``tolerance``.
+
+    The search is a cell list in fractional coordinates: atoms are sorted
+    into bins at least one cutoff wide, and each atom is only compared with
+    the atoms of the neighbouring bins (half of them, since every pair is
+    seen from both ends), so the cost grows linearly with the number of
+    atoms. Bins past the cell faces wrap around with a lattice translation,
+    so bonds across the periodic boundaries are found too, with the image of
+    the second atom. Each bin offset is one vectorized pass over all atoms.
+
+    Args:
+        numbers (np.ndarray): Atomic numbers, shape (N,).
+        positions (np.ndarray): Cartesian positions in Angstroms, shape (N, 3).
+        cell (np.ndarray): Cell vectors as rows, shape (3, 3); all three directions are periodic.
+        tolerance (float): Angstroms added to the sum of the covalent radii.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: ``pairs`` (M, 2) uint32 atom indices
+        and ``images`` (M, 3) int8 cell offsets, such that atom ``i`` is
+        bonded to atom ``j`` translated by ``images @ cell``. Each bond is
+        listed once, with ``i < j`` (or ``i == j`` for an atom bonded to its
+        own image), sorted by ``i`` then ``j``.
+
+    Raises:
+        ValueError: If the cell is singular.
+    """
+    numbers = np.asarray(numbers)
+    positions = np.asarray(positions, dtype=float)
+    cell = np.asarray(cell, dtype=float)
+    volume = abs(np.linalg.det(cell))
+    if volume < 1e-9:
+        raise ValueError("Bonds need a cell with non-zero volume.")
+    n = len(numbers)
+    if n == 0:
+        return np.empty((0, 2), dtype=np.uint32), np.empty((0, 3), dtype=np.int8)
+    from ase.data import covalent_radii  # Deferred: importing ase loads ase.atoms.
+
+    radii = covalent_radii[numbers]
+    cutoff = 2 * radii.max() + tolerance
+
+    # Wrap into the cell; `wraps` remembers the lattice offset of each original position.
+    fractional = positions @ np.linalg.inv(cell)
+    wraps = np.floor(fractional)
+    fractional -= wraps
+
+    # Bins at least `cutoff` wide measured perpendicular to the cell faces;
+    # a cell narrower than the cutoff is searched over several images.
+    widths = volume / np.linalg.norm(np.cross(cell[[1, 2, 0]], cell[[2, 0, 1]]), axis=1)
+    bins = np.maximum(1, (widths // cutoff).astype(np.int64))
+    reach = np.ceil(cutoff / (widths / bins)).astype(np.int64)
+    atom_bins = np.minimum((fractional * bins).astype(np.int64), bins - 1)
+
+    # Work in bin order, so each bin's atoms are contiguous and gathers stay local.
+    linear = np.ravel_multi_index(atom_bins.T, bins)
+    order = np.argsort(linear, kind="stable")
+    atom_bins = atom_bins[order]
+    wrapped = fractional[order] @ cell
+    radii = radii[order]
+    wraps = wraps[order].astype(np.int64)
+    starts = np.concatenate(([0], np.cumsum(np.bincount(linear, minlength=int(np.prod(bins))))))
+    uniform = bool(np.all(radii == radii[0]))
+
+    found_i, found_j, found_images = [], [], []
+    for offset in _half_shell(reach):
+        target = atom_bins + offset
+        shift = np.floor_divide(target, bins)
+        target_linear = np.ravel_multi_index((target - shift * bins).T, bins)
+        counts = starts[target_linear + 1] - starts[target_linear]
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        i = np.repeat(np.arange(n), counts)
+        j = np.repeat(starts[target_linear] - (np.cumsum(counts) - counts), counts) + np.arange(total)
+
+        # Atom i is compared with j translated by `shift`; move i the other way instead.
+        origin = wrapped - shift @ cell
+        vectors = wrapped[j] - origin[i]
+        distance_sq = np.einsum("ij,ij->i", vectors, vectors)
+        limit = 2 * radii[0] + tolerance if uniform else radii[i] + radii[j] + tolerance
+        keep = (distance_sq <= limit * limit) & (distance_sq > 1e-12)
+        if not offset.any():
+            keep &= i < j
+        i, j = i[keep], j[keep]
+        found_i.append(order[i])
+        found_j.append(order[j])
+        found_images.append(shift[i] - wraps[j] + wraps[i])
+
+    i = np.concatenate(found_i)
+    j = np.concatenate(found_j)
+    images = np.concatenate(found_images)
+    # Orient each bond from the lower index (for an atom and its own image, towards the positive image).
+    flip = (i > j) | ((i == j) & (np.sign(images) @ np.array([9, 3, 1]) < 0))
+    i, j = np.where(flip, j, i), np.where(flip, i, j)
+    images[flip] *= -1
+    sort = np.argsort(i.astype(np.int64) * n + j, kind="stable")
+    return np.stack([i[sort], j[sort]], axis=1).astype(np.uint32), images[sort].astype(np.int8)
+
+
+def _encode(array: np.ndarray, fmt: str, dtype: str):
+    if fmt == "json":
+        return array.ravel().tolist()
+    return base64.b64encode(np.ascontiguousarray(array, dtype=dtype).tobytes()).decode("ascii")
+
+
+def compute_bonds(params: ComputeBondsParams) -> dict:
+    """
+    Computes the bonds of the supercell ``buildStructure`` builds from the same parameters.
+
+    Atom indices follow the order of the built structure file. Bonds within
+    the supercell go in ``bonds``; with ``params.periodic``, bonds that
+    cross a face of the supercell go in ``periodicBonds`` with the cell
+    offset of their second atom in ``periodicImages``. Results are cached
+    in the structure cache.
+
+    Args:
+        params (ComputeBondsParams): The structure and bonding parameters.
+
+    Returns:
+        dict: ``natoms``, ``nbonds``, ``nperiodic``, ``format``, ``bonds``,
+              ``periodicBonds`` and ``periodicImages``. With ``format``
+              "binary" the arrays are base64-encoded little-endian
+              ``uint32`` index pairs and ``int8`` image triples; with "json"
+              they are flat lists.
+
+    Raises:
+        ValidationError: If the structure has more than ``MAX_ATOMS`` atoms.
+        ExecutionError: If the structure cannot be built.
+    """
+    build_params = BuildStructureParams(**params.model_dump(include={"element", "lattice", "nx", "ny", "nz", "a"}))
+    key = f"{structure_cache_key(build_params)}.bonds.{params.tolerance!r}.{params.periodic}.{params.format}"
+    with stage_seconds.time("structure_cache"):
+        cached = structure_cache.get(key)
+    if cached is not None:
+        return json.loads(cached)
+
+    try:
+        with stage_seconds.time("build"):
+            cell = _conventional_cell(build_params)
+            check_supercell_size(params, len(cell))
+            numbers, positions, supercell = tile_structure(
+                cell.numbers, cell.positions, cell.cell.array, (params.nx, params.ny, params.nz)
+            )
+        with stage_seconds.time("bonds"):
+            pairs, images = find_bonds(numbers, positions, supercell, params.tolerance)
+    except ValidationError:
+        raise
+    except Exception as e:
+        raise ExecutionError(f"Failed to compute bonds: {e}")
+
+    internal = ~images.any(axis=1)
+    periodic = ~internal if params.periodic else np.zeros(len(pairs), dtype=bool)
+    result = {
+        "natoms": int(len(numbers)),
+        "nbonds": int(internal.sum()),
+        "nperiodic": int(periodic.sum()),
+        "format": params.format,
+        "bonds": _encode(pairs[internal], params.format, "<u4"),
+        "periodicBonds": _encode(pairs[periodic], params.format, "<u4"),
+        "periodicImages": _encode(images[periodic], params.format, "i1"),
+    }
+    structure_cache.put(key, json.dumps(result))
+    return result
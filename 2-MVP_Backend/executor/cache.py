@@ -0,0 +1,191 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+from models.commands import BuildStructureParams
+from config import STRUCTURE_CACHE_MAX_BYTES, STRUCTURE_CACHE_DIR, DOWNLOAD_CACHE_MAX_BYTES
+from utils.metrics import metrics
+
+
+def structure_cache_key(params: BuildStructureParams) -> str:
+    """
+    Computes a content-addressed key for a set of build parameters.
+
+    The parameters are normalized (lattice and format lower-cased, the
+    lattice constant coerced to float) and serialized with sorted keys, so
+    equivalent requests always hash to the same key.
+
+    Args:
+        params (BuildStructureParams): The validated build parameters.
+
+    Returns:
+        str: The hex SHA-256 digest of the normalized parameters.
+    """
+    normalized = params.model_dump()
+    normalized["lattice"] = normalized["lattice"].lower()
+    normalized["format"] = normalized["format"].lower()
+    if normalized["a"] is not None:
+        normalized["a"] = float(normalized["a"])
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StructureCache:
+    """
+    Two-tier cache for serialized structures.
+
+    The first tier is an in-process LRU bounded by the total size of the
+    stored values in bytes. The second tier is an optional directory on
+    disk, written atomically so several worker processes can share it.
+    Values are text or bytes.
+    """
+
+    def __init__(self, max_bytes: int = STRUCTURE_CACHE_MAX_BYTES, cache_dir: Optional[str] = STRUCTURE_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, binary: bool = False) -> Optional[Union[str, bytes]]:
+        """
+        Looks up a key, checking memory first and then disk.
+
+        A disk hit is promoted into the in-process tier.
+
+        Args:
+            key (str): The cache key.
+            binary (bool): Read a bytes value from the disk tier.
+
+        Returns:
+            Optional[Union[str, bytes]]: The cached value, or None on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key][0]
+
+        value = self._read_disk(key, binary)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, value)
+        return value
+
+    def put(self, key: str, value: Union[str, bytes]) -> None:
+        """
+        Stores a value in both tiers.
+
+        Args:
+            key (str): The cache key.
+            value (Union[str, bytes]): The serialized structure, or a derived bytes entry.
+        """
+        with self._lock:
+            self._insert(key, value)
+        self._write_disk(key, value)
+
+    def clear(self) -> None:
+        """Drops every in-process entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss/eviction counters and the current occupancy.
+
+        Returns:
+            dict: Counters suitable for JSON serialization.
+        """
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": self.cache_dir is not None,
+            }
+
+    def _insert(self, key: str, value: Union[str, bytes]) -> None:
+        # Caller must hold self._lock.
+        size = len(value) if isinstance(value, bytes) else len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._size -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _read_disk(self, key: str, binary: bool = False) -> Optional[Union[str, bytes]]:
+        if self.cache_dir is None:
+            return None
+        try:
+            if binary:
+                with open(self._disk_path(key), "rb") as f:
+                    return f.read()
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, value: Union[str, bytes]) -> None:
+        if self.cache_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with (os.fdopen(fd, "wb") if isinstance(value, bytes) else os.fdopen(fd, "w", encoding="utf-8")) as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The disk tier is best-effort; the in-process tier still serves.
+            pass
+
+
+structure_cache = StructureCache()
+# ETags and precompressed bodies of downloads, derived from structure_cache entries.
+download_cache = StructureCache(max_bytes=DOWNLOAD_CACHE_MAX_BYTES, cache_dir=None)
+
+metrics.register_callback(
+    "nlp_atomic_structure_cache_lookups_total",
+    "Structure cache lookups by outcome.",
+    lambda: {outcome: structure_cache.stats()[outcome] for outcome in ("memory_hits", "disk_hits", "misses")},
+    kind="counter",
+    label="outcome",
+)
+metrics.register_callback(
+    "nlp_atomic_structure_cache_bytes", "Bytes held by the in-process structure cache.", lambda: structure_cache.stats()["bytes"]
+)
+metrics.register_callback(
+    "nlp_atomic_download_cache_lookups_total",
+    "Download cache (ETags and compressed bodies) lookups by outcome.",
+    lambda: {outcome: download_cache.stats()[outcome] for outcome in ("memory_hits", "misses")},
+    kind="counter",
+    label="outcome",
+)
+metrics.register_callback(
+    "nlp_atomic_download_cache_bytes", "Bytes held by the in-process download cache.", lambda: download_cache.stats()["bytes"]
+)
@@ -0,0 +1,220 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from config import DISPATCH_WORKERS
+from models.commands import Command, BuildStructureParams, ComputeBondsParams, RotateCameraParams, SetViewParams
+from executor.structure import build_structure
+from executor.artifacts import artifact_store, should_store_artifact
+from executor.bonds import compute_bonds
+from executor.view import compute_rotate_camera
+from utils.error_handlers import ExecutionError, ValidationError
+from utils.metrics import executor_seconds
+from utils.profiling import is_profiling
+
+DEFAULT_VIEW = {"quaternion": [0, 0, 0, 1], "translation": [0, 0, 0], "zoom": 1}
+
+
+class ExecutorSpec(NamedTuple):
+    fn: Callable[[Any, dict], Any]
+    resource: Optional[str]
+
+
+EXECUTORS: Dict[str, ExecutorSpec] = {}
+
+
+def register_executor(command: str, resource: Optional[str] = None):
+    """
+    Registers the executor for a command name.
+
+    The executor is called as ``fn(params, state)`` with the already validated
+    params model and a per-request state dict. Commands that declare the same
+    ``resource`` (e.g. "camera") read and update shared state, so they run in
+    request order; commands without a resource are independent and may run
+    concurrently with anything else.
+
+    Args:
+        command (str): The ``Command.command`` value handled by the executor.
+        resource (Optional[str]): Name of the state the executor depends on.
+
+    Returns:
+        The decorator that registers the function.
+    """
+    def decorator(fn):
+        EXECUTORS[command] = ExecutorSpec(fn, resource)
+        return fn
+    return decorator
+
+
+@register_executor("buildStructure")
+def _execute_build_structure(params: BuildStructureParams, state: dict):
+    if should_store_artifact(params):
+        return artifact_store.put(params)
+    return build_structure(params)
+
+
+@register_executor("computeBonds")
+def _execute_compute_bonds(params: ComputeBondsParams, state: dict):
+    return compute_bonds(params)
+
+
+# Commands the viewer carries out itself. Their result is the validated
+# params, so the frontend receives them in order with the other results.
+FRONTEND_COMMANDS = (
+    "loadPdb",
+    "setRepresentation",
+    "setBackgroundColor",
+    "translateCamera",
+    "zoom",
+    "resetView",
+    "toggleAxes",
+    "toggleUnitCell",
+    "displayMessage",
+)
+
+
+def _pass_through(params, state: dict):
+    return params.model_dump(exclude_none=True)
+
+
+for _command in FRONTEND_COMMANDS:
+    register_executor(_command)(_pass_through)
+
+
+@register_executor("setView", resource="camera")
+def _execute_set_view(params: SetViewParams, state: dict):
+    view = params.viewObject
+    state["view"] = {
+        "quaternion": [view.quaternion.x, view.quaternion.y, view.quaternion.z, view.quaternion.w],
+        "translation": [view.translation.x, view.translation.y, view.translation.z],
+        "zoom": view.zoom,
+    }
+    return state["view"]
+
+
+@register_executor("rotateCamera", resource="camera")
+def _execute_rotate_camera(params: RotateCameraParams, state: dict):
+    axis = tuple(params.axis) if isinstance(params.axis, list) else params.axis
+    state["view"] = compute_rotate_camera(state.get("view", DEFAULT_VIEW), axis, params.angle)
+    return state["view"]
+
+
+def execute_command(command: Command, state: Optional[dict] = None):
+    """
+    Executes a single validated command and returns its result.
+
+    The executor's duration is observed in ``nlp_atomic_executor_seconds``.
+
+    Args:
+        command (Command): A validated command.
+        state (Optional[dict]): Per-request state shared by dependent commands.
+
+    Returns:
+        The executor's result (structure text, descriptor dict or view object).
+
+    Raises:
+        ValidationError: If the executor rejects the parameters (e.g. a structure over ``MAX_ATOMS``).
+        ExecutionError: If the command is unknown or its executor fails.
+    """
+    command_type = command.command
+    spec = EXECUTORS.get(command_type)
+    if spec is None:
+        raise ExecutionError(f"Error executing command {command_type}: Unknown command type: {command_type}")
+    try:
+        with executor_seconds.time(command_type):
+            return spec.fn(command.params, state if state is not None else {})
+    except ValidationError:
+        raise
+    except Exception as e:
+        raise ExecutionError(f"Error executing command {command_type}: {str(e)}")
+
+
+def plan_chains(commands: List[Command]) -> List[List[int]]:
+    """
+    Groups commands into chains that must run sequentially.
+
+    Commands sharing a resource form one chain in request order; every
+    command without a resource is a chain of its own.
+
+    Args:
+        commands (List[Command]): Validated commands.
+
+    Returns:
+        List[List[int]]: Chains of command indices, ordered by first index.
+    """
+    chains: List[List[int]] = []
+    by_resource: Dict[str, List[int]] = {}
+    for i, command in enumerate(commands):
+        spec = EXECUTORS.get(command.command)
+        resource = spec.resource if spec is not None else None
+        if resource is None:
+            chains.append([i])
+        elif resource in by_resource:
+            by_resource[resource].append(i)
+        else:
+            by_resource[resource] = [i]
+            chains.append(by_resource[resource])
+    return chains
+
+
+_pool = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=DISPATCH_WORKERS, thread_name_prefix="dispatch")
+    return _pool
+
+
+def _forget_pool() -> None:
+    # A forked worker does not inherit the pool's threads.
+    global _pool
+    _pool = None
+
+
+os.register_at_fork(after_in_child=_forget_pool)
+
+
+def execute_commands(commands: List[Command], state: Optional[dict] = None) -> list:
+    """
+    Executes validated commands, running independent chains concurrently.
+
+    Results are returned in request order. If several commands fail, the
+    error of the earliest one is raised.
+
+    Args:
+        commands (List[Command]): Validated commands.
+        state (Optional[dict]): Per-request state shared by dependent commands.
+
+    Returns:
+        list: One result per command.
+
+    Raises:
+        ValidationError: If an executor rejects its parameters.
+        ExecutionError: If any command is unknown or its executor fails.
+    """
+    state = state if state is not None else {}
+    chains = plan_chains(commands)
+    results = [None] * len(commands)
+
+    def run_chain(chain: List[int]):
+        # Stops at the first failure and reports it with its command index.
+        for i in chain:
+            try:
+                results[i] = execute_command(commands[i], state)
+            except (ExecutionError, ValidationError) as e:
+                return i, e
+        return None
+
+    # A profiled request runs its chains inline so cProfile sees them.
+    if len(chains) <= 1 or DISPATCH_WORKERS <= 1 or is_profiling():
+        failures = [run_chain(chain) for chain in chains]
+    else:
+        futures = [_get_pool().submit(run_chain, chain) for chain in chains]
+        failures = [future.result() for future in futures]
+
+    failures = [f for f in failures if f is not None]
+    if failures:
+        raise min(failures, key=lambda f: f[0])[1]
+    return results
@@ -0,0 +1,359 @@
+import base64
+import struct
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+# Row templates. The constant PDB columns written by ASE (residue name,
+# residue number, occupancy, B-factor) are baked in, leaving only the
+# per-atom fields to substitute.
+_PDB_ROW = "ATOM  %5d %4s MOL     1    %8.3f%8.3f%8.3f  1.00  0.00          %2s  \n"
+_XYZ_ROW = "%-2s %22.15f %22.15f %22.15f\n"
+_CIF_ROW = "  %-2s  %-8s  1.0  %s  %s  %s  1.0000\n"
+
+# RasMol complains if the atom index exceeds 100000, so ASE wraps it.
+_PDB_MAXNUM = 100000
+
+_CIF_CELL_TAGS = [
+    "_cell_length_a",
+    "_cell_length_b",
+    "_cell_length_c",
+    "_cell_angle_alpha",
+    "_cell_angle_beta",
+    "_cell_angle_gamma",
+]
+
+
+@lru_cache(maxsize=1)
+def _symbols() -> Tuple[np.ndarray, np.ndarray]:
+    # Chemical symbols indexed by atomic number, and their upper-case forms,
+    # as NumPy arrays so a whole column of symbols can be gathered with one
+    # fancy-indexing operation.
+    from ase.data import chemical_symbols  # Deferred: importing ase loads ase.atoms.
+
+    return np.array(chemical_symbols, dtype=object), np.array([s.upper() for s in chemical_symbols], dtype=object)
+
+
+def _format_rows(template: str, columns: list) -> str:
+    """
+    Formats every row of a table with a single %-interpolation.
+
+    The columns are interleaved into one flat object array, and the row
+    template repeated once per row, so the formatting loop runs entirely
+    in C instead of one Python-level write per atom.
+    """
+    n = len(columns[0])
+    if n == 0:
+        return ""
+    table = np.empty((n, len(columns)), dtype=object)
+    for i, column in enumerate(columns):
+        table[:, i] = column
+    return (template * n) % tuple(table.ravel().tolist())
+
+
+def _row_blocks(n: int, chunk_atoms: Optional[int]) -> Iterator[slice]:
+    # Atom ranges of at most chunk_atoms rows; a single block when None.
+    step = chunk_atoms or max(n, 1)
+    for start in range(0, n, step):
+        yield slice(start, min(start + step, n))
+
+
+def _iter_pdb(numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray, chunk_atoms: Optional[int] = None) -> Iterator[str]:
+    from ase.cell import Cell
+
+    symbols, symbols_upper = _symbols()
+    ase_cell = Cell(cell)
+    cellpar = ase_cell.cellpar()
+    _, rot_t = ase_cell.standard_form()
+    p = positions.dot(rot_t.T)
+
+    yield "CRYST1%9.3f%9.3f%9.3f%7.2f%7.2f%7.2f P 1\n" % tuple(cellpar) + "MODEL     1\n"
+    index = np.arange(1, len(numbers) + 1) % _PDB_MAXNUM
+    for rows in _row_blocks(len(numbers), chunk_atoms):
+        block = numbers[rows]
+        yield _format_rows(
+            _PDB_ROW, [index[rows].tolist(), symbols[block], p[rows, 0], p[rows, 1], p[rows, 2], symbols_upper[block]]
+        )
+    yield "ENDMDL\n"
+
+
+def write_pdb(numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray) -> str:
+    """
+    Serializes a periodic structure as PDB text.
+
+    The output is byte-identical to ``ase.io.write(..., format="proteindatabank")``.
+
+    Args:
+        numbers (np.ndarray): Atomic numbers, shape (N,).
+        positions (np.ndarray): Cartesian positions in Angstroms, shape (N, 3).
+        cell (np.ndarray): Cell vectors as rows, shape (3, 3).
+
+    Returns:
+        str: The PDB file contents.
+    """
+    return "".join(_iter_pdb(numbers, positions, cell))
+
+
+def _iter_xyz(numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray, chunk_atoms: Optional[int] = None) -> Iterator[str]:
+    symbols, _ = _symbols()
+    yield "%d\n\n" % len(numbers)
+    for rows in _row_blocks(len(numbers), chunk_atoms):
+        yield _format_rows(_XYZ_ROW, [symbols[numbers[rows]], positions[rows, 0], positions[rows, 1], positions[rows, 2]])
+
+
+def write_xyz(numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray) -> str:
+    """
+    Serializes a structure as plain XYZ text.
+
+    The output is byte-identical to ``ase.io.write(..., format="xyz")``.
+
+    Args:
+        numbers (np.ndarray): Atomic numbers, shape (N,).
+        positions (np.ndarray): Cartesian positions in Angstroms, shape (N, 3).
+        cell (np.ndarray): Cell vectors as rows, shape (3, 3). Unused by XYZ.
+
+    Returns:
+        str: The XYZ file contents.
+    """
+    return "".join(_iter_xyz(numbers, positions, cell))
+
+
+def _reduced_formula(numbers: np.ndarray) -> str:
+    # Mirrors ase.symbols.Symbols.get_chemical_formula("reduce").
+    n = len(numbers)
+    changes = np.concatenate(([0], np.arange(1, n)[numbers[1:] != numbers[:-1]]))
+    counts = np.append(changes[1:], n) - changes
+    symbols, _ = _symbols()
+    tokens = []
+    for z, count in zip(numbers[changes], counts):
+        tokens.append(symbols[z])
+        if count > 1:
+            tokens.append(str(count))
+    return "".join(tokens)
+
+
+def _formula_sum(numbers: np.ndarray) -> str:
+    # Element counts in order of first appearance, as ase.formula.Formula.count().
+    unique, first, counts = np.unique(numbers, return_index=True, return_counts=True)
+    order = np.argsort(first)
+    symbols, _ = _symbols()
+    return " ".join(f"{symbols[unique[i]]}{counts[i]}" for i in order)
+
+
+def _cif_labels(numbers: np.ndarray) -> np.ndarray:
+    # Per-element running counters ("Na1", "Cl1", "Na2", ...), computed with
+    # a stable sort instead of a Python dictionary walk.
+    order = np.argsort(numbers, kind="stable")
+    sorted_numbers = numbers[order]
+    starts = np.concatenate(([0], np.flatnonzero(sorted_numbers[1:] != sorted_numbers[:-1]) + 1))
+    group_start = np.repeat(starts, np.diff(np.append(starts, len(numbers))))
+    running = np.empty(len(numbers), dtype=np.int64)
+    running[order] = np.arange(len(numbers)) - group_start + 1
+    return np.char.add(_symbols()[0][numbers].astype(str), running.astype(str))
+
+
+def _iter_cif(numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray, chunk_atoms: Optional[int] = None) -> Iterator[str]:
+    from ase.cell import Cell
+
+    symbols, _ = _symbols()
+    ase_cell = Cell(cell)
+    fractional = np.linalg.solve(ase_cell.complete().T, np.transpose(positions)).T
+    # Wrapping twice matches ASE for values that round up to exactly 1.0.
+    fractional %= 1.0
+    fractional %= 1.0
+
+    lines = [
+        "data_image0\n",
+        f"_chemical_formula_structural       {_reduced_formula(numbers)}\n",
+        f'_chemical_formula_sum              "{_formula_sum(numbers)}"\n',
+    ]
+    for name, value in zip(_CIF_CELL_TAGS, ase_cell.cellpar()):
+        lines.append(f"{name:20} {value}\n")
+    lines.append(
+        "\n"
+        '_space_group_name_H-M_alt    "P 1"\n'
+        "_space_group_IT_number       1\n"
+        "\n"
+        "loop_\n"
+        "  _space_group_symop_operation_xyz\n"
+        "  'x, y, z'\n"
+        "\n"
+        "loop_\n"
+        "  _atom_site_type_symbol\n"
+        "  _atom_site_label\n"
+        "  _atom_site_symmetry_multiplicity\n"
+        "  _atom_site_fract_x\n"
+        "  _atom_site_fract_y\n"
+        "  _atom_site_fract_z\n"
+        "  _atom_site_occupancy\n"
+    )
+    yield "".join(lines)
+    labels = _cif_labels(numbers)
+    for rows in _row_blocks(len(numbers), chunk_atoms):
+        # NumPy's str() of float64 is the same shortest repr that ASE prints.
+        coords = fractional[rows].astype(str)
+        yield _format_rows(_CIF_ROW, [symbols[numbers[rows]], labels[rows], coords[:, 0], coords[:, 1], coords[:, 2]])
+
+
+def write_cif(numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray) -> str:
+    """
+    Serializes a fully periodic structure as a P1 CIF block.
+
+    The output is byte-identical to ``ase.io.write(..., format="cif")``:
+    fractional coordinates are wrapped into [0, 1) and printed with the
+    shortest round-tripping representation, as ASE does.
+
+    Args:
+        numbers (np.ndarray): Atomic numbers, shape (N,).
+        positions (np.ndarray): Cartesian positions in Angstroms, shape (N, 3).
+        cell (np.ndarray): Cell vectors as rows, shape (3, 3).
+
+    Returns:
+        str: The CIF file contents.
+    """
+    return "".join(_iter_cif(numbers, positions, cell))
+
+
+# Binary layout (little-endian), chosen so the browser can view each section
+# directly as a typed array without copying:
+#   offset 0   4 bytes    magic b"NAB1"
+#   offset 4   uint32     number of atoms N
+#   offset 8   float32[9] cell vectors as rows
+#   offset 44  float32[3N] Cartesian positions (x0, y0, z0, x1, ...)
+#   then       uint8[N]   atomic numbers
+BINARY_MAGIC = b"NAB1"
+_BINARY_HEADER = struct.Struct("<4sI9f")
+
+
+def _iter_binary(numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray, chunk_atoms: Optional[int] = None) -> Iterator[bytes]:
+    yield _BINARY_HEADER.pack(BINARY_MAGIC, len(numbers), *np.asarray(cell, dtype="<f4").ravel().tolist())
+    for rows in _row_blocks(len(numbers), chunk_atoms):
+        yield np.ascontiguousarray(positions[rows], dtype="<f4").tobytes()
+    for rows in _row_blocks(len(numbers), chunk_atoms):
+        yield np.ascontiguousarray(numbers[rows], dtype=np.uint8).tobytes()
+
+
+def encode_binary(numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray) -> bytes:
+    """
+    Packs a structure into the compact binary layout (13 bytes per atom).
+
+    Args:
+        numbers (np.ndarray): Atomic numbers, shape (N,).
+        positions (np.ndarray): Cartesian positions in Angstroms, shape (N, 3).
+        cell (np.ndarray): Cell vectors as rows, shape (3, 3).
+
+    Returns:
+        bytes: The packed structure.
+    """
+    return b"".join(_iter_binary(np.asarray(numbers), np.asarray(positions), cell))
+
+
+def decode_binary(data: bytes) -> tuple:
+    """
+    Unpacks a structure produced by :func:`encode_binary`.
+
+    Args:
+        data (bytes): The packed structure.
+
+    Returns:
+        tuple: ``(numbers, positions, cell)`` as NumPy arrays.
+
+    Raises:
+        ValueError: If the payload is not in the expected layout.
+    """
+    if len(data) < _BINARY_HEADER.size or data[:4] != BINARY_MAGIC:
+        raise ValueError("Not a binary structure payload.")
+    unpacked = _BINARY_HEADER.unpack_from(data)
+    natoms = unpacked[1]
+    cell = np.array(unpacked[2:], dtype=np.float32).reshape(3, 3)
+    offset = _BINARY_HEADER.size
+    if len(data) != offset + 13 * natoms:
+        raise ValueError("Binary structure payload has the wrong length.")
+    positions = np.frombuffer(data, dtype="<f4", count=3 * natoms, offset=offset).reshape(natoms, 3)
+    numbers = np.frombuffer(data, dtype=np.uint8, count=natoms, offset=offset + 12 * natoms)
+    return numbers, positions, cell
+
+
+def write_binary(numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray) -> str:
+    """
+    Serializes a structure in the compact binary layout, base64-encoded for JSON.
+
+    Args:
+        numbers (np.ndarray): Atomic numbers, shape (N,).
+        positions (np.ndarray): Cartesian positions in Angstroms, shape (N, 3).
+        cell (np.ndarray): Cell vectors as rows, shape (3, 3).
+
+    Returns:
+        str: The base64 (ASCII) encoding of :func:`encode_binary`.
+    """
+    return base64.b64encode(encode_binary(numbers, positions, cell)).decode("ascii")
+
+
+WRITERS = {
+    "pdb": write_pdb,
+    "xyz": write_xyz,
+    "cif": write_cif,
+    "binary": write_binary,
+}
+
+
+_CHUNK_WRITERS = {
+    "pdb": _iter_pdb,
+    "xyz": _iter_xyz,
+    "cif": _iter_cif,
+    "binary": _iter_binary,
+}
+
+
+def iter_serialized(
+    fmt: str, numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray, chunk_atoms: int = 65536
+) -> Iterator[bytes]:
+    """
+    Serializes a structure as file bytes, ``chunk_atoms`` atoms at a time.
+
+    Joining the chunks gives the same bytes as :func:`serialize` (for
+    "binary", the decoded :func:`encode_binary` layout rather than base64),
+    but only one block of text exists at a time, so a large structure can
+    be streamed to disk or a socket without building the whole file in memory.
+
+    Args:
+        fmt (str): One of "pdb", "xyz", "cif", "binary" (case-insensitive).
+        numbers (np.ndarray): Atomic numbers, shape (N,).
+        positions (np.ndarray): Cartesian positions in Angstroms, shape (N, 3).
+        cell (np.ndarray): Cell vectors as rows, shape (3, 3).
+        chunk_atoms (int): Atoms per chunk.
+
+    Yields:
+        bytes: Consecutive pieces of the file.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    writer = _CHUNK_WRITERS.get(fmt.lower())
+    if writer is None:
+        raise ValueError(f"Unsupported structure format: {fmt}. Must be one of {list(_CHUNK_WRITERS.keys())}")
+    for chunk in writer(np.asarray(numbers), np.asarray(positions, dtype=float), np.asarray(cell, dtype=float), chunk_atoms):
+        yield chunk if isinstance(chunk, bytes) else chunk.encode("utf-8")
+
+
+def serialize(fmt: str, numbers: np.ndarray, positions: np.ndarray, cell: np.ndarray) -> str:
+    """
+    Serializes a structure in one of the ``BuildStructureParams.format`` values.
+
+    Args:
+        fmt (str): One of "pdb", "xyz", "cif", "binary" (case-insensitive).
+        numbers (np.ndarray): Atomic numbers, shape (N,).
+        positions (np.ndarray): Cartesian positions in Angstroms, shape (N, 3).
+        cell (np.ndarray): Cell vectors as rows, shape (3, 3).
+
+    Returns:
+        str: The serialized structure.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    writer = WRITERS.get(fmt.lower())
+    if writer is None:
+        raise ValueError(f"Unsupported structure format: {fmt}. Must be one of {list(WRITERS.keys())}")
+    return writer(np.asarray(numbers), np.asarray(positions, dtype=float), np.asarray(cell, dtype=float))
@@ -0,0 +1,327 @@
+import os
+import re
+import copy
+import json
+import time
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from config import SESSION_STORE_PATH, SESSION_IDLE_SECONDS, SESSION_MAX_SESSIONS
+from executor.dispatch import DEFAULT_VIEW, EXECUTORS, execute_commands
+from models.commands import Command
+from utils.error_handlers import ValidationError
+from utils.metrics import metrics
+
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.:-]{1,128}$")
+
+
+class _SessionLock:
+    """A threading.Lock that can be held in a WeakValueDictionary."""
+
+    __slots__ = ("_lock", "__weakref__")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
+
+class SessionStore:
+    """
+    Per-session viewer state (current camera view and active structure).
+
+    Sessions live in an in-process LRU by default. When ``path`` is set they
+    are kept in a SQLite file instead, so every worker pointed at the same
+    file sees the same sessions. Sessions idle for longer than
+    ``idle_seconds`` are evicted; the in-process tier also holds at most
+    ``max_sessions``. As with the prompt cache, SQLite errors are counted
+    and treated as an empty session rather than failing the request.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = SESSION_STORE_PATH,
+        idle_seconds: float = SESSION_IDLE_SECONDS,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+    ):
+        self.path = path or None
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._memory: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self._locks = weakref.WeakValueDictionary()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not cross threads or forked processes.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, state TEXT NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def lock(self, session_id: str) -> _SessionLock:
+        """
+        Returns the lock that serializes requests for one session in this process.
+
+        Hold it around :meth:`get`, executing the commands and :meth:`put`, so
+        two concurrent requests for the same session cannot lose an update.
+
+        Args:
+            session_id (str): The session ID.
+
+        Returns:
+            A context manager that holds the session's lock.
+        """
+        with self._lock:
+            lock = self._locks.get(session_id)
+            if lock is None:
+                lock = self._locks[session_id] = _SessionLock()
+            return lock
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """
+        Looks up a session's state.
+
+        Args:
+            session_id (str): The session ID.
+
+        Returns:
+            Optional[dict]: A copy of the state, or None for an unknown or idle-expired session.
+        """
+        now = time.time()
+        self._sweep(now)
+        if self.path is not None:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT state FROM sessions WHERE id = ? AND last_access >= ?",
+                    (session_id, now - self.idle_seconds),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id))
+            except sqlite3.Error:
+                self._count("errors")
+                return None
+            self._count("hits" if row is not None else "misses")
+            return json.loads(row[0]) if row is not None else None
+
+        with self._lock:
+            entry = self._memory.get(session_id)
+            if entry is None or now - entry[1] > self.idle_seconds:
+                self.misses += 1
+                return None
+            self._memory[session_id] = (entry[0], now)
+            self._memory.move_to_end(session_id)
+            self.hits += 1
+            return copy.deepcopy(entry[0])
+
+    def put(self, session_id: str, state: dict) -> None:
+        """
+        Stores a session's state and marks the session as active.
+
+        Args:
+            session_id (str): The session ID.
+            state (dict): JSON-serializable state.
+        """
+        now = time.time()
+        if self.path is not None:
+            try:
+                self._connection().execute(
+                    "INSERT OR REPLACE INTO sessions (id, state, last_access) VALUES (?, ?, ?)",
+                    (session_id, json.dumps(state), now),
+                )
+            except sqlite3.Error:
+                self._count("errors")
+            return
+
+        with self._lock:
+            self._memory[session_id] = (copy.deepcopy(state), now)
+            self._memory.move_to_end(session_id)
+            while len(self._memory) > self.max_sessions:
+                self._memory.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Forgets a session.
+
+        Args:
+            session_id (str): The session ID.
+
+        Returns:
+            bool: True if the session existed.
+        """
+        if self.path is not None:
+            try:
+                return self._connection().execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+            except sqlite3.Error:
+                self._count("errors")
+                return False
+        with self._lock:
+            return self._memory.pop(session_id, None) is not None
+
+    def _sweep(self, now: float) -> None:
+        # Drops idle sessions at most once per second; the in-process tier is
+        # in access order, so only the expired head is visited.
+        with self._lock:
+            if now - self._last_sweep < min(1.0, self.idle_seconds):
+                return
+            self._last_sweep = now
+            expired = 0
+            while self._memory:
+                session_id, (_, last_access) = next(iter(self._memory.items()))
+                if now - last_access <= self.idle_seconds:
+                    break
+                del self._memory[session_id]
+                expired += 1
+            self.evictions += expired
+        if self.path is not None:
+            try:
+                expired = self._connection().execute(
+                    "DELETE FROM sessions WHERE last_access < ?", (now - self.idle_seconds,)
+                ).rowcount
+            except sqlite3.Error:
+                self._count("errors")
+                return
+            self._count("evictions", expired)
+
+    def clear(self) -> None:
+        """Deletes every session and resets the counters."""
+        if self.path is not None:
+            try:
+                self._connection().execute("DELETE FROM sessions")
+            except sqlite3.Error:
+                self._count("errors")
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.misses = self.evictions = self.errors = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the session counters and the number of live sessions.
+
+        Returns:
+            dict: Counters suitable for JSON serialization.
+        """
+        sessions = 0
+        if self.path is not None:
+            try:
+                sessions = self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            except sqlite3.Error:
+                self._count("errors")
+        with self._lock:
+            return {
+                "sessions": sessions if self.path is not None else len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "idle_seconds": self.idle_seconds,
+                "persistent": self.path is not None,
+            }
+
+
+def parse_session_id(header_value: Optional[str], body: Optional[dict]) -> Optional[str]:
+    """
+    Reads the session ID from the ``X-Session-ID`` header or a ``sessionId`` body field.
+
+    Args:
+        header_value (Optional[str]): The ``X-Session-ID`` header, if present.
+        body (Optional[dict]): The parsed JSON request body.
+
+    Returns:
+        Optional[str]: The session ID, or None if the request is stateless.
+
+    Raises:
+        ValidationError: If the ID is not 1-128 letters, digits or ``_.:-``.
+    """
+    session_id = header_value or (body or {}).get("sessionId")
+    if session_id is None:
+        return None
+    if not isinstance(session_id, str) or not SESSION_ID_PATTERN.match(session_id):
+        raise ValidationError("Invalid session ID: use 1-128 letters, digits, '_', '.', ':' or '-'")
+    return session_id
+
+
+def view_delta(before: dict, after: dict) -> dict:
+    """
+    Returns the viewObject fields that differ between two views.
+
+    Args:
+        before (dict): The view the client already has.
+        after (dict): The new view.
+
+    Returns:
+        dict: Only the changed fields of ``after`` (empty if nothing changed).
+    """
+    return {key: value for key, value in after.items() if before.get(key) != value}
+
+
+def run_session_commands(commands: List[Command], state: Optional[dict], deltas: bool = True) -> Tuple[list, dict]:
+    """
+    Executes validated commands against a session's state.
+
+    Camera commands start from the session's current view instead of the
+    identity view, and (with ``deltas``) their results are reduced to the
+    fields that changed since the previous view. The last ``buildStructure`` becomes the
+    session's active structure. The input state is not modified, so a failed
+    request leaves the session as it was; the function is picklable, so it
+    can run on a process pool.
+
+    Args:
+        commands (List[Command]): Validated commands.
+        state (Optional[dict]): The session's state, or None for a new session.
+        deltas (bool): Return only the changed view fields for camera commands.
+
+    Returns:
+        Tuple[list, dict]: The results, in request order, and the new state.
+
+    Raises:
+        ExecutionError: If any command is unknown or its executor fails.
+    """
+    state = copy.deepcopy(state) if state else {}
+    state.setdefault("view", copy.deepcopy(DEFAULT_VIEW))
+    previous_view = state["view"]
+
+    results = execute_commands(commands, state)
+
+    for i, command in enumerate(commands):
+        spec = EXECUTORS.get(command.command)
+        if deltas and spec is not None and spec.resource == "camera":
+            full_view = results[i]
+            results[i] = view_delta(previous_view, full_view)
+            previous_view = full_view
+        elif command.command == "buildStructure":
+            state["structure"] = command.params.model_dump()
+    return results, state
+
+
+session_store = SessionStore()
+
+metrics.register_callback("nlp_atomic_sessions", "Live viewer sessions.", lambda: session_store.stats()["sessions"])
@@ -1,45 +1,229 @@
 import io
-import functools
-from ase.build import bulk
-from ase.io import write
+import base64
+from typing import Optional, Tuple, Union
 from models.commands import BuildStructureParams
-from utils.error_handlers import ExecutionError
+from executor.cache import download_cache, structure_cache, structure_cache_key
+from executor.serializer import serialize
+from executor.tiling import tile_structure
+from config import MAX_ATOMS, STRUCTURE_WRITER
+from utils.error_handlers import ExecutionError, ValidationError
+from utils.metrics import stage_seconds
+from utils.compression import compress, content_etag, representation_etag
 
-def build_structure(params: BuildStructureParams) -> str:
+STRUCTURE_MIMETYPES = {
+    "pdb": "chemical/x-pdb",
+    "xyz": "chemical/x-xyz",
+    "cif": "chemical/x-cif",
+    "binary": "application/octet-stream",
+}
+
+def _write_with_ase(atoms, fmt: str) -> str:
+    """Reference serializer that goes through ``ase.io.write``."""
+    from ase.io import write  # Deferred: ase.io loads every format plugin.
+
+    if fmt == "pdb":
+        buffer = io.StringIO()
+        write(buffer, atoms, format="proteindatabank", write_arrays=True)
+        return buffer.getvalue()
+    if fmt == "cif":
+        # ASE's CIF writer only accepts binary file objects.
+        binary = io.BytesIO()
+        write(binary, atoms, format="cif")
+        return binary.getvalue().decode("latin-1")
+    buffer = io.StringIO()
+    write(buffer, atoms, format=fmt)
+    return buffer.getvalue()
+
+def _conventional_cell(params: BuildStructureParams):
+    from ase.build import bulk  # Deferred: ase.build is slow to import.
+
+    # Build *conventional* cubic cell (so fcc gives 4 atoms, bcc gives 2)
+    return bulk(params.element, params.lattice, a=params.a, cubic=True)
+
+def check_supercell_size(params, atoms_per_cell: int) -> int:
+    """
+    Rejects a supercell of more than ``MAX_ATOMS`` atoms before it is tiled.
+
+    Args:
+        params: Build parameters with ``nx``, ``ny`` and ``nz``.
+        atoms_per_cell (int): Atoms in the conventional cell.
+
+    Returns:
+        int: Atoms in the supercell.
+
+    Raises:
+        ValidationError: If the supercell has more than ``MAX_ATOMS`` atoms.
+    """
+    natoms = atoms_per_cell * params.nx * params.ny * params.nz
+    if natoms > MAX_ATOMS:
+        raise ValidationError(f"Structure too large: {natoms} atoms (maximum {MAX_ATOMS})")
+    return natoms
+
+def build_structure_descriptor(params: BuildStructureParams) -> dict:
+    """
+    Describes a supercell as its unit cell plus a replication count.
+
+    The response size is independent of nx*ny*nz; the frontend expands the
+    periodic lattice itself, and :func:`materialize_structure` produces the
+    full file when an explicit download is requested.
+
+    Args:
+        params (BuildStructureParams): Parameters for building the structure.
+
+    Returns:
+        dict: ``unitCell`` (the conventional cell serialized in ``params.format``),
+              ``cellVectors`` (3x3, rows in Angstroms), ``replication`` ([nx, ny, nz]),
+              ``natoms`` (atoms in the expanded supercell) and ``format``.
+
+    Raises:
+        ExecutionError: If the unit cell cannot be built.
+    """
+    try:
+        cell = _conventional_cell(params)
+        fmt = params.format.lower()
+        unit_cell = serialize(fmt, cell.numbers, cell.positions, cell.cell.array)
+    except Exception as e:
+        raise ExecutionError(f"Failed to build structure: {e}")
+
+    return {
+        "format": fmt,
+        "unitCell": unit_cell,
+        "cellVectors": cell.cell.array.tolist(),
+        "replication": [params.nx, params.ny, params.nz],
+        "natoms": len(cell) * params.nx * params.ny * params.nz,
+    }
+
+def materialize_structure(params: BuildStructureParams, writer: str = STRUCTURE_WRITER) -> str:
+    """
+    Expands a structure to every atom, regardless of the requested mode.
+
+    Args:
+        params (BuildStructureParams): Parameters for building the structure.
+        writer (str): Serializer to use, see :func:`build_structure`.
+
+    Returns:
+        str: The full supercell in ``params.format``.
+    """
+    return build_structure(params.model_copy(update={"mode": "full"}), writer=writer)
+
+def _file_bytes(content: str, fmt: str) -> bytes:
+    return base64.b64decode(content) if fmt == "binary" else content.encode("utf-8")
+
+def structure_filename(params: BuildStructureParams) -> str:
+    """Returns the download file name, e.g. ``Al_fcc_2x2x2.pdb``."""
+    extension = "bin" if params.format == "binary" else params.format
+    return f"{params.element}_{params.lattice}_{params.nx}x{params.ny}x{params.nz}.{extension}"
+
+def structure_etag(params: BuildStructureParams) -> str:
+    """
+    Returns the ETag of the full structure file for ``params``.
+
+    The tag is a hash of the file body. It is kept in the download cache, so
+    answering a conditional request for a cached structure costs no hashing.
+
+    Args:
+        params (BuildStructureParams): Parameters for building the structure.
+
+    Returns:
+        str: The quoted ETag of the uncompressed file.
+    """
+    full = params.model_copy(update={"mode": "full"})
+    etag_key = f"{structure_cache_key(full)}.etag"
+    etag = download_cache.get(etag_key)
+    if etag is None:
+        etag = content_etag(_file_bytes(materialize_structure(full), full.format.lower()))
+        download_cache.put(etag_key, etag)
+    return etag
+
+def structure_file(params: BuildStructureParams, encoding: Optional[str] = None) -> Tuple[bytes, str]:
+    """
+    Returns the full structure file as sent for a download, and its ETag.
+
+    The "binary" format is decoded from base64. A compressed body is built
+    once and stored in the download cache under ``f"{key}.{encoding}"``,
+    so later downloads of the same structure skip the compressor.
+
+    Args:
+        params (BuildStructureParams): Parameters for building the structure.
+        encoding (Optional[str]): "gzip", "zstd" or None for the raw file.
+
+    Returns:
+        Tuple[bytes, str]: The body and the ETag of this representation.
+    """
+    full = params.model_copy(update={"mode": "full"})
+    etag = structure_etag(full)
+    if encoding is None:
+        return _file_bytes(materialize_structure(full), full.format.lower()), etag
+
+    encoded_key = f"{structure_cache_key(full)}.{encoding}"
+    body = download_cache.get(encoded_key, binary=True)
+    if body is None:
+        with stage_seconds.time("compress"):
+            body = compress(_file_bytes(materialize_structure(full), full.format.lower()), encoding)
+        download_cache.put(encoded_key, body)
+    return body, representation_etag(etag, encoding)
+
+def build_structure(params: BuildStructureParams, writer: str = STRUCTURE_WRITER) -> Union[str, dict]:
     """
     Builds an atomic structure using ASE based on the provided parameters.
 
+    With ``params.mode == "descriptor"`` only the unit cell and replication
+    are returned, see :func:`build_structure_descriptor`.
+
+    Results are memoized in the shared structure cache, keyed by a hash of
+    the normalized parameters, so repeated builds never reach ASE.
+
     Args:
         params (BuildStructureParams): Parameters for building the structure,
                                        including element, lattice, and supercell dimensions,
                                        plus the desired output format ("pdb", "xyz", etc.).
+        writer (str): "numpy" to tile with ``executor.tiling`` and write with the
+                      vectorized serializer, or "ase" to tile with ``Atoms.repeat``
+                      and write through ``ase.io.write``. Both produce identical
+                      text; the "binary" format is always written by the serializer.
 
     Returns:
-        str: The atomic structure in the specified format as a string.
+        Union[str, dict]: The atomic structure in the specified format as a string.
+             For the "binary" format this is the base64 encoding of the packed
+             layout described in ``executor/serializer.py``. In descriptor mode,
+             the dict returned by :func:`build_structure_descriptor`.
 
     Raises:
+        ValidationError: If the supercell has more than ``MAX_ATOMS`` atoms.
         ExecutionError: If there is an error during the structure building process using ASE.
     """
-    try:
-        # 1. Build *conventional* cubic cell (so fcc gives 4 atoms, bcc gives 2)
-        a_val = params.a if params.a is not None else None
-        cell = bulk(params.element, params.lattice, a=a_val, cubic=True)
+    if params.mode == "descriptor":
+        return build_structure_descriptor(params)
 
-        # 2. Tile into supercell
-        supercell = cell * (params.nx, params.ny, params.nz)
+    key = structure_cache_key(params)
+    with stage_seconds.time("structure_cache"):
+        cached = structure_cache.get(key)
+    if cached is not None:
+        return cached
 
-        # 3. Determine ASE format name
+    try:
+        reps = (params.nx, params.ny, params.nz)
         fmt = params.format.lower()
-        if fmt == "pdb":
-            ase_fmt = "proteindatabank"
-        else:
-            ase_fmt = fmt
+        use_ase = writer == "ase" and fmt in ("pdb", "xyz", "cif")
 
-        # 4. Write into a string buffer
-        buffer = io.StringIO()
-        write(buffer, supercell, format=ase_fmt, write_arrays=True)
-        return buffer.getvalue()
+        # 1. Build the conventional unit cell and tile it into the supercell
+        with stage_seconds.time("build"):
+            cell = _conventional_cell(params)
+            check_supercell_size(params, len(cell))
+            if use_ase:
+                supercell = cell * reps
+            else:
+                supercell = tile_structure(cell.numbers, cell.positions, cell.cell.array, reps)
 
+        # 2. Serialize in the requested format
+        with stage_seconds.time("serialize"):
+            content = _write_with_ase(supercell, fmt) if use_ase else serialize(fmt, *supercell)
+
+    except ValidationError:
+        raise
     except Exception as e:
         # Wrap any ASE/IO errors in our ExecutionError
-        raise ExecutionError(f"Failed to build structure: {e}")
\ No newline at end of file
+        raise ExecutionError(f"Failed to build structure: {e}")
+
+    structure_cache.put(key, content)
+    return content
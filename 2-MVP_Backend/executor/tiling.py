@@ -0,0 +1,91 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def lattice_translations(cell: np.ndarray, reps: Tuple[int, int, int]) -> np.ndarray:
+    """
+    Computes the lattice translation vectors of a supercell.
+
+    Translations are ordered with the last repetition index varying fastest,
+    the same order ``ase.Atoms.repeat`` uses, so tiled structures list their
+    atoms exactly as ASE would.
+
+    Args:
+        cell (np.ndarray): Unit cell vectors as rows, shape (3, 3).
+        reps (Tuple[int, int, int]): Repetitions (nx, ny, nz) along each cell vector.
+
+    Returns:
+        np.ndarray: Translations of shape (nx, ny, nz, 3).
+    """
+    # np.dot over the integer cell indices reproduces ASE's arithmetic bit for
+    # bit, including for non-orthogonal cells. The index array only has one
+    # row per unit cell, so it is small next to the position array.
+    indices = np.indices(reps).reshape(3, -1).T
+    return np.dot(indices, np.asarray(cell, dtype=float)).reshape(*reps, 3)
+
+
+def tile_positions(
+    basis: np.ndarray,
+    cell: np.ndarray,
+    reps: Tuple[int, int, int],
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Replicates basis positions over a supercell with one broadcasted add.
+
+    Args:
+        basis (np.ndarray): Positions of the atoms in the unit cell, shape (n, 3).
+        cell (np.ndarray): Unit cell vectors as rows, shape (3, 3).
+        reps (Tuple[int, int, int]): Repetitions (nx, ny, nz) along each cell vector.
+        out (Optional[np.ndarray]): Preallocated array of shape (nx*ny*nz*n, 3)
+                                    to write into. Allocated if omitted.
+
+    Returns:
+        np.ndarray: Supercell positions of shape (nx*ny*nz*n, 3).
+
+    Raises:
+        ValueError: If a repetition count is not positive or ``out`` has the wrong shape.
+    """
+    if any(r < 1 for r in reps):
+        raise ValueError(f"Supercell repetitions must be positive, got {tuple(reps)}.")
+    basis = np.asarray(basis, dtype=float)
+    nx, ny, nz = reps
+    n = len(basis)
+    shape = (nx * ny * nz * n, 3)
+    if out is None:
+        out = np.empty(shape, dtype=float)
+    elif out.shape != shape:
+        raise ValueError(f"Output array has shape {out.shape}, expected {shape}.")
+
+    translations = lattice_translations(cell, reps)
+    np.add(translations[:, :, :, None, :], basis, out=out.reshape(nx, ny, nz, n, 3))
+    return out
+
+
+def tile_structure(
+    numbers: np.ndarray,
+    basis: np.ndarray,
+    cell: np.ndarray,
+    reps: Tuple[int, int, int],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Builds a supercell from a unit cell without going through ``ase.Atoms``.
+
+    Memory use is one (N, 3) float64 position array plus one (N,) number
+    array for N = nx*ny*nz*n atoms; both are written in a single pass.
+
+    Args:
+        numbers (np.ndarray): Atomic numbers of the unit cell atoms, shape (n,).
+        basis (np.ndarray): Positions of the unit cell atoms, shape (n, 3).
+        cell (np.ndarray): Unit cell vectors as rows, shape (3, 3).
+        reps (Tuple[int, int, int]): Repetitions (nx, ny, nz) along each cell vector.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: ``(numbers, positions, cell)``
+        of the supercell.
+    """
+    positions = tile_positions(basis, cell, reps)
+    tiled_numbers = np.tile(np.asarray(numbers), reps[0] * reps[1] * reps[2])
+    supercell = np.asarray(cell, dtype=float) * np.asarray(reps, dtype=float)[:, None]
+    return tiled_numbers, positions, supercell
@@ -1,15 +1,97 @@
-from typing import Union, Tuple
+import re
+from functools import lru_cache
+from typing import List, Sequence, Union, Tuple
 import numpy as np
-from scipy.spatial.transform import Rotation as R
 
 from utils.error_handlers import ExecutionError
 
+AxisLike = Union[str, Tuple[float, float, float]]
+
+# View directions and up vectors for common faces. The directions are the
+# camera's look direction in the scene; the up vectors are kept for
+# reference but do not change the quaternion.
+FACE_PRESETS = {
+    "100": {"direction": (1, 0, 0), "up": (0, 1, 0)},
+    "010": {"direction": (0, 1, 0), "up": (0, 0, 1)},
+    "001": {"direction": (0, 0, 1), "up": (0, 1, 0)},
+    "110": {"direction": (1, 1, 0), "up": (0, 0, 1)},
+    "111": {"direction": (1, 1, 1), "up": (0, 1, 0)},
+}
+
+# "210" and "1-10" are read as single-digit indices; larger indices need
+# separators, as in "1 0 12" or "(1, 0, 12)".
+_MILLER_COMPACT = re.compile(r"^\s*[\(\[]?(-?\d)(-?\d)(-?\d)[\)\]]?\s*$")
+_MILLER_SEPARATED = re.compile(r"^\s*[\(\[]?\s*(-?\d+)[\s,]+(-?\d+)[\s,]+(-?\d+)\s*[\)\]]?\s*$")
+_AXES = {"x": (1.0, 0.0, 0.0), "y": (0.0, 1.0, 0.0), "z": (0.0, 0.0, 1.0)}
+
+
+def _look_quaternion(direction: Tuple[int, int, int]) -> Tuple[float, float, float, float]:
+    """
+    Computes the quaternion that turns the camera's default look direction onto ``direction``.
+
+    The camera looks down its negative Z-axis, so this is the rotation taking
+    [0, 0, -1] to the normalized direction: the cross product gives the
+    rotation axis and the dot product the angle.
+    """
+    default_look = np.array([0, 0, -1])
+    direction = np.asarray(direction, dtype=float)
+    direction = direction / np.linalg.norm(direction)
+
+    axis = np.cross(default_look, direction)
+    angle = np.arccos(np.clip(np.dot(default_look, direction), -1.0, 1.0))
+
+    # Handle the case where default_look and direction are collinear (axis is zero vector)
+    if np.linalg.norm(axis) < 1e-6:
+        if np.dot(default_look, direction) > 0.999:  # Same direction
+            return (0.0, 0.0, 0.0, 1.0)
+        # Opposite direction (180 degree rotation around Y-axis)
+        axis, angle = np.array([0.0, 1.0, 0.0]), np.pi
+    else:
+        axis = axis / np.linalg.norm(axis)
+
+    # Axis-angle to quaternion in 3Dmol.js order [x, y, z, w]; this matches
+    # scipy's Rotation.from_rotvec without importing scipy at startup.
+    return tuple(np.append(np.sin(angle / 2) * axis, np.cos(angle / 2)).tolist())
+
+
+# Computed once at import; compute_set_view only copies them.
+FACE_QUATERNIONS = {face: _look_quaternion(preset["direction"]) for face, preset in FACE_PRESETS.items()}
+
+
+@lru_cache(maxsize=1024)
+def miller_quaternion(h: int, k: int, l: int) -> Tuple[float, float, float, float]:
+    """
+    Returns the camera quaternion for looking along the [hkl] direction.
+
+    Directions are taken in Cartesian coordinates, which matches the face
+    presets for the cubic cells built by ``build_structure``. Results are
+    cached, so repeated requests for the same indices cost one dict lookup.
+
+    Args:
+        h (int): First Miller index.
+        k (int): Second Miller index.
+        l (int): Third Miller index.
+
+    Returns:
+        Tuple[float, float, float, float]: The quaternion as (x, y, z, w).
+
+    Raises:
+        ExecutionError: If all three indices are zero.
+    """
+    if h == 0 and k == 0 and l == 0:
+        raise ExecutionError("Miller indices cannot all be zero.")
+    return _look_quaternion((h, k, l))
+
+
 def compute_set_view(face: str) -> dict:
     """
     Computes camera/view parameters for viewer commands based on a specified face.
 
+    The common faces come from a table computed at import; any other Miller
+    indices ("210", "1-10", "(1, 2, 3)") go through :func:`miller_quaternion`.
+
     Args:
-        face (str): One of "100", "010", "001", "110", "111".
+        face (str): One of "100", "010", "001", "110", "111", or other Miller indices.
 
     Returns:
         dict: A viewObject dict matching 3Dmol.js viewer.getView() shape,
@@ -18,61 +100,151 @@ def compute_set_view(face: str) -> dict:
     Raises:
         ExecutionError: If an invalid face is provided.
     """
-    # Define view directions and up vectors for common faces
-    # These are normalized vectors representing the camera's look direction
-    # and the 'up' direction in the scene.
-    view_presets = {
-        "100": {"direction": np.array([1, 0, 0]), "up": np.array([0, 1, 0])},
-        "010": {"direction": np.array([0, 1, 0]), "up": np.array([0, 0, 1])},
-        "001": {"direction": np.array([0, 0, 1]), "up": np.array([0, 1, 0])},
-        "110": {"direction": np.array([1, 1, 0]), "up": np.array([0, 0, 1])},
-        "111": {"direction": np.array([1, 1, 1]), "up": np.array([0, 1, 0])},
+    quat = FACE_QUATERNIONS.get(face)
+    if quat is None:
+        match = _MILLER_COMPACT.match(face) or _MILLER_SEPARATED.match(face)
+        if match is None:
+            raise ExecutionError(
+                f"Invalid face provided: {face}. Must be one of {list(FACE_PRESETS.keys())} or Miller indices such as '210'"
+            )
+        quat = miller_quaternion(*(int(index) for index in match.groups()))
+
+    # The translation and zoom values are typically handled by the frontend or are default.
+    return {
+        "quaternion": list(quat),
+        "translation": [0.0, 0.0, 0.0],
+        "zoom": 1.0
     }
 
-    if face not in view_presets:
-        raise ExecutionError(f"Invalid face provided: {face}. Must be one of {list(view_presets.keys())}")
 
-    direction = view_presets[face]["direction"]
-    up_vector = view_presets[face]["up"]
+def _axis_vector(axis: AxisLike) -> np.ndarray:
+    """Converts "x"/"y"/"z" or a 3-vector into a unit rotation axis."""
+    if isinstance(axis, str):
+        vector = _AXES.get(axis.lower())
+        if vector is None:
+            raise ExecutionError(f"Invalid axis string: {axis}. Must be 'x', 'y', or 'z'.")
+        return np.array(vector)
+    if isinstance(axis, (tuple, list)) and len(axis) == 3:
+        rot_axis = np.array(axis, dtype=float)
+        norm = np.linalg.norm(rot_axis)
+        if norm < 1e-6:
+            raise ExecutionError("Rotation axis cannot be a zero vector.")
+        return rot_axis / norm
+    raise ExecutionError(f"Invalid axis format: {axis}. Must be 'x', 'y', 'z' or a 3-tuple of floats.")
 
-    # Calculate the rotation to align the camera with the desired direction
-    # The camera typically looks down its negative Z-axis.
-    # We need a rotation that transforms [0,0,-1] (camera's default look) to 'direction'.
-    # This can be done by finding the rotation from the default camera orientation to the target.
-    # A common approach is to use the cross product to find the axis of rotation
-    # and the dot product for the angle.
 
-    # Default camera look direction (negative Z-axis)
-    default_look = np.array([0, 0, -1])
+def _view_quaternion(view: dict) -> np.ndarray:
+    """Reads and normalizes the [x, y, z, w] quaternion of a viewObject."""
+    if "quaternion" not in view or not isinstance(view["quaternion"], list) or len(view["quaternion"]) != 4:
+        raise ExecutionError("Invalid 'prev_view' format. Missing or malformed 'quaternion'.")
+    quat = np.array(view["quaternion"], dtype=float)
+    norm = np.linalg.norm(quat)
+    if norm < 1e-12:
+        raise ExecutionError("Invalid 'prev_view' format. Quaternion has zero norm.")
+    return quat / norm
 
-    # Normalize the target direction
-    direction = direction / np.linalg.norm(direction)
 
-    # Calculate rotation axis and angle
-    axis = np.cross(default_look, direction)
-    angle = np.arccos(np.dot(default_look, direction))
+def quaternion_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Hamilton product of [x, y, z, w] quaternions, broadcast over leading axes.
 
-    # Handle the case where default_look and direction are collinear (axis is zero vector)
-    if np.linalg.norm(axis) < 1e-6:
-        if np.dot(default_look, direction) > 0.999: # Same direction
-            rotation = R.from_quat([0, 0, 0, 1]) # No rotation
-        else: # Opposite direction (180 degree rotation around Y-axis)
-            rotation = R.from_euler('y', 180, degrees=True)
-    else:
-        axis = axis / np.linalg.norm(axis)
-        rotation = R.from_rotvec(angle * axis)
+    ``quaternion_multiply(a, b)`` is the rotation that applies ``b`` first
+    and then ``a``, the same as scipy's ``Rotation(a) * Rotation(b)``.
 
-    # Convert to quaternion (x, y, z, w)
-    quat = rotation.as_quat()
+    Args:
+        a (np.ndarray): Quaternions of shape (..., 4).
+        b (np.ndarray): Quaternions of shape (..., 4).
+
+    Returns:
+        np.ndarray: The products, of the broadcast shape (..., 4).
+    """
+    ax, ay, az, aw = np.moveaxis(np.asarray(a, dtype=float), -1, 0)
+    bx, by, bz, bw = np.moveaxis(np.asarray(b, dtype=float), -1, 0)
+    return np.stack([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], axis=-1)
+
+
+def axis_angle_quaternions(axes: Sequence[AxisLike], angles: Sequence[float]) -> np.ndarray:
+    """
+    Builds quaternions for N axis-angle rotations at once.
+
+    Args:
+        axes (Sequence[AxisLike]): N axes, each "x", "y", "z" or a 3-vector.
+        angles (Sequence[float]): N angles in degrees.
+
+    Returns:
+        np.ndarray: Quaternions of shape (N, 4) as [x, y, z, w].
+
+    Raises:
+        ExecutionError: If an axis is invalid or the lengths differ.
+    """
+    if len(axes) != len(angles):
+        raise ExecutionError(f"Got {len(axes)} rotation axes but {len(angles)} angles.")
+    unit_axes = np.array([_axis_vector(axis) for axis in axes], dtype=float).reshape(-1, 3)
+    half = np.radians(np.asarray(angles, dtype=float)) / 2
+    return np.concatenate([unit_axes * np.sin(half)[:, None], np.cos(half)[:, None]], axis=1)
+
+
+def _with_quaternion(view: dict, quat: np.ndarray) -> dict:
+    new_view = view.copy()
+    new_view["quaternion"] = quat.tolist()
+    return new_view
+
+
+def compose_rotations(prev_view: dict, axes: Sequence[AxisLike], angles: Sequence[float]) -> List[dict]:
+    """
+    Applies N rotations in sequence to a view and returns the view after each one.
+
+    The running products are computed with a parallel prefix scan: about
+    log2(N) vectorized quaternion products instead of N scipy compositions.
+    The i-th result equals calling :func:`compute_rotate_camera` i+1 times.
+
+    Args:
+        prev_view (dict): The starting viewObject, with a 'quaternion' list [x, y, z, w].
+        axes (Sequence[AxisLike]): N axes, each "x", "y", "z" or a 3-vector.
+        angles (Sequence[float]): N angles in degrees.
+
+    Returns:
+        List[dict]: N viewObjects; the last one is the final orientation.
+
+    Raises:
+        ExecutionError: If the prev_view is malformed or an axis is invalid.
+    """
+    prev_quat = _view_quaternion(prev_view)
+    scan = axis_angle_quaternions(axes, angles)
+    # Hillis-Steele scan: after the step with offset d, scan[i] holds the
+    # product of rotations max(0, i-2d+1)..i, later rotations on the left.
+    offset = 1
+    while offset < len(scan):
+        scan[offset:] = quaternion_multiply(scan[offset:], scan[:-offset])
+        offset *= 2
+    quats = quaternion_multiply(scan, prev_quat)
+    return [_with_quaternion(prev_view, quat) for quat in quats]
+
+
+def rotate_views(views: Sequence[dict], axis: AxisLike, angle: float) -> List[dict]:
+    """
+    Applies one rotation to N views with a single vectorized quaternion product.
+
+    Args:
+        views (Sequence[dict]): viewObjects, each with a 'quaternion' list [x, y, z, w].
+        axis (AxisLike): The axis of rotation, "x", "y", "z" or a 3-vector.
+        angle (float): The angle of rotation in degrees.
+
+    Returns:
+        List[dict]: The rotated viewObjects, in input order.
+
+    Raises:
+        ExecutionError: If a view is malformed or the axis is invalid.
+    """
+    rotation = axis_angle_quaternions([axis], [angle])[0]
+    quats = np.array([_view_quaternion(view) for view in views], dtype=float).reshape(-1, 4)
+    return [_with_quaternion(view, quat) for view, quat in zip(views, quaternion_multiply(rotation, quats))]
 
-    # 3Dmol.js quaternion format is [x, y, z, w]
-    # The translation and zoom values are typically handled by the frontend or are default.
-    # For simplicity, we'll return a default translation and zoom.
-    return {
-        "quaternion": quat.tolist(),
-        "translation": [0.0, 0.0, 0.0],
-        "zoom": 1.0
-    }
 
 def compute_rotate_camera(
     prev_view: dict,
@@ -82,6 +254,9 @@ def compute_rotate_camera(
     """
     Applies a rotation to an existing viewObject.
 
+    The rotation is applied in the world frame:
+    new_rotation = rotation_to_apply * prev_rotation.
+
     Args:
         prev_view (dict): The existing viewObject from 3Dmol.js, containing
                           at least a 'quaternion' list [x, y, z, w].
@@ -95,48 +270,6 @@ def compute_rotate_camera(
     Raises:
         ExecutionError: If the prev_view is malformed or axis is invalid.
     """
-    if "quaternion" not in prev_view or not isinstance(prev_view["quaternion"], list) or len(prev_view["quaternion"]) != 4:
-        raise ExecutionError("Invalid 'prev_view' format. Missing or malformed 'quaternion'.")
-
-    # Convert previous quaternion to a scipy Rotation object
-    # scipy.spatial.transform.Rotation.from_quat expects [x, y, z, w]
-    prev_quat = np.array(prev_view["quaternion"])
-    prev_rotation = R.from_quat(prev_quat)
-
-    # Determine the rotation axis vector
-    if isinstance(axis, str):
-        if axis.lower() == "x":
-            rot_axis = np.array([1, 0, 0])
-        elif axis.lower() == "y":
-            rot_axis = np.array([0, 1, 0])
-        elif axis.lower() == "z":
-            rot_axis = np.array([0, 0, 1])
-        else:
-            raise ExecutionError(f"Invalid axis string: {axis}. Must be 'x', 'y', or 'z'.")
-    elif isinstance(axis, tuple) and len(axis) == 3:
-        rot_axis = np.array(axis)
-        if np.linalg.norm(rot_axis) < 1e-6:
-            raise ExecutionError("Rotation axis cannot be a zero vector.")
-        rot_axis = rot_axis / np.linalg.norm(rot_axis) # Normalize
-    else:
-        raise ExecutionError(f"Invalid axis format: {axis}. Must be 'x', 'y', 'z' or a 3-tuple of floats.")
-
-    # Create a new rotation from axis and angle
-    # scipy.spatial.transform.Rotation.from_rotvec expects angle in radians
-    rotation_to_apply = R.from_rotvec(np.radians(angle) * rot_axis)
-
-    # Combine the rotations: new_rotation = rotation_to_apply * prev_rotation
-    # Note: Quaternion multiplication order matters. If applying rotation relative to current camera frame,
-    # it's `new_rotation = prev_rotation * rotation_to_apply`.
-    # If applying rotation relative to the world frame, it's `new_rotation = rotation_to_apply * prev_rotation`.
-    # Assuming rotation relative to the world frame for simplicity, as is common for camera controls.
-    new_rotation = rotation_to_apply * prev_rotation
-
-    # Convert the new rotation back to a quaternion
-    new_quat = new_rotation.as_quat()
-
-    # Create the new viewObject, preserving other properties if they exist
-    new_view = prev_view.copy()
-    new_view["quaternion"] = new_quat.tolist()
-
-    return new_view
\ No newline at end of file
+    prev_quat = _view_quaternion(prev_view)
+    rotation = axis_angle_quaternions([axis], [angle])[0]
+    return _with_quaternion(prev_view, quaternion_multiply(rotation, prev_quat))
@@ -0,0 +1,56 @@
+"""
+Gunicorn settings for the production server.
+
+Run from the 2-MVP_Backend directory, where gunicorn picks this file up:
+
+    gunicorn app:app                                   # Flask, threaded workers
+    gunicorn asgi:app -k uvicorn_worker.UvicornWorker  # ASGI (pip install uvicorn-worker)
+
+The master imports the app (``preload_app``) and warms it up before forking,
+so the imported modules, precomputed camera views, OpenAI SDK and cached
+structures are shared copy-on-write by every worker. ``gc.freeze()`` keeps
+the workers' garbage collector from touching, and so copying, those pages.
+
+Send SIGHUP to the master to replace the workers gracefully: new workers
+fork from the warm master and old ones finish their requests within
+``SERVER_GRACEFUL_TIMEOUT``. The code is not re-imported on SIGHUP; deploy
+new code with SIGUSR2 (start a new master) followed by SIGTERM to the old
+one. Each worker answers ``GET /readyz`` with the warm-up status.
+"""
+import gc
+
+from config import (
+    SERVER_BIND,
+    SERVER_WORKERS,
+    SERVER_THREADS,
+    SERVER_WORKER_CLASS,
+    SERVER_TIMEOUT,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_MAX_REQUESTS,
+)
+
+bind = SERVER_BIND
+workers = SERVER_WORKERS
+threads = SERVER_THREADS
+worker_class = SERVER_WORKER_CLASS
+timeout = SERVER_TIMEOUT
+graceful_timeout = SERVER_GRACEFUL_TIMEOUT
+max_requests = SERVER_MAX_REQUESTS
+max_requests_jitter = SERVER_MAX_REQUESTS // 10
+preload_app = True
+accesslog = "-"
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before any worker is forked.
+    from utils.warmup import warm_up
+
+    seconds = warm_up()
+    gc.freeze()
+    server.log.info(f"Warmed up in {seconds * 1000:.0f} ms; forking {server.num_workers} workers")
+
+
+def post_fork(server, worker):
+    # Per-process state (OpenAI clients, the dispatch pool, sqlite
+    # connections) is reset by at-fork hooks in the modules that own it.
+    server.log.info(f"Worker {worker.pid} forked from the warm master")
@@ -1,5 +1,14 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Union, List, Literal, Optional
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, ValidationError, create_model, model_validator
+from typing import Annotated, Dict, Union, List, Literal, Optional, Type
+
+from config import MAX_ATOMS
+
+def _check_replication(params):
+    # Every cell holds at least one atom, so this bound holds before the cell is built.
+    cells = params.nx * params.ny * params.nz
+    if cells > MAX_ATOMS:
+        raise ValueError(f"Supercell of {params.nx}x{params.ny}x{params.nz} cells exceeds the limit of {MAX_ATOMS} atoms")
+    return params
 
 class BuildStructureParams(BaseModel):
     """
@@ -7,14 +16,39 @@ class BuildStructureParams(BaseModel):
     """
     element: str = Field(..., description="Chemical symbol of the element (e.g., 'Al', 'Fe')")
     lattice: str = Field(..., description="Lattice type (e.g., 'fcc', 'bcc', 'hcp')")
-    nx: int = Field(1, description="Supercell dimension along x-axis")
-    ny: int = Field(1, description="Supercell dimension along y-axis")
-    nz: int = Field(1, description="Supercell dimension along z-axis")
+    nx: int = Field(1, ge=1, description="Supercell dimension along x-axis")
+    ny: int = Field(1, ge=1, description="Supercell dimension along y-axis")
+    nz: int = Field(1, ge=1, description="Supercell dimension along z-axis")
+    a: Optional[float] = Field(None, description="Lattice constant in Angstroms (if not default for element/lattice)")
+    format: Literal["pdb", "xyz", "cif", "binary"] = Field("pdb", description="Output file format for the structure data ('binary' is base64-encoded float32 positions, uint8 atomic numbers and the cell)")
+    mode: Literal["full", "descriptor", "artifact"] = Field("full", description="'full' returns every atom; 'descriptor' returns only the unit cell, its cell vectors and the (nx, ny, nz) replication; 'artifact' stores the file on the server and returns its ID and download URL")
+
+    model_config = ConfigDict(extra="forbid")
+
+    @model_validator(mode="after")
+    def _check_size(self):
+        return _check_replication(self)
+
+class ComputeBondsParams(BaseModel):
+    """
+    Parameters to compute the bonds of a structure built by buildStructure.
+    """
+    element: str = Field(..., description="Chemical symbol of the element (e.g., 'Al', 'Fe'), as passed to buildStructure")
+    lattice: str = Field(..., description="Lattice type (e.g., 'fcc', 'bcc'), as passed to buildStructure")
+    nx: int = Field(1, ge=1, description="Supercell dimension along x-axis")
+    ny: int = Field(1, ge=1, description="Supercell dimension along y-axis")
+    nz: int = Field(1, ge=1, description="Supercell dimension along z-axis")
     a: Optional[float] = Field(None, description="Lattice constant in Angstroms (if not default for element/lattice)")
-    format: Literal["pdb", "xyz", "cif"] = Field("pdb", description="Output file format for the structure data")
+    tolerance: float = Field(0.45, description="Angstroms added to the sum of the covalent radii when deciding whether two atoms are bonded", ge=0.0, le=2.0)
+    periodic: bool = Field(True, description="Also return bonds that cross the supercell's periodic boundaries, with the image of their second atom")
+    format: Literal["binary", "json"] = Field("binary", description="'binary' returns base64 little-endian uint32 index pairs (and int8 images); 'json' returns flat lists")
 
     model_config = ConfigDict(extra="forbid")
 
+    @model_validator(mode="after")
+    def _check_size(self):
+        return _check_replication(self)
+
 class RotateCameraParams(BaseModel):
     """
     Parameters to rotate the camera around an axis.
@@ -159,7 +193,8 @@ class Command(BaseModel):
         "toggleAxes",
         "toggleUnitCell",
         "setView",
-        "displayMessage"
+        "displayMessage",
+        "computeBonds"
     ] = Field(..., description="Name of the command to execute")
     params: Union[
         BuildStructureParams,
@@ -173,15 +208,58 @@ class Command(BaseModel):
         ToggleAxesParams,
         ToggleUnitCellParams,
         SetViewParams,
-        DisplayMessageParams
+        DisplayMessageParams,
+        ComputeBondsParams
     ] = Field(..., description="Parameters for the specific command")
 
     model_config = ConfigDict(extra="forbid")
 
+# Params model for each command name. Used to derive one Command subclass
+# per command, so validation can use ``command`` as a discriminator.
+PARAMS_BY_COMMAND: Dict[str, Type[BaseModel]] = {
+    "buildStructure": BuildStructureParams,
+    "loadPdb": LoadPdbParams,
+    "setRepresentation": SetRepresentationParams,
+    "setBackgroundColor": SetBackgroundColorParams,
+    "rotateCamera": RotateCameraParams,
+    "translateCamera": TranslateCameraParams,
+    "zoom": ZoomParams,
+    "resetView": ResetViewParams,
+    "toggleAxes": ToggleAxesParams,
+    "toggleUnitCell": ToggleUnitCellParams,
+    "setView": SetViewParams,
+    "displayMessage": DisplayMessageParams,
+    "computeBonds": ComputeBondsParams,
+}
+
+COMMAND_MODELS: Dict[str, Type[Command]] = {
+    name: create_model(
+        f"{name[0].upper()}{name[1:]}Command",
+        __base__=Command,
+        __doc__=f"A ``{name}`` command.",
+        command=(Literal[name], Field(..., description="Name of the command to execute")),
+        params=(params_model, Field(..., description="Parameters for the specific command")),
+    )
+    for name, params_model in PARAMS_BY_COMMAND.items()
+}
+# Module attributes under their own names, so validated commands can be
+# pickled (e.g. sent to the EXECUTOR_POOL=process workers).
+globals().update({model.__name__: model for model in COMMAND_MODELS.values()})
+
+# Discriminated on ``command``: pydantic looks up the single matching
+# params model instead of trying every member of the union in turn.
+AnyCommand = Annotated[Union[tuple(COMMAND_MODELS.values())], Field(discriminator="command")]
+
+_COMMAND_LIST_ADAPTER = TypeAdapter(List[AnyCommand])
+
 def validate_commands(raw: List[dict]) -> List[Command]:
     """
     Validates a list of raw command dictionaries against the Command Pydantic model.
 
+    The whole list is validated in one call through a cached ``TypeAdapter``,
+    using the ``command`` field to select the params model. Each returned
+    object is an instance of a ``Command`` subclass specific to its command.
+
     Args:
         raw (List[dict]): A list of dictionaries, each representing a command.
 
@@ -191,10 +269,15 @@ def validate_commands(raw: List[dict]) -> List[Command]:
     Raises:
         ValueError: If any command fails validation.
     """
-    validated_commands = []
-    for i, cmd_data in enumerate(raw):
-        try:
-            validated_commands.append(Command(**cmd_data))
-        except Exception as e:
-            raise ValueError(f"Validation error in command {i}: {e}") from e
-    return validated_commands
\ No newline at end of file
+    try:
+        return _COMMAND_LIST_ADAPTER.validate_python(raw)
+    except ValidationError as e:
+        errors = e.errors()
+        loc = errors[0]["loc"]
+        index = loc[0] if loc and isinstance(loc[0], int) else 0
+        details = "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'][1:]) or 'command'}: {err['msg']}"
+            for err in errors
+            if not err["loc"] or err["loc"][0] == index
+        )
+        raise ValueError(f"Validation error in command {index}: {details}") from e
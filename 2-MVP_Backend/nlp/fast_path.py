@@ -0,0 +1,256 @@
+import re
+import threading
+from functools import lru_cache
+from typing import List, Optional
+
+from config import MAX_ATOMS
+from executor.view import compute_set_view
+
+# Lattice names accepted by the fast path, mapped to ase.build.bulk names.
+# Only cubic lattices are listed because build_structure asks for the
+# conventional cubic cell.
+LATTICE_ALIASES = {
+    "fcc": "fcc",
+    "face centered cubic": "fcc",
+    "face-centered cubic": "fcc",
+    "face centred cubic": "fcc",
+    "face-centred cubic": "fcc",
+    "bcc": "bcc",
+    "body centered cubic": "bcc",
+    "body-centered cubic": "bcc",
+    "body centred cubic": "bcc",
+    "body-centred cubic": "bcc",
+    "sc": "sc",
+    "simple cubic": "sc",
+    "primitive cubic": "sc",
+    "diamond": "diamond",
+    "diamond cubic": "diamond",
+}
+_DEFAULT_LATTICES = {"fcc", "bcc", "sc", "diamond"}
+
+
+@lru_cache(maxsize=1)
+def _element_names() -> dict:
+    # Element names (lower-case, including the British spelling of aluminium
+    # and sulphur) mapped to chemical symbols, built on the first prompt.
+    from ase.data import atomic_names, chemical_symbols  # Deferred: importing ase loads ase.atoms.
+
+    names = {name.lower(): symbol for name, symbol in zip(atomic_names, chemical_symbols) if name}
+    names.update({"aluminium": "Al", "sulphur": "S", "caesium": "Cs"})
+    return names
+
+
+# Words that may appear around a recognized phrase without changing its meaning.
+# Anything outside these sets makes the clause fall back to the LLM.
+_BUILD_FILLER = {
+    "build", "create", "make", "generate", "construct", "show", "me", "give", "please", "can", "you",
+    "a", "an", "the", "of", "with", "for", "new", "supercell", "super", "cell", "cells", "unit",
+    "structure", "crystal", "lattice", "bulk", "block", "slab", "atoms", "conventional", "cubic",
+    "sized", "size", "i", "in", "as", "at", "be", "he", "no",
+}
+_ROTATE_FILLER = {
+    "rotate", "rotation", "turn", "spin", "the", "view", "camera", "structure", "model", "by", "around",
+    "about", "along", "axis", "degrees", "degree", "deg", "please", "can", "you",
+}
+_VIEW_FILLER = {
+    "view", "look", "looking", "show", "set", "orient", "align", "the", "face", "plane", "surface",
+    "direction", "down", "along", "at", "from", "onto", "to", "toward", "towards", "me", "please",
+    "can", "you", "miller", "index", "camera", "a", "an",
+}
+
+# Commas inside brackets belong to Miller indices ("[1,1,1]"), not to the clause list.
+_CLAUSE_SPLIT = re.compile(r"\s*(?:,(?![^\[\](){}<>]*[\])}>])|;|\band then\b|\bthen\b|\band\b)\s*")
+_DIMS = re.compile(r"\b(\d+)\s*(?:x|×|by|\*)\s*(\d+)\s*(?:x|×|by|\*)\s*(\d+)\b")
+_LATTICE_CONSTANT = re.compile(
+    r"\b(?:a\s*=\s*|with\s+a\s*=\s*|lattice\s+(?:constant|parameter)\s+(?:of\s+)?)(\d+(?:\.\d+)?)\s*(?:å|a|angstroms?)?(?=\s|$)"
+)
+_ANGLE = re.compile(r"(?<![\w.])(-?\d+(?:\.\d+)?)\s*(?:°|degrees?\b|deg\b)?")
+_AXIS = re.compile(r"\b([xyz])(?:\s*-?\s*axis)?\b")
+_MILLER = re.compile(r"[\(\[<{]?\s*([01])\s*,?\s*([01])\s*,?\s*([01])\s*[\)\]>}]?")
+_TOKEN = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+
+_lock = threading.Lock()
+_requests = 0
+_hits = 0
+
+
+def _only_filler(text: str, filler: set) -> bool:
+    return all(token in filler for token in _TOKEN.findall(text))
+
+
+def _match_element(clause: str, original: str):
+    """Finds exactly one element by name or symbol. Returns (symbol, remaining_text) or None."""
+    from ase.data import atomic_numbers
+
+    element_names = _element_names()
+    found = []
+    remaining = clause
+    for name in sorted(element_names, key=len, reverse=True):
+        pattern = re.compile(rf"\b{re.escape(name)}\b")
+        if pattern.search(remaining):
+            found.append(element_names[name])
+            remaining = pattern.sub(" ", remaining)
+    # Symbols must keep their capitalization in the original prompt ("Al",
+    # "Fe"), so that words such as "in", "as" or "a" are never read as elements.
+    for token in re.findall(r"\b[A-Z][a-z]?\b", original):
+        if token in atomic_numbers and token.lower() not in _BUILD_FILLER:
+            found.append(token)
+            remaining = re.sub(rf"\b{token.lower()}\b", " ", remaining, count=1)
+    if len(set(found)) != 1:
+        return None
+    return found[0], remaining
+
+
+def _parse_build(clause: str, original: str) -> Optional[dict]:
+    from ase.data import atomic_numbers, reference_states
+
+    params = {}
+    dims = _DIMS.search(clause)
+    if dims:
+        params["nx"], params["ny"], params["nz"] = (int(d) for d in dims.groups())
+        # Zero or oversized repeats would only fail validation; leave them to the LLM.
+        if min(params.values()) < 1 or params["nx"] * params["ny"] * params["nz"] > MAX_ATOMS:
+            return None
+        clause = clause[:dims.start()] + " " + clause[dims.end():]
+
+    constant = _LATTICE_CONSTANT.search(clause)
+    if constant:
+        params["a"] = float(constant.group(1))
+        clause = clause[:constant.start()] + " " + clause[constant.end():]
+
+    lattice = None
+    for alias in sorted(LATTICE_ALIASES, key=len, reverse=True):
+        pattern = re.compile(rf"\b{re.escape(alias)}\b")
+        # "Sc" is scandium, not simple cubic: skip an alias the prompt only spells as an element symbol.
+        spellings = re.findall(rf"\b{re.escape(alias)}\b", original, re.IGNORECASE)
+        if spellings and all(spelling in atomic_numbers for spelling in spellings):
+            continue
+        if pattern.search(clause):
+            lattice = LATTICE_ALIASES[alias]
+            clause = pattern.sub(" ", clause)
+            break
+
+    element = _match_element(clause, original)
+    if element is None:
+        return None
+    symbol, clause = element
+
+    if lattice is None:
+        state = reference_states[atomic_numbers[symbol]]
+        if not state or state.get("symmetry") not in _DEFAULT_LATTICES:
+            return None
+        lattice = state["symmetry"]
+
+    if not _only_filler(clause, _BUILD_FILLER):
+        return None
+    return {"command": "buildStructure", "params": {"element": symbol, "lattice": lattice, **params}}
+
+
+def _parse_rotate(clause: str) -> Optional[dict]:
+    if not re.search(r"\b(?:rotate|rotation|turn|spin)\b", clause):
+        return None
+    axis = _AXIS.search(clause)
+    if axis is None:
+        return None
+    clause = clause[:axis.start()] + " " + clause[axis.end():]
+    angles = _ANGLE.findall(clause)
+    if len(angles) != 1:
+        return None
+    clause = _ANGLE.sub(" ", clause)
+    if not _only_filler(clause, _ROTATE_FILLER):
+        return None
+    return {"command": "rotateCamera", "params": {"axis": axis.group(1), "angle": float(angles[0])}}
+
+
+def _parse_view(clause: str) -> Optional[dict]:
+    miller = _MILLER.search(clause)
+    if miller is None:
+        return None
+    face = "".join(miller.groups())
+    clause = clause[:miller.start()] + " " + clause[miller.end():]
+    if not _only_filler(clause, _VIEW_FILLER):
+        return None
+    try:
+        view = compute_set_view(face)
+    except Exception:
+        return None
+    qx, qy, qz, qw = view["quaternion"]
+    tx, ty, tz = view["translation"]
+    return {
+        "command": "setView",
+        "params": {
+            "viewObject": {
+                "quaternion": {"x": qx, "y": qy, "z": qz, "w": qw},
+                "translation": {"x": tx, "y": ty, "z": tz},
+                "zoom": view["zoom"],
+            }
+        },
+    }
+
+
+def _parse_clause(clause: str) -> Optional[dict]:
+    lowered = clause.lower().strip(" .!?")
+    if not lowered:
+        return None
+    for parser in (_parse_rotate, _parse_view):
+        command = parser(lowered)
+        if command is not None:
+            return command
+    return _parse_build(lowered, clause)
+
+
+def parse_prompt(prompt: str) -> Optional[List[dict]]:
+    """
+    Translates common prompts into commands without calling the LLM.
+
+    Recognizes supercell builds ("3x3x3 FCC Al", "build bcc iron"), camera
+    rotations ("rotate 90 degrees around x") and face views ("view the 111
+    face"), optionally chained with "and", "then" or commas. A prompt only
+    matches if every clause is recognized and every leftover word is a known
+    filler word; otherwise None is returned and the caller should fall back
+    to :func:`nlp.llm_client.generate_commands`.
+
+    Args:
+        prompt: The user's natural-language message.
+
+    Returns:
+        A list of raw command dictionaries, or None if the prompt is not
+        recognized with confidence.
+    """
+    global _requests, _hits
+    commands = []
+    for clause in _CLAUSE_SPLIT.split(prompt.strip()):
+        command = _parse_clause(clause)
+        if command is None:
+            commands = None
+            break
+        commands.append(command)
+
+    with _lock:
+        _requests += 1
+        if commands:
+            _hits += 1
+    return commands or None
+
+
+def fast_path_stats() -> dict:
+    """
+    Returns how many prompts were served by the fast path.
+
+    Returns:
+        dict: ``requests`` seen, ``hits`` served without the LLM and their ``fraction``.
+    """
+    with _lock:
+        return {
+            "requests": _requests,
+            "hits": _hits,
+            "fraction": _hits / _requests if _requests else 0.0,
+        }
+
+
+def reset_fast_path_stats() -> None:
+    """Resets the fast-path counters."""
+    global _requests, _hits
+    with _lock:
+        _requests = 0
+        _hits = 0
@@ -1,12 +1,51 @@
 import os
 import json
-from typing import List, Optional
-from openai import OpenAI
-from config import OPENAI_API_KEY
+import copy
+import threading
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Optional
+from config import OPENAI_API_KEY, OPENAI_BASE_URL, LLM_MODEL
+from models.commands import validate_commands
+from nlp.prompt_cache import prompt_cache, prompt_cache_key
+from nlp.single_flight import SingleFlight, AsyncSingleFlight
 from utils.error_handlers import NLPError
-import functools
+from utils.metrics import stage_seconds
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+# The OpenAI SDK takes most of a second to import, so it is loaded, and the
+# clients created, on the first LLM call (or by utils.warmup at boot).
+_clients = {}
+_clients_lock = threading.Lock()
+# httpx connection pools must not be shared with forked workers; the SDK
+# stays imported, so recreating a client in the child is cheap.
+os.register_at_fork(after_in_child=_clients.clear)
+
+
+def _get_client(name: str):
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                import openai
+
+                client = _clients[name] = getattr(openai, name)(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
+    return client
+
+
+def get_client() -> "OpenAI":
+    """Returns the shared synchronous OpenAI client, creating it on first use."""
+    return _get_client("OpenAI")
+
+
+def get_async_client() -> "AsyncOpenAI":
+    """Returns the shared ``AsyncOpenAI`` client, creating it on first use."""
+    return _get_client("AsyncOpenAI")
+
+# Concurrent identical (prompt, context) requests share one in-flight LLM call.
+llm_single_flight = SingleFlight()
+async_llm_single_flight = AsyncSingleFlight()
 
 # Define OpenAI function definitions for tool use
 OPENAI_FUNCTIONS = [
@@ -27,21 +66,36 @@ OPENAI_FUNCTIONS = [
                 "nx": {
                     "type": "integer",
                     "description": "Supercell dimension along x-axis",
-                    "default": 1
+                    "default": 1,
+                    "minimum": 1
                 },
                 "ny": {
                     "type": "integer",
                     "description": "Supercell dimension along y-axis",
-                    "default": 1
+                    "default": 1,
+                    "minimum": 1
                 },
                 "nz": {
                     "type": "integer",
                     "description": "Supercell dimension along z-axis",
-                    "default": 1
+                    "default": 1,
+                    "minimum": 1
                 },
                 "a": {
                     "type": "number",
                     "description": "Lattice constant in Angstroms (if not default for element/lattice)"
+                },
+                "format": {
+                    "type": "string",
+                    "description": "Output file format for the structure data",
+                    "enum": ["pdb", "xyz", "cif", "binary"],
+                    "default": "pdb"
+                },
+                "mode": {
+                    "type": "string",
+                    "description": "'full' returns every atom; 'descriptor' returns only the unit cell and the replication, for very large supercells; 'artifact' stores the file on the server and returns a download URL",
+                    "enum": ["full", "descriptor", "artifact"],
+                    "default": "full"
                 }
             },
             "required": ["element", "lattice"]
@@ -118,6 +172,225 @@ OPENAI_FUNCTIONS = [
             },
             "required": ["viewObject"]
         }
+    },
+    {
+        "name": "loadPdb",
+        "description": "Loads a structure from the Protein Data Bank by its four-character ID.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "pdbId": {
+                    "type": "string",
+                    "description": "Four-character PDB identifier",
+                    "pattern": "^[A-Za-z0-9]{4}$"
+                }
+            },
+            "required": ["pdbId"]
+        }
+    },
+    {
+        "name": "setRepresentation",
+        "description": "Changes the visual style of the displayed model (sticks, spheres, cartoon, etc.).",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "style": {
+                    "type": "string",
+                    "description": "Representation style for the model",
+                    "enum": ["stick", "line", "sphere", "cartoon", "ballAndStick"]
+                },
+                "options": {
+                    "type": "object",
+                    "description": "Style-specific options (radius, scale, etc.)"
+                },
+                "colorScheme": {
+                    "type": "string",
+                    "description": "Coloring scheme (Jmol, ssPyMol, element, etc.)"
+                },
+                "opacity": {
+                    "type": "number",
+                    "description": "Opacity value between 0.0 (transparent) and 1.0 (opaque)",
+                    "minimum": 0.0,
+                    "maximum": 1.0
+                }
+            },
+            "required": ["style"]
+        }
+    },
+    {
+        "name": "setBackgroundColor",
+        "description": "Changes the viewer background color.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "color": {
+                    "type": "string",
+                    "description": "CSS color string or hex code (e.g. 'white', '#FF0000')"
+                }
+            },
+            "required": ["color"]
+        }
+    },
+    {
+        "name": "translateCamera",
+        "description": "Pans the camera by a translation vector.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "vector": {
+                    "type": "array",
+                    "description": "Translation vector [dx, dy, dz]",
+                    "items": {"type": "number"},
+                    "minItems": 3,
+                    "maxItems": 3
+                }
+            },
+            "required": ["vector"]
+        }
+    },
+    {
+        "name": "zoom",
+        "description": "Zooms the camera in or out.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "factor": {
+                    "type": "number",
+                    "description": "Zoom factor (>1 = zoom in; <1 = zoom out)"
+                },
+                "fixedPath": {
+                    "type": "boolean",
+                    "description": "Zoom along fixed path (true) or relative (false)"
+                }
+            },
+            "required": ["factor"]
+        }
+    },
+    {
+        "name": "resetView",
+        "description": "Resets the camera to the default view.",
+        "parameters": {
+            "type": "object",
+            "properties": {}
+        }
+    },
+    {
+        "name": "toggleAxes",
+        "description": "Shows or hides the coordinate axes.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "show": {
+                    "type": "boolean",
+                    "description": "true to show axes; false to hide"
+                }
+            },
+            "required": ["show"]
+        }
+    },
+    {
+        "name": "toggleUnitCell",
+        "description": "Shows or hides the crystallographic unit cell.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "show": {
+                    "type": "boolean",
+                    "description": "true to show unit cell; false to hide"
+                },
+                "crystalData": {
+                    "type": "object",
+                    "description": "Optional explicit cell parameters",
+                    "properties": {
+                        "a": {"type": "number", "description": "Cell length a"},
+                        "b": {"type": "number", "description": "Cell length b"},
+                        "c": {"type": "number", "description": "Cell length c"},
+                        "alpha": {"type": "number", "description": "Angle alpha in degrees"},
+                        "beta": {"type": "number", "description": "Angle beta in degrees"},
+                        "gamma": {"type": "number", "description": "Angle gamma in degrees"}
+                    },
+                    "required": ["a", "b", "c", "alpha", "beta", "gamma"]
+                }
+            },
+            "required": ["show"]
+        }
+    },
+    {
+        "name": "displayMessage",
+        "description": "Shows a message to the user in the chat pane, e.g. to explain a result or ask for clarification.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "message": {
+                    "type": "string",
+                    "description": "Text to display in the chat pane"
+                },
+                "type": {
+                    "type": "string",
+                    "description": "Severity or style of the message",
+                    "enum": ["info", "success", "warning", "error"]
+                }
+            },
+            "required": ["message", "type"]
+        }
+    },
+    {
+        "name": "computeBonds",
+        "description": "Computes the bonds of a structure on the server, so stick and ball-and-stick views of large supercells do not have to find them in the browser. Pass the same element, lattice, supercell size and lattice constant as the buildStructure call it accompanies.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "element": {
+                    "type": "string",
+                    "description": "Chemical symbol of the element, as passed to buildStructure"
+                },
+                "lattice": {
+                    "type": "string",
+                    "description": "Lattice type, as passed to buildStructure"
+                },
+                "nx": {
+                    "type": "integer",
+                    "description": "Supercell dimension along x-axis",
+                    "default": 1,
+                    "minimum": 1
+                },
+                "ny": {
+                    "type": "integer",
+                    "description": "Supercell dimension along y-axis",
+                    "default": 1,
+                    "minimum": 1
+                },
+                "nz": {
+                    "type": "integer",
+                    "description": "Supercell dimension along z-axis",
+                    "default": 1,
+                    "minimum": 1
+                },
+                "a": {
+                    "type": "number",
+                    "description": "Lattice constant in Angstroms (if not default for element/lattice)"
+                },
+                "tolerance": {
+                    "type": "number",
+                    "description": "Angstroms added to the sum of the covalent radii when deciding whether two atoms are bonded",
+                    "default": 0.45,
+                    "minimum": 0.0,
+                    "maximum": 2.0
+                },
+                "periodic": {
+                    "type": "boolean",
+                    "description": "Also return bonds across the periodic boundaries",
+                    "default": True
+                },
+                "format": {
+                    "type": "string",
+                    "description": "'binary' for base64 index arrays, 'json' for lists",
+                    "enum": ["binary", "json"],
+                    "default": "binary"
+                }
+            },
+            "required": ["element", "lattice"]
+        }
     }
 ]
 
@@ -155,13 +428,100 @@ FEW_SHOT_EXAMPLES = [
 _INITIAL_MESSAGES = [
     {
         "role": "system",
-        "content": "You are a helpful assistant that translates natural language into 3Dmol.js viewer commands. Respond only with valid JSON commands using the provided functions."
+        "content": "You are a helpful assistant that translates natural language into 3Dmol.js viewer commands. Respond only with valid JSON commands using the provided functions. When a request has several steps, call one function per step in a single response, in the order the steps should be applied."
     }
 ]
 for example in FEW_SHOT_EXAMPLES:
     _INITIAL_MESSAGES.append(example)
 
-@functools.lru_cache(maxsize=128)
+def _build_messages(prompt: str, context: Optional[List[dict]] = None) -> List[dict]:
+    messages = list(_INITIAL_MESSAGES) # Create a mutable copy
+    if context:
+        messages.extend(context)
+
+    # Add user prompt
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+def _request_kwargs(messages: List[dict]) -> dict:
+    return {
+        "model": LLM_MODEL,
+        "tools": [{"type": "function", "function": f} for f in OPENAI_FUNCTIONS],
+        "messages": messages,
+        "tool_choice": "auto", # Allow the model to decide whether to call a function
+    }
+
+def _parse_response(response) -> List[dict]:
+    # Every tool call becomes a command, in the order the model returned
+    # them, so a multi-step prompt needs only one round trip.
+    tool_calls = response.choices[0].message.tool_calls
+    if not tool_calls:
+        raise NLPError("LLM did not return a tool call.")
+
+    try:
+        return [
+            {"command": tool_call.function.name, "params": json.loads(tool_call.function.arguments or "{}")}
+            for tool_call in tool_calls
+        ]
+    except (AttributeError, KeyError, json.JSONDecodeError) as e:
+        raise NLPError(f"Malformed tool call arguments from OpenAI API: {e}")
+
+def _cache_if_valid(key: str, commands: List[dict]) -> None:
+    # A response that fails validation is not cached, so it is not replayed
+    # to everyone sending the same prompt; the caller still reports the error.
+    try:
+        validate_commands(commands)
+    except ValueError:
+        return
+    prompt_cache.put(key, commands)
+
+class _ToolCallAccumulator:
+    """
+    Reassembles streamed tool-call fragments into commands.
+
+    A tool call's arguments arrive as JSON text split over many chunks. The
+    call is complete as soon as the accumulated text parses as a JSON
+    object, so commands are released without waiting for the end of the
+    stream, always in tool-call order.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._next = 0
+        self.commands: List[dict] = []
+
+    def feed(self, chunk) -> List[dict]:
+        """Adds one streamed chunk and returns the commands it completed."""
+        for choice in chunk.choices or []:
+            for delta in choice.delta.tool_calls or []:
+                call = self._calls.setdefault(delta.index, {"name": "", "arguments": ""})
+                if delta.function is not None:
+                    call["name"] += delta.function.name or ""
+                    call["arguments"] += delta.function.arguments or ""
+        return self._release(final=False)
+
+    def finish(self) -> List[dict]:
+        """Returns the remaining commands once the stream has ended."""
+        ready = self._release(final=True)
+        if not self.commands:
+            raise NLPError("LLM did not return a tool call.")
+        return ready
+
+    def _release(self, final: bool) -> List[dict]:
+        ready = []
+        while self._next in self._calls:
+            call = self._calls[self._next]
+            try:
+                params = json.loads(call["arguments"] or ("{}" if final else ""))
+            except json.JSONDecodeError as e:
+                if final:
+                    raise NLPError(f"Malformed tool call arguments from OpenAI API: {e}")
+                break
+            ready.append({"command": call["name"], "params": params})
+            self._next += 1
+        self.commands.extend(ready)
+        return ready
+
 def generate_commands(
     prompt: str,
     context: Optional[List[dict]] = None
@@ -170,6 +530,11 @@ def generate_commands(
     Generates a list of commands based on the user's natural language prompt
     using the OpenAI ChatCompletion API with function calling.
 
+    Results that pass command validation are cached in the shared prompt
+    cache, keyed on the normalized prompt, the conversation context and the
+    model. Concurrent calls with the same key wait for a single in-flight
+    LLM call instead of issuing their own.
+
     Args:
         prompt: The user's natural-language message.
         context: Optional history of previous commands for multi-turn conversations.
@@ -180,34 +545,151 @@ def generate_commands(
     Raises:
         NLPError: If the API call fails or the response is malformed.
     """
-    messages = list(_INITIAL_MESSAGES) # Create a mutable copy
-    if context:
-        messages.extend(context)
+    key = prompt_cache_key(prompt, context, LLM_MODEL)
+    with stage_seconds.time("prompt_cache"):
+        cached = prompt_cache.get(key)
+    if cached is not None:
+        return cached
 
-    # Add user prompt
-    messages.append({"role": "user", "content": prompt})
+    def fetch() -> List[dict]:
+        messages = _build_messages(prompt, context)
+
+        try:
+            with stage_seconds.time("llm"):
+                response = get_client().chat.completions.create(**_request_kwargs(messages))
+        except Exception as e:
+            raise NLPError(f"OpenAI API call failed: {e}")
 
+        commands = _parse_response(response)
+        _cache_if_valid(key, commands)
+        return commands
+
+    # Every waiter gets its own copy of the shared result.
+    return copy.deepcopy(llm_single_flight.do(key, fetch))
+
+async def agenerate_commands(
+    prompt: str,
+    context: Optional[List[dict]] = None
+) -> List[dict]:
+    """
+    Async counterpart of :func:`generate_commands` using ``AsyncOpenAI``.
+
+    The event loop is released for the whole OpenAI round trip, so a single
+    process can hold many in-flight requests. Concurrent calls with the same
+    key share one in-flight LLM call.
+
+    Args:
+        prompt: The user's natural-language message.
+        context: Optional history of previous commands for multi-turn conversations.
+
+    Returns:
+        A list of raw command dictionaries.
+
+    Raises:
+        NLPError: If the API call fails or the response is malformed.
+    """
+    key = prompt_cache_key(prompt, context, LLM_MODEL)
+    with stage_seconds.time("prompt_cache"):
+        cached = prompt_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def fetch() -> List[dict]:
+        messages = _build_messages(prompt, context)
+
+        try:
+            with stage_seconds.time("llm"):
+                response = await get_async_client().chat.completions.create(**_request_kwargs(messages))
+        except Exception as e:
+            raise NLPError(f"OpenAI API call failed: {e}")
+
+        commands = _parse_response(response)
+        _cache_if_valid(key, commands)
+        return commands
+
+    # Every waiter gets its own copy of the shared result.
+    return copy.deepcopy(await async_llm_single_flight.do(key, fetch))
+
+def stream_commands(
+    prompt: str,
+    context: Optional[List[dict]] = None
+) -> Iterator[dict]:
+    """
+    Streaming variant of :func:`generate_commands`.
+
+    Uses the streaming chat completion API and yields each command as soon
+    as its tool-call arguments are complete, while later tool calls are
+    still being generated. A prompt-cache hit yields the cached commands; a
+    completed stream whose commands validate is added to the cache. Streams
+    are not coalesced.
+
+    Args:
+        prompt: The user's natural-language message.
+        context: Optional history of previous commands for multi-turn conversations.
+
+    Yields:
+        Raw command dictionaries, in tool-call order.
+
+    Raises:
+        NLPError: If the API call or the stream fails, or the response is malformed.
+    """
+    key = prompt_cache_key(prompt, context, LLM_MODEL)
+    with stage_seconds.time("prompt_cache"):
+        cached = prompt_cache.get(key)
+    if cached is not None:
+        yield from cached
+        return
+
+    accumulator = _ToolCallAccumulator()
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-0613",
-            tools=[{"type": "function", "function": f} for f in OPENAI_FUNCTIONS],
-            messages=messages,
-            tool_choice="auto" # Allow the model to decide whether to call a function
-        )
+        stream = get_client().chat.completions.create(**_request_kwargs(_build_messages(prompt, context)), stream=True)
+        for chunk in stream:
+            yield from accumulator.feed(chunk)
+    except NLPError:
+        raise
     except Exception as e:
         raise NLPError(f"OpenAI API call failed: {e}")
+    yield from accumulator.finish()
+    _cache_if_valid(key, accumulator.commands)
 
-    if not response.choices[0].message.tool_calls:
-        raise NLPError("LLM did not return a tool call.")
+async def astream_commands(
+    prompt: str,
+    context: Optional[List[dict]] = None
+) -> AsyncIterator[dict]:
+    """
+    Async counterpart of :func:`stream_commands` using ``AsyncOpenAI``.
 
+    Args:
+        prompt: The user's natural-language message.
+        context: Optional history of previous commands for multi-turn conversations.
+
+    Yields:
+        Raw command dictionaries, in tool-call order.
+
+    Raises:
+        NLPError: If the API call or the stream fails, or the response is malformed.
+    """
+    key = prompt_cache_key(prompt, context, LLM_MODEL)
+    with stage_seconds.time("prompt_cache"):
+        cached = prompt_cache.get(key)
+    if cached is not None:
+        for command in cached:
+            yield command
+        return
+
+    accumulator = _ToolCallAccumulator()
     try:
-        tool_call = response.choices[0].message.tool_calls[0]
-        function_call_name = tool_call.function.name
-        function_call_args = json.loads(tool_call.function.arguments)
-        commands = [{"command": function_call_name, "params": function_call_args}]
-        return commands
-    except (AttributeError, KeyError, json.JSONDecodeError) as e:
-        raise NLPError(f"Malformed tool call arguments from OpenAI API: {e}")
+        stream = await get_async_client().chat.completions.create(**_request_kwargs(_build_messages(prompt, context)), stream=True)
+        async for chunk in stream:
+            for command in accumulator.feed(chunk):
+                yield command
+    except NLPError:
+        raise
+    except Exception as e:
+        raise NLPError(f"OpenAI API call failed: {e}")
+    for command in accumulator.finish():
+        yield command
+    _cache_if_valid(key, accumulator.commands)
 
 if __name__ == "__main__":
     try:
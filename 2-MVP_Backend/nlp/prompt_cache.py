@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import List, Optional
+
+from config import PROMPT_CACHE_PATH, PROMPT_CACHE_TTL_SECONDS, PROMPT_CACHE_MAX_ENTRIES
+from utils.metrics import metrics
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalizes a prompt so trivially different spellings share a cache entry.
+
+    Case is folded, surrounding whitespace and trailing punctuation stripped,
+    and internal runs of whitespace collapsed to a single space.
+
+    Args:
+        prompt (str): The user's natural-language message.
+
+    Returns:
+        str: The normalized prompt.
+    """
+    return " ".join(prompt.casefold().split()).rstrip(".!?").strip()
+
+
+def prompt_cache_key(prompt: str, context: Optional[List[dict]], model: str) -> str:
+    """
+    Computes the cache key for a prompt, its conversation context and the model.
+
+    Args:
+        prompt (str): The user's natural-language message.
+        context (Optional[List[dict]]): Conversation history sent with the prompt.
+        model (str): The LLM model name.
+
+    Returns:
+        str: The hex SHA-256 digest of the normalized inputs.
+    """
+    payload = json.dumps(
+        {"prompt": normalize_prompt(prompt), "context": context or [], "model": model},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """
+    Prompt-to-commands cache backed by SQLite.
+
+    Every worker process pointed at the same database file shares entries.
+    Entries expire after ``ttl_seconds``; once more than ``max_entries`` are
+    stored, the least recently used ones are evicted. Any SQLite error is
+    treated as a miss so the cache can never fail a request.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = PROMPT_CACHE_PATH,
+        ttl_seconds: float = PROMPT_CACHE_TTL_SECONDS,
+        max_entries: int = PROMPT_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path or None
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not cross threads or forked processes.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prompt_cache ("
+                "key TEXT PRIMARY KEY, commands TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS prompt_cache_last_access ON prompt_cache (last_access)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        """
+        Looks up the commands cached for a key.
+
+        Args:
+            key (str): A key from :func:`prompt_cache_key`.
+
+        Returns:
+            Optional[List[dict]]: The cached commands, or None on a miss or expired entry.
+        """
+        if self.path is None:
+            return None
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT commands, created_at FROM prompt_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM prompt_cache WHERE key = ?", (key,))
+                self._count("expirations")
+                row = None
+            if row is None:
+                self._count("misses")
+                return None
+            conn.execute("UPDATE prompt_cache SET last_access = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            self._count("errors")
+            return None
+        self._count("hits")
+        return json.loads(row[0])
+
+    def put(self, key: str, commands: List[dict]) -> None:
+        """
+        Stores commands for a key, evicting least recently used entries beyond ``max_entries``.
+
+        Args:
+            key (str): A key from :func:`prompt_cache_key`.
+            commands (List[dict]): The raw commands returned by the LLM.
+        """
+        if self.path is None:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO prompt_cache (key, commands, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(commands), now, now),
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM prompt_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM prompt_cache WHERE key IN "
+                    "(SELECT key FROM prompt_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self._count("evictions", overflow)
+        except sqlite3.Error:
+            self._count("errors")
+
+    def clear(self) -> None:
+        """Deletes every entry and resets the counters."""
+        if self.path is not None:
+            try:
+                self._connection().execute("DELETE FROM prompt_cache")
+            except sqlite3.Error:
+                self._count("errors")
+        with self._lock:
+            self.hits = self.misses = self.expirations = self.evictions = self.errors = 0
+
+    def stats(self) -> dict:
+        """
+        Returns this process's hit/miss/expiration/eviction counters and the shared entry count.
+
+        Returns:
+            dict: Counters suitable for JSON serialization.
+        """
+        entries = 0
+        if self.path is not None:
+            try:
+                entries = self._connection().execute("SELECT COUNT(*) FROM prompt_cache").fetchone()[0]
+            except sqlite3.Error:
+                self._count("errors")
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "enabled": self.path is not None,
+            }
+
+
+prompt_cache = PromptCache()
+
+# Read from the counters directly; stats() also counts the shared entries,
+# which costs a query on every scrape.
+metrics.register_callback(
+    "nlp_atomic_prompt_cache_lookups_total",
+    "Prompt cache lookups in this process by outcome.",
+    lambda: {"hits": prompt_cache.hits, "misses": prompt_cache.misses, "expirations": prompt_cache.expirations},
+    kind="counter",
+    label="outcome",
+)
@@ -0,0 +1,13 @@
+import pytest
+
+from nlp import llm_client
+
+@pytest.fixture(autouse=True)
+def openai_api_key(monkeypatch):
+    """
+    Gives the lazily created OpenAI clients a placeholder key when none is exported.
+
+    Tests mock every API call, but the SDK refuses to create a client
+    without a key, so the suite would otherwise depend on the environment.
+    """
+    monkeypatch.setattr(llm_client, "OPENAI_API_KEY", llm_client.OPENAI_API_KEY or "test-key")
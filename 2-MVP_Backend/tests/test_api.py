@@ -22,6 +22,7 @@ def test_commands_valid_prompt(mock_generate_commands, client):
     assert isinstance(data, list)
     assert len(data) > 0
     mock_generate_commands.assert_called_once_with('create a simple cube')
+    assert [stage.split(';')[0] for stage in response.headers['Server-Timing'].split(', ')] == ['nlp', 'validate', 'execute', 'encode']
 
 def test_commands_invalid_prompt(client):
     """Test the /api/commands endpoint with an invalid prompt (e.g., missing prompt)."""
@@ -54,4 +55,97 @@ def test_commands_llm_error(mock_generate_commands, client):
     data = json.loads(response.data)
     assert 'error' in data
     assert 'Error generating commands from NLP: Simulated LLM error' in data['error']
-    mock_generate_commands.assert_called_once_with('simulate llm error')
\ No newline at end of file
+    mock_generate_commands.assert_called_once_with('simulate llm error')
+
+def test_download_structure(client):
+    """Test that /api/structures/download returns the full supercell as an attachment."""
+    response = client.post('/api/structures/download', json={
+        "element": "Al", "lattice": "fcc", "nx": 2, "ny": 2, "nz": 2, "mode": "descriptor"
+    })
+    assert response.status_code == 200
+    assert response.mimetype == "chemical/x-pdb"
+    assert 'attachment; filename="Al_fcc_2x2x2.pdb"' == response.headers["Content-Disposition"]
+    assert response.data.decode().count("ATOM") == 32
+
+def test_download_structure_invalid_params(client):
+    """Test that /api/structures/download rejects invalid parameters."""
+    response = client.post('/api/structures/download', json={"element": "Al"})
+    assert response.status_code == 400
+    assert 'error' in json.loads(response.data)
+
+@patch('app.generate_commands')
+def test_commands_batch_reports_per_item_results(mock_generate_commands, client):
+    """Test that /api/commands/batch returns per-item results and isolates failures."""
+    def fake_generate(prompt):
+        if prompt == 'broken':
+            raise Exception("Simulated LLM error")
+        return [{"command": "rotateCamera", "params": {"axis": "x", "angle": 90}}]
+    mock_generate_commands.side_effect = fake_generate
+
+    response = client.post('/api/commands/batch', json={'items': [
+        {'prompt': 'turn it sideways'},
+        {'prompt': 'broken'},
+        {'commands': [{"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc"}}]},
+        {'commands': [{"command": "notACommand", "params": {}}]},
+        {},
+    ], 'concurrency': 2})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [item['index'] for item in data] == [0, 1, 2, 3, 4]
+    assert len(data[0]['results'][0]['quaternion']) == 4
+    assert data[1]['type'] == 'NLPError'
+    assert data[2]['results'][0].count("ATOM") == 4
+    assert data[3]['type'] == 'ValidationError'
+    assert data[4]['error'] == 'No prompt provided'
+
+def test_commands_batch_requires_items(client):
+    """Test that /api/commands/batch rejects an empty batch."""
+    response = client.post('/api/commands/batch', json={'items': []})
+    assert response.status_code == 400
+    assert json.loads(response.data)['error'] == 'No batch items provided'
+
+@patch('app.generate_commands')
+def test_commands_session_state(mock_generate_commands, client):
+    """Test that a session keeps the camera view across requests and responses carry only deltas."""
+    mock_generate_commands.return_value = [{"command": "rotateCamera", "params": {"axis": "y", "angle": 90}}]
+    headers = {"X-Session-ID": "test-session-state"}
+    client.delete('/api/sessions/test-session-state')
+
+    first = client.post('/api/commands', json={'prompt': 'turn it sideways'}, headers=headers)
+    second = client.post('/api/commands', json={'prompt': 'turn it sideways'}, headers=headers)
+    assert first.status_code == 200
+    assert first.headers['X-Session-ID'] == 'test-session-state'
+    assert list(json.loads(first.data)[0]) == ['quaternion']
+    assert json.loads(first.data)[0] != json.loads(second.data)[0]
+
+    session = json.loads(client.get('/api/sessions/test-session-state').data)
+    assert session['view']['quaternion'] == json.loads(second.data)[0]['quaternion']
+    assert client.delete('/api/sessions/test-session-state').status_code == 204
+    assert client.get('/api/sessions/test-session-state').status_code == 404
+
+@patch('executor.structure.MAX_ATOMS', 100)
+@patch('app.generate_commands')
+def test_commands_reject_structures_over_max_atoms(mock_generate_commands, client):
+    """Test that a structure over MAX_ATOMS atoms is a 400, rejected before tiling."""
+    mock_generate_commands.return_value = [
+        {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc", "nx": 4, "ny": 4, "nz": 4}}
+    ]
+    with patch('executor.structure.tile_structure') as mock_tile_structure:
+        response = client.post('/api/commands', json={'prompt': 'a large block'})
+    assert response.status_code == 400
+    assert 'Structure too large: 256 atoms (maximum 100)' in json.loads(response.data)['error']
+    mock_tile_structure.assert_not_called()
+
+@patch('app.generate_commands')
+def test_commands_runs_frontend_only_tool_calls(mock_generate_commands, client):
+    """Test that a multi-call LLM response with frontend-only commands succeeds end to end."""
+    mock_generate_commands.return_value = [
+        {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc"}},
+        {"command": "resetView", "params": {}},
+        {"command": "zoom", "params": {"factor": 1.5}},
+    ]
+    response = client.post('/api/commands', json={'prompt': 'build Al, reset the view and zoom in'})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data[0].count("ATOM") == 4
+    assert data[1:] == [{}, {"factor": 1.5}]
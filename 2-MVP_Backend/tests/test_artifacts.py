@@ -0,0 +1,147 @@
+import os
+import pytest
+from unittest.mock import patch
+from starlette.testclient import TestClient
+
+import app as flask_app
+import asgi
+from executor import artifacts
+from executor.artifacts import artifact_id, artifact_store
+from executor.structure import build_structure
+from models.commands import BuildStructureParams
+
+PARAMS = {"element": "Cu", "lattice": "fcc", "nx": 4, "ny": 4, "nz": 4}
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "directory", str(tmp_path))
+    monkeypatch.setattr(artifact_store, "_total_bytes", None)
+    return tmp_path
+
+def test_put_writes_file_once(store_dir):
+    """Test that put streams the same bytes as build_structure and reuses the file."""
+    params = BuildStructureParams(**PARAMS, mode="artifact")
+    result = artifact_store.put(params)
+
+    assert result["structureId"] == artifact_id(BuildStructureParams(**PARAMS, format="xyz"))
+    assert result["natoms"] == 256
+    assert result["url"] == f"/api/structures/{result['structureId']}?format=pdb"
+    path = artifact_store.path(result["structureId"], "pdb")
+    with open(path, "rb") as f:
+        assert f.read().decode() == build_structure(BuildStructureParams(**PARAMS))
+    assert result["bytes"] == os.path.getsize(path)
+
+    writes = artifact_store.writes
+    assert artifact_store.put(params) == result
+    assert artifact_store.writes == writes
+
+def test_open_builds_other_formats_and_rejects_unknown(store_dir):
+    result = artifact_store.put(BuildStructureParams(**PARAMS, mode="artifact"))
+    path, fmt = artifact_store.open(result["structureId"], "XYZ")
+    assert fmt == "xyz"
+    with open(path) as f:
+        assert f.read() == build_structure(BuildStructureParams(**PARAMS, format="xyz"))
+    assert artifact_store.open(result["structureId"])[1] == "pdb"
+    assert artifact_store.open("0" * 64) is None
+    assert artifact_store.open("../../etc/passwd") is None
+
+def test_prune_keeps_metadata(store_dir, monkeypatch):
+    """Test that pruning deletes the least recently served file and the ID still resolves."""
+    monkeypatch.setattr(artifact_store, "max_bytes", 1)
+    first = artifact_store.put(BuildStructureParams(**PARAMS, mode="artifact"))
+    second = artifact_store.put(BuildStructureParams(**{**PARAMS, "element": "Ni"}, mode="artifact"))
+
+    assert not os.path.exists(artifact_store.path(first["structureId"], "pdb"))
+    assert os.path.exists(artifact_store.path(second["structureId"], "pdb"))
+    path, _ = artifact_store.open(first["structureId"])
+    assert os.path.getsize(path) == first["bytes"]
+
+def test_prune_walks_only_past_max_bytes(store_dir, monkeypatch):
+    """Test that the directory is walked on the first write and then only when the tracked size overflows."""
+    first = artifact_store.put(BuildStructureParams(**PARAMS, mode="artifact"))
+    monkeypatch.setattr(artifact_store, "max_bytes", 2 * first["bytes"] + 1)
+    with patch("executor.artifacts.os.walk", wraps=os.walk) as walk:
+        second = artifact_store.put(BuildStructureParams(**{**PARAMS, "element": "Ni"}, mode="artifact"))
+        walk.assert_not_called()
+        assert artifact_store.stats()["bytes"] == first["bytes"] + second["bytes"]
+        artifact_store.put(BuildStructureParams(**{**PARAMS, "element": "Ag"}, mode="artifact"))
+        walk.assert_called_once()
+    assert not os.path.exists(artifact_store.path(first["structureId"], "pdb"))
+    assert artifact_store.stats()["bytes"] <= artifact_store.max_bytes
+
+def _pruned_once(open_artifact):
+    # Deletes the file the first open returns, as a prune in another worker would.
+    calls = []
+    def wrapper(*args):
+        found = open_artifact(*args)
+        if not calls and found is not None:
+            os.unlink(found[0])
+        calls.append(args)
+        return found
+    return wrapper
+
+def test_large_full_builds_switch_to_artifacts(monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_MIN_ATOMS", 100)
+    assert artifacts.should_store_artifact(BuildStructureParams(**PARAMS))
+    assert not artifacts.should_store_artifact(BuildStructureParams(**PARAMS, mode="descriptor"))
+    assert not artifacts.should_store_artifact(BuildStructureParams(**{**PARAMS, "nx": 1, "ny": 1, "nz": 1}))
+
+@patch('app.generate_commands')
+def test_flask_artifact_fetch_and_ranges(mock_generate_commands):
+    """Test the artifact response of /api/commands and the ranged, conditional GET."""
+    mock_generate_commands.return_value = [{"command": "buildStructure", "params": {**PARAMS, "mode": "artifact"}}]
+    client = flask_app.app.test_client()
+    result = client.post('/api/commands', json={'prompt': 'a custom block'}).get_json()[0]
+
+    full = client.get(result["url"], headers={'Accept-Encoding': 'gzip'})
+    assert full.status_code == 200
+    assert full.headers['Content-Type'] == 'chemical/x-pdb'
+    assert 'Content-Encoding' not in full.headers
+    assert full.headers['Accept-Ranges'] == 'bytes'
+    assert 'immutable' in full.headers['Cache-Control']
+    assert len(full.data) == result["bytes"]
+
+    part = client.get(result["url"], headers={'Range': 'bytes=0-99'})
+    assert part.status_code == 206
+    assert part.data == full.data[:100]
+    assert part.headers['Content-Range'] == f'bytes 0-99/{result["bytes"]}'
+
+    not_modified = client.get(result["url"], headers={'If-None-Match': full.headers['ETag']})
+    assert not_modified.status_code == 304
+
+    xyz = client.get(f'/api/structures/{result["structureId"]}?format=xyz')
+    assert xyz.data.decode().splitlines()[0] == "256"
+    assert client.get(f'/api/structures/{result["structureId"]}?format=mol2').status_code == 400
+    assert client.get(f'/api/structures/{"a" * 64}').status_code == 404
+
+@patch('asgi.agenerate_commands')
+def test_asgi_artifact_fetch_and_ranges(mock_agenerate_commands):
+    mock_agenerate_commands.return_value = [{"command": "buildStructure", "params": {**PARAMS, "mode": "artifact"}}]
+    with TestClient(asgi.app) as client:
+        result = client.post('/api/commands', json={'prompt': 'a custom block'}).json()[0]
+        full = client.get(result["url"], headers={'Accept-Encoding': 'gzip'})
+        part = client.get(result["url"], headers={'Range': 'bytes=100-199'})
+        not_modified = client.get(result["url"], headers={'If-None-Match': full.headers['ETag']})
+        missing = client.get(f'/api/structures/{"a" * 64}')
+
+    assert full.status_code == 200
+    assert 'content-encoding' not in full.headers
+    assert full.content.decode().count("ATOM") == 256
+    assert part.status_code == 206
+    assert part.content == full.content[100:200]
+    assert not_modified.status_code == 304
+    assert missing.status_code == 404
+
+def test_flask_fetch_rebuilds_a_pruned_artifact():
+    result = artifact_store.put(BuildStructureParams(**PARAMS, mode="artifact"))
+    with patch('app.open_artifact', _pruned_once(artifacts.open_artifact)):
+        response = flask_app.app.test_client().get(result["url"])
+    assert response.status_code == 200
+    assert len(response.data) == result["bytes"]
+
+def test_asgi_fetch_rebuilds_a_pruned_artifact():
+    result = artifact_store.put(BuildStructureParams(**PARAMS, mode="artifact"))
+    with patch('asgi.open_artifact', _pruned_once(artifacts.open_artifact)), TestClient(asgi.app) as client:
+        response = client.get(result["url"])
+    assert response.status_code == 200
+    assert len(response.content) == result["bytes"]
@@ -0,0 +1,63 @@
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+from starlette.testclient import TestClient
+from asgi import app
+
+@pytest.fixture
+def client():
+    with TestClient(app, raise_server_exceptions=False) as client:
+        yield client
+
+@patch('asgi.agenerate_commands')
+def test_async_commands_valid_prompt(mock_agenerate_commands, client):
+    """Test the async /api/commands endpoint with a valid prompt."""
+    mock_agenerate_commands.return_value = [
+        {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc", "nx": 1, "ny": 1, "nz": 1, "format": "pdb"}}
+    ]
+    response = client.post('/api/commands', json={'prompt': 'create a simple cube'})
+    assert response.status_code == 200
+    data = response.json()
+    assert isinstance(data, list)
+    assert data[0].count("ATOM") == 4
+    mock_agenerate_commands.assert_awaited_once_with('create a simple cube')
+
+def test_async_commands_invalid_prompt(client):
+    """Test the async /api/commands endpoint with a missing prompt."""
+    response = client.post('/api/commands', json={})
+    assert response.status_code == 400
+    assert response.json()['error'] == 'No prompt provided'
+
+@patch('asgi.agenerate_commands')
+def test_async_commands_llm_error(mock_agenerate_commands, client):
+    """Test the async /api/commands endpoint when the LLM returns an error."""
+    mock_agenerate_commands.side_effect = Exception("Simulated LLM error")
+    response = client.post('/api/commands', json={'prompt': 'simulate llm error'})
+    assert response.status_code == 400
+    assert 'Error generating commands from NLP: Simulated LLM error' in response.json()['error']
+
+@patch('asgi.agenerate_commands')
+def test_async_commands_batch(mock_agenerate_commands, client):
+    """Test the async /api/commands/batch endpoint with mixed items."""
+    mock_agenerate_commands.return_value = [{"command": "rotateCamera", "params": {"axis": "y", "angle": 90}}]
+    response = client.post('/api/commands/batch', json={'items': [
+        {'prompt': 'turn it sideways'},
+        {'commands': [{"command": "buildStructure", "params": {"element": "Fe", "lattice": "bcc"}}]},
+        {'commands': "not a list"},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data[0]['results'][0]['quaternion']) == 4
+    assert data[1]['results'][0].count("ATOM") == 2
+    assert data[2]['type'] == 'ValidationError'
+
+def test_async_commands_on_process_pool():
+    """Test that validated commands and their results cross a process pool (EXECUTOR_POOL=process)."""
+    prompt = {'prompt': 'build Al and rotate 90 degrees around y'}
+    with ProcessPoolExecutor(max_workers=1) as pool, patch('asgi._pool', pool):
+        with TestClient(app) as client:
+            response = client.post('/api/commands', json=prompt)
+            stream = client.post('/api/commands/stream', json=prompt)
+    assert response.status_code == 200
+    assert response.json()[0].count("ATOM") == 4
+    assert stream.text.count("event: result") == 2
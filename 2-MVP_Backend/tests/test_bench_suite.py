@@ -0,0 +1,33 @@
+from benchmarks.suite import compare, measure, run_suite
+
+def report(**medians):
+    return {"metadata": {}, "results": [{"name": name, "median_s": value} for name, value in medians.items()]}
+
+def test_measure_loops_fast_functions():
+    """
+    Test that fast functions are looped and every sample is counted.
+    """
+    stats = measure(lambda: None, repeats=3)
+    assert stats["loops"] > 1
+    assert stats["repeats"] == 3
+    assert stats["min_s"] <= stats["median_s"]
+
+def test_compare_reports_changes_beyond_threshold():
+    """
+    Test that only cases changed by more than the threshold are listed, regressions first.
+    """
+    baseline = report(a=1.0, b=1.0, c=1.0, removed=1.0)
+    current = report(a=1.05, b=1.5, c=0.5, added=1.0)
+    changes = compare(current, baseline, threshold=0.10)
+    assert [change["name"] for change in changes] == ["b", "c"]
+    assert changes[0]["ratio"] == 1.5
+
+def test_run_suite_writes_named_results():
+    """
+    Test that a quick run of one group returns uniquely named cases with timings.
+    """
+    result = run_suite(["validate"], quick=True)
+    names = [case["name"] for case in result["results"]]
+    assert names == ["validate_commands/10", "validate_commands/1000"]
+    assert all(case["median_s"] > 0 for case in result["results"])
+    assert "python" in result["metadata"]
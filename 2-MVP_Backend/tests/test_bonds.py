@@ -0,0 +1,89 @@
+import base64
+import numpy as np
+import pytest
+from unittest.mock import patch
+from ase.build import bulk
+from ase.data import covalent_radii
+from ase.neighborlist import neighbor_list
+from starlette.testclient import TestClient
+
+import app as flask_app
+import asgi
+from executor.bonds import compute_bonds, find_bonds
+from executor.cache import structure_cache
+from models.commands import ComputeBondsParams
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    structure_cache.clear()
+    yield
+    structure_cache.clear()
+
+def _reference(atoms, tolerance):
+    # ASE's neighbor list, reduced to one entry per bond in find_bonds' orientation.
+    i, j, images = neighbor_list("ijS", atoms, covalent_radii[atoms.numbers] + tolerance / 2, self_interaction=False)
+    keep = (i < j) | ((i == j) & (np.sign(images) @ [9, 3, 1] > 0))
+    return sorted(zip(i[keep].tolist(), j[keep].tolist(), map(tuple, images[keep].tolist())))
+
+@pytest.mark.parametrize("atoms", [
+    bulk("Cu", "fcc", cubic=True) * (3, 3, 3),
+    bulk("NaCl", "rocksalt", a=5.64, cubic=True) * (2, 2, 2),
+    bulk("Si", "diamond", cubic=True) * (2, 2, 2),
+    bulk("Mg", "hcp") * (3, 3, 2),
+    bulk("Cu", "fcc") * (4, 4, 4),
+    bulk("Fe", "bcc"),
+], ids=["fcc", "rocksalt", "diamond", "hcp", "primitive-fcc", "one-atom"])
+def test_find_bonds_matches_ase(atoms):
+    """Test against ASE, including triclinic cells, atoms outside the cell and atoms bonded to their own images."""
+    atoms.positions += np.random.default_rng(0).normal(scale=0.05, size=atoms.positions.shape)
+    atoms.positions[0] += atoms.cell[0]
+    pairs, images = find_bonds(atoms.numbers, atoms.positions, atoms.cell.array, 0.45)
+    assert pairs.dtype == np.uint32 and images.dtype == np.int8
+    assert sorted(zip(pairs[:, 0].tolist(), pairs[:, 1].tolist(), map(tuple, images.tolist()))) == _reference(atoms, 0.45)
+
+def test_find_bonds_rejects_flat_cell():
+    with pytest.raises(ValueError):
+        find_bonds(np.array([29]), np.zeros((1, 3)), np.diag([3.6, 3.6, 0.0]))
+
+def test_compute_bonds_binary_matches_json():
+    params = {"element": "Cu", "lattice": "fcc", "nx": 3, "ny": 3, "nz": 3}
+    binary = compute_bonds(ComputeBondsParams(**params))
+    plain = compute_bonds(ComputeBondsParams(**params, format="json"))
+
+    assert binary["natoms"] == 108
+    assert binary["nbonds"] + binary["nperiodic"] == 648
+    assert np.frombuffer(base64.b64decode(binary["bonds"]), dtype="<u4").tolist() == plain["bonds"]
+    assert np.frombuffer(base64.b64decode(binary["periodicImages"]), dtype="i1").tolist() == plain["periodicImages"]
+    assert len(plain["periodicBonds"]) == 2 * plain["nperiodic"]
+    assert len(plain["periodicImages"]) == 3 * plain["nperiodic"]
+
+def test_compute_bonds_single_cell_and_cache():
+    """Test that most bonds of a single fcc cell cross a face, and that periodic=False drops them."""
+    single = compute_bonds(ComputeBondsParams(element="Cu", lattice="fcc", format="json"))
+    assert single["nbonds"] == 6
+    assert single["nperiodic"] == 18
+
+    open_cell = ComputeBondsParams(element="Cu", lattice="fcc", format="json", periodic=False)
+    assert compute_bonds(open_cell)["nperiodic"] == 0
+    with patch("executor.bonds.find_bonds") as mock_find_bonds:
+        assert compute_bonds(open_cell)["periodicBonds"] == []
+    mock_find_bonds.assert_not_called()
+
+COMMAND = {"command": "computeBonds", "params": {"element": "Fe", "lattice": "bcc", "nx": 2, "ny": 2, "nz": 2, "format": "json"}}
+
+@patch('app.generate_commands')
+def test_flask_compute_bonds_command(mock_generate_commands):
+    mock_generate_commands.return_value = [COMMAND]
+    response = flask_app.app.test_client().post('/api/commands', json={'prompt': 'show the bonds'})
+    assert response.status_code == 200
+    result = response.get_json()[0]
+    assert result["natoms"] == 16
+    assert result["nbonds"] + result["nperiodic"] == 112
+
+@patch('asgi.agenerate_commands')
+def test_asgi_compute_bonds_command(mock_agenerate_commands):
+    mock_agenerate_commands.return_value = [COMMAND]
+    with TestClient(asgi.app) as client:
+        response = client.post('/api/commands', json={'prompt': 'show the bonds'})
+    assert response.status_code == 200
+    assert response.json()[0]["nbonds"] + response.json()[0]["nperiodic"] == 112
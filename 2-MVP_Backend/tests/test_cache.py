@@ -0,0 +1,69 @@
+import pytest
+from executor.cache import StructureCache, structure_cache, structure_cache_key
+from executor.structure import build_structure
+from models.commands import BuildStructureParams
+
+@pytest.fixture(autouse=True)
+def clear_structure_cache():
+    structure_cache.clear()
+    yield
+    structure_cache.clear()
+
+def test_cache_key_normalizes_params():
+    """
+    Test that equivalent parameters hash to the same key and different ones do not.
+    """
+    a = BuildStructureParams(element="Al", lattice="FCC", nx=2, ny=2, nz=2, a=4)
+    b = BuildStructureParams(element="Al", lattice="fcc", nx=2, ny=2, nz=2, a=4.0)
+    c = BuildStructureParams(element="Al", lattice="fcc", nx=2, ny=2, nz=3, a=4.0)
+    assert structure_cache_key(a) == structure_cache_key(b)
+    assert structure_cache_key(a) != structure_cache_key(c)
+
+def test_lru_evicts_by_byte_size():
+    """
+    Test that the in-process tier evicts least recently used entries once over budget.
+    """
+    cache = StructureCache(max_bytes=10, cache_dir=None)
+    cache.put("a", "xxxx")
+    cache.put("b", "yyyy")
+    assert cache.get("a") == "xxxx"  # "a" is now most recently used
+    cache.put("c", "zzzz")
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx"
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 8
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 1
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    """
+    Test that entries written by one cache are served from disk by another.
+    """
+    StructureCache(max_bytes=1024, cache_dir=str(tmp_path)).put("abcd", "content")
+    other = StructureCache(max_bytes=1024, cache_dir=str(tmp_path))
+    assert other.get("abcd") == "content"
+    assert other.get("abcd") == "content"
+    assert other.stats()["disk_hits"] == 1
+    assert other.stats()["memory_hits"] == 1
+
+def test_disk_tier_stores_bytes(tmp_path):
+    """
+    Test that derived bytes entries (e.g. precompressed bodies) round-trip through disk.
+    """
+    StructureCache(max_bytes=1024, cache_dir=str(tmp_path)).put("abcd.gzip", b"\x1f\x8b\x00\xff")
+    other = StructureCache(max_bytes=1024, cache_dir=str(tmp_path))
+    assert other.get("abcd.gzip", binary=True) == b"\x1f\x8b\x00\xff"
+    assert other.stats()["bytes"] == 4
+
+def test_build_structure_served_from_cache():
+    """
+    Test that a repeated build is a cache hit and returns identical content.
+    """
+    params = BuildStructureParams(element="Cu", lattice="fcc", nx=2, ny=1, nz=1)
+    first = build_structure(params)
+    second = build_structure(params)
+    assert first == second
+    stats = structure_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["memory_hits"] == 1
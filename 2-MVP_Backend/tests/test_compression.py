@@ -0,0 +1,125 @@
+import gzip
+import pytest
+from unittest.mock import patch
+from starlette.testclient import TestClient
+
+import app as flask_app
+import asgi
+from executor.cache import download_cache, structure_cache, structure_cache_key
+from models.commands import BuildStructureParams
+from utils import compression
+from utils.compression import add_vary, compress, content_etag, etag_matches, negotiate_encoding, representation_etag
+
+QUERY = "element=Cu&lattice=fcc&nx=4&ny=4&nz=4"
+BUILD = {"command": "buildStructure", "params": {"element": "Cu", "lattice": "fcc", "nx": 4, "ny": 4, "nz": 4}}
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    structure_cache.clear()
+    download_cache.clear()
+    yield
+    structure_cache.clear()
+    download_cache.clear()
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("gzip", "gzip"),
+    ("deflate, br", None),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("*, gzip;q=0", None),
+    ("identity;q=1, gzip;q=0.5", "gzip"),
+])
+def test_negotiate_encoding_without_zstd(header, expected, monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+    assert negotiate_encoding(header) == expected
+
+def test_negotiate_encoding_prefers_zstd_on_ties(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", object())
+    assert negotiate_encoding("gzip, zstd") == "zstd"
+    assert negotiate_encoding("gzip;q=1, zstd;q=0.5") == "gzip"
+
+def test_zstd_round_trip():
+    zstandard = pytest.importorskip("zstandard")
+    data = b"ATOM      1 Cu   MOL     1       0.000   0.000   0.000\n" * 1000
+    assert zstandard.ZstdDecompressor().decompress(compress(data, "zstd")) == data
+
+def test_gzip_is_deterministic():
+    data = b"HETATM" * 1000
+    assert compress(data, "gzip") == compress(data, "gzip")
+    assert gzip.decompress(compress(data, "gzip")) == data
+
+def test_etag_matching():
+    """Test weak comparison across lists, W/ prefixes and compressed representations."""
+    etag = content_etag(b"structure")
+    gzip_etag = representation_etag(etag, "gzip")
+    assert gzip_etag == etag[:-1] + '-gzip"'
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{gzip_etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+def test_add_vary():
+    assert add_vary(None) == "Accept-Encoding"
+    assert add_vary("Origin") == "Origin, Accept-Encoding"
+    assert add_vary("origin, accept-encoding") == "origin, accept-encoding"
+
+def test_flask_download_is_precompressed_and_conditional():
+    """Test gzip negotiation, the cached compressed body and a 304 on a matching ETag."""
+    client = flask_app.app.test_client()
+    plain = client.get(f'/api/structures/download?{QUERY}')
+    assert plain.status_code == 200
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.data.decode().count("ATOM") == 256
+
+    response = client.get(f'/api/structures/download?{QUERY}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(response.data) == plain.data
+    assert len(response.data) < len(plain.data) / 4
+    assert response.headers['ETag'] == representation_etag(plain.headers['ETag'], 'gzip')
+    key = structure_cache_key(BuildStructureParams(element="Cu", lattice="fcc", nx=4, ny=4, nz=4))
+    assert download_cache.get(f"{key}.gzip", binary=True) == response.data
+    assert download_cache.get(f"{key}.etag") == plain.headers['ETag']
+    assert structure_cache.stats()["entries"] == 1
+
+    not_modified = client.get(
+        f'/api/structures/download?{QUERY}',
+        headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']},
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.data == b""
+    assert not_modified.headers['ETag'] == response.headers['ETag']
+
+@patch('app.generate_commands')
+def test_flask_commands_response_is_compressed(mock_generate_commands):
+    mock_generate_commands.return_value = [BUILD]
+    client = flask_app.app.test_client()
+    response = client.post('/api/commands', json={'prompt': 'a custom block'}, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert b"ATOM" in gzip.decompress(response.data)
+
+@patch('asgi.agenerate_commands')
+def test_asgi_compression_and_conditional_download(mock_agenerate_commands):
+    """Test the ASGI middleware and download endpoint; httpx decompresses transparently."""
+    mock_agenerate_commands.return_value = [BUILD]
+    with TestClient(asgi.app) as client:
+        commands = client.post('/api/commands', json={'prompt': 'a custom block'}, headers={'Accept-Encoding': 'gzip'})
+        small = client.get('/api/sessions/missing', headers={'Accept-Encoding': 'gzip'})
+        download = client.post('/api/structures/download', json=BUILD["params"], headers={'Accept-Encoding': 'gzip'})
+        not_modified = client.get(
+            f'/api/structures/download?{QUERY}',
+            headers={'Accept-Encoding': 'gzip', 'If-None-Match': download.headers['ETag']},
+        )
+
+    assert commands.headers['Content-Encoding'] == 'gzip'
+    assert commands.json()[0].count("ATOM") == 256
+    assert 'Content-Encoding' not in small.headers
+    assert download.headers['Content-Encoding'] == 'gzip'
+    assert download.text.count("ATOM") == 256
+    assert not_modified.status_code == 304
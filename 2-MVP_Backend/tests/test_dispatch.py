@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import patch
+from executor.dispatch import EXECUTORS, execute_commands, plan_chains
+from models.commands import PARAMS_BY_COMMAND, validate_commands
+from utils.error_handlers import ExecutionError
+
+BUILD_AL = {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc"}}
+BUILD_FE = {"command": "buildStructure", "params": {"element": "Fe", "lattice": "bcc"}}
+ROTATE_Y = {"command": "rotateCamera", "params": {"axis": "y", "angle": 90}}
+SET_VIEW_X90 = {"command": "setView", "params": {"viewObject": {
+    "quaternion": {"x": 0.70710678, "y": 0, "z": 0, "w": 0.70710678},
+    "translation": {"x": 0, "y": 0, "z": 0},
+    "zoom": 2,
+}}}
+
+def test_plan_chains_groups_camera_commands():
+    """
+    Test that camera commands form one ordered chain while builds are independent.
+    """
+    commands = validate_commands([BUILD_AL, SET_VIEW_X90, BUILD_FE, ROTATE_Y])
+    assert plan_chains(commands) == [[0], [1, 3], [2]]
+
+def test_execute_commands_preserves_order_and_threads_camera_state():
+    """
+    Test that results come back in request order and rotations apply to the preceding view.
+    """
+    commands = validate_commands([SET_VIEW_X90, BUILD_AL, ROTATE_Y, BUILD_FE])
+    results = execute_commands(commands)
+
+    assert results[0]["zoom"] == 2
+    assert results[1].count("ATOM") == 4
+    assert results[3].count("ATOM") == 2
+    # 90 degrees about world y applied after 90 degrees about x.
+    expected = [0.5, 0.5, -0.5, 0.5]
+    assert all(abs(q - e) < 1e-6 for q, e in zip(results[2]["quaternion"], expected))
+    assert results[2]["zoom"] == 2
+
+def test_execute_commands_raises_earliest_error():
+    """
+    Test that the error of the earliest failing command is raised.
+    """
+    commands = validate_commands([
+        BUILD_AL,
+        {"command": "buildStructure", "params": {"element": "Xx", "lattice": "fcc"}},
+        {"command": "displayMessage", "params": {"message": "hi", "type": "info"}},
+    ])
+    with pytest.raises(ExecutionError, match="Error executing command buildStructure"):
+        execute_commands(commands)
+
+def test_every_command_has_an_executor():
+    """
+    Test that every command the LLM can emit is registered, so none fails with "Unknown command type".
+    """
+    assert set(EXECUTORS) == set(PARAMS_BY_COMMAND)
+
+def test_frontend_commands_pass_their_params_through():
+    """
+    Test that frontend-only commands return their validated params in request order.
+    """
+    commands = validate_commands([
+        {"command": "zoom", "params": {"factor": 2}},
+        ROTATE_Y,
+        {"command": "resetView", "params": {}},
+        {"command": "displayMessage", "params": {"message": "hi", "type": "info"}},
+    ])
+    results = execute_commands(commands)
+    assert results[0] == {"factor": 2.0}
+    assert results[2] == {}
+    assert results[3] == {"message": "hi", "type": "info"}
+
+def test_execute_commands_unknown_command():
+    """
+    Test that commands without a registered executor raise ExecutionError.
+    """
+    commands = validate_commands([{"command": "displayMessage", "params": {"message": "hi", "type": "info"}}])
+    with patch.dict(EXECUTORS):
+        del EXECUTORS["displayMessage"]
+        with pytest.raises(ExecutionError, match="Unknown command type: displayMessage"):
+            execute_commands(commands)
@@ -0,0 +1,80 @@
+import pytest
+from nlp.fast_path import parse_prompt, fast_path_stats, reset_fast_path_stats
+from models.commands import validate_commands
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    reset_fast_path_stats()
+    yield
+    reset_fast_path_stats()
+
+@pytest.mark.parametrize("prompt,params", [
+    ("3x3x3 FCC Al", {"element": "Al", "lattice": "fcc", "nx": 3, "ny": 3, "nz": 3}),
+    ("build a 2x2x2 bcc iron supercell", {"element": "Fe", "lattice": "bcc", "nx": 2, "ny": 2, "nz": 2}),
+    ("Build 4 by 4 by 4 Cu with a=3.61", {"element": "Cu", "lattice": "fcc", "nx": 4, "ny": 4, "nz": 4, "a": 3.61}),
+    ("show me silicon", {"element": "Si", "lattice": "diamond"}),
+    ("build sc Po", {"element": "Po", "lattice": "sc"}),
+    ("2x2x2 SC Po", {"element": "Po", "lattice": "sc", "nx": 2, "ny": 2, "nz": 2}),
+])
+def test_parse_prompt_build(prompt, params):
+    """
+    Test that common build prompts become a single buildStructure command.
+    """
+    assert parse_prompt(prompt) == [{"command": "buildStructure", "params": params}]
+
+@pytest.mark.parametrize("prompt,axis,angle", [
+    ("rotate 90 degrees around x", "x", 90.0),
+    ("Rotate the view around the y-axis by 45 degrees", "y", 45.0),
+    ("rotate by -30 deg about z", "z", -30.0),
+])
+def test_parse_prompt_rotate(prompt, axis, angle):
+    """
+    Test that rotation prompts become a rotateCamera command.
+    """
+    assert parse_prompt(prompt) == [{"command": "rotateCamera", "params": {"axis": axis, "angle": angle}}]
+
+def test_parse_prompt_compound_prompt_validates():
+    """
+    Test that chained clauses produce an ordered command list that passes validation.
+    """
+    commands = parse_prompt("build 3x3x3 Cu and look down 111")
+    assert [c["command"] for c in commands] == ["buildStructure", "setView"]
+    validated = validate_commands(commands)
+    assert validated[1].params.viewObject.zoom == 1.0
+
+@pytest.mark.parametrize("prompt", ["view [1,1,1]", "look down [1, 1, 0]", "build Cu and view (1,0,0)"])
+def test_parse_prompt_bracketed_miller_indices(prompt):
+    """
+    Test that commas inside brackets do not split the clause.
+    """
+    commands = parse_prompt(prompt)
+    assert commands is not None
+    assert commands[-1]["command"] == "setView"
+
+@pytest.mark.parametrize("prompt", [
+    "create a simple cube",
+    "build graphene",
+    "Build 2x2x2 NaCl",
+    "rotate x",
+    "3x3x3 hcp Mg",
+    "view the 123 face",
+    "build 3x3x3 Cu and make it shiny",
+    "build Sc",
+    "show me Sc",
+    "build 0x0x0 Al",
+    "build 100000x100000x100000 Al",
+])
+def test_parse_prompt_falls_back(prompt):
+    """
+    Test that prompts outside the grammar are left to the LLM.
+    """
+    assert parse_prompt(prompt) is None
+
+def test_fast_path_stats_reports_fraction():
+    """
+    Test that the fast-path counters track the fraction of prompts served locally.
+    """
+    parse_prompt("3x3x3 FCC Al")
+    parse_prompt("create a simple cube")
+    stats = fast_path_stats()
+    assert stats == {"requests": 2, "hits": 1, "fraction": 0.5}
@@ -0,0 +1,52 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from nlp import llm_client
+from nlp.prompt_cache import PromptCache
+from models.commands import PARAMS_BY_COMMAND, validate_commands
+from utils.error_handlers import NLPError
+
+def make_response(*calls):
+    tool_calls = [SimpleNamespace(function=SimpleNamespace(name=name, arguments=arguments)) for name, arguments in calls]
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(tool_calls=tool_calls))])
+
+def test_openai_functions_cover_every_command():
+    """
+    Test that every Command has a function definition whose parameters match its params model.
+    """
+    functions = {f["name"]: f for f in llm_client.OPENAI_FUNCTIONS}
+    assert set(functions) == set(PARAMS_BY_COMMAND)
+    for name, params_model in PARAMS_BY_COMMAND.items():
+        parameters = functions[name]["parameters"]
+        assert set(parameters["properties"]) == set(params_model.model_fields), name
+        required = {field for field, info in params_model.model_fields.items() if info.is_required()}
+        assert set(parameters.get("required", [])) == required, name
+
+def test_generate_commands_returns_every_tool_call_in_order():
+    """
+    Test that parallel tool calls from one response become an ordered command list.
+    """
+    response = make_response(
+        ("buildStructure", '{"element": "Cu", "lattice": "fcc", "nx": 3, "ny": 3, "nz": 3}'),
+        ("setView", '{"viewObject": {"quaternion": {"x": 0, "y": 0, "z": 0, "w": 1}, '
+                    '"translation": {"x": 0, "y": 0, "z": 0}, "zoom": 1}}'),
+        ("resetView", ""),
+    )
+    with patch.object(llm_client, "prompt_cache", PromptCache(path=None)), \
+            patch.object(llm_client.get_client().chat.completions, "create", return_value=response) as mock_create:
+        commands = llm_client.generate_commands("build 3x3x3 Cu, look down 111 and reset")
+
+    mock_create.assert_called_once()
+    assert [c["command"] for c in commands] == ["buildStructure", "setView", "resetView"]
+    assert commands[2]["params"] == {}
+    assert len(validate_commands(commands)) == 3
+
+def test_generate_commands_malformed_arguments():
+    """
+    Test that malformed arguments in any tool call raise NLPError.
+    """
+    response = make_response(("zoom", '{"factor": 2}'), ("rotateCamera", '{"axis": '))
+    with patch.object(llm_client, "prompt_cache", PromptCache(path=None)), \
+            patch.object(llm_client.get_client().chat.completions, "create", return_value=response):
+        with pytest.raises(NLPError, match="Malformed tool call arguments"):
+            llm_client.generate_commands("zoom and rotate")
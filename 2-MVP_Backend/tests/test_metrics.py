@@ -0,0 +1,85 @@
+import re
+import pytest
+from unittest.mock import patch
+from starlette.testclient import TestClient
+
+import app as flask_app
+import asgi
+from utils.metrics import MetricsRegistry, errors_total, executor_seconds, stage_seconds
+
+BUILD = {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc", "nx": 1, "ny": 1, "nz": 1}}
+
+def sample(text, name, **labels):
+    """Returns the value of one sample in Prometheus text, or None."""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(f"{name}{{{label_text}}}" if labels else name) + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+def test_histogram_buckets_are_cumulative():
+    """Test that bucket counts are cumulative and end with +Inf, sum and count."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "nlp")
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert sample(text, "latency_seconds_bucket", stage="nlp", le="0.1") == 2
+    assert sample(text, "latency_seconds_bucket", stage="nlp", le="1") == 3
+    assert sample(text, "latency_seconds_bucket", stage="nlp", le="+Inf") == 4
+    assert sample(text, "latency_seconds_sum", stage="nlp") == pytest.approx(3.65)
+    assert sample(text, "latency_seconds_count", stage="nlp") == 4
+
+def test_registry_reuses_metrics_and_escapes_labels():
+    """Test that registering a name twice returns the same metric and that label values are escaped."""
+    registry = MetricsRegistry()
+    counter = registry.counter("errors_total", "Errors.", ("type",))
+    assert registry.counter("errors_total", "Errors.", ("type",)) is counter
+    counter.inc('bad "quote"')
+    counter.inc('bad "quote"', amount=2)
+    assert 'errors_total{type="bad \\"quote\\""} 3' in registry.render()
+
+def test_failing_callback_is_skipped():
+    """Test that a callback that raises does not fail the scrape."""
+    registry = MetricsRegistry()
+    registry.register_callback("broken", "Broken.", lambda: 1 / 0)
+    registry.register_callback("entries", "Entries.", lambda: {"memory": 2}, label="tier")
+    text = registry.render()
+    assert "broken" not in text
+    assert sample(text, "entries", tier="memory") == 2
+
+@patch('app.generate_commands')
+def test_flask_metrics_endpoint(mock_generate_commands):
+    """Test that a request is reflected in the stage, executor and request metrics served at /metrics."""
+    mock_generate_commands.return_value = [BUILD]
+    client = flask_app.app.test_client()
+    validate_before = stage_seconds.count("validate")
+    build_before = executor_seconds.count("buildStructure")
+    errors_before = errors_total.value("ValidationError")
+
+    assert client.post('/api/commands', json={'prompt': 'a custom cube'}).status_code == 200
+    assert client.post('/api/commands', json={}).status_code == 400
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert stage_seconds.count("validate") == validate_before + 1
+    assert executor_seconds.count("buildStructure") == build_before + 1
+    assert errors_total.value("ValidationError") == errors_before + 1
+    assert sample(text, "nlp_atomic_request_seconds_count", endpoint="/api/commands", method="POST", status="200") >= 1
+    assert sample(text, "nlp_atomic_response_bytes_count", endpoint="/api/commands") >= 2
+    assert 'nlp_atomic_structure_cache_lookups_total{outcome="misses"}' in text
+
+@patch('asgi.agenerate_commands')
+def test_asgi_metrics_endpoint(mock_agenerate_commands):
+    """Test that the ASGI middleware records requests by route path and status."""
+    mock_agenerate_commands.return_value = [BUILD]
+    with TestClient(asgi.app) as client:
+        assert client.post('/api/commands', json={'prompt': 'a custom cube'}).status_code == 200
+        assert client.get('/api/sessions/missing').status_code == 404
+        text = client.get('/metrics').text
+
+    assert sample(text, "nlp_atomic_request_seconds_count", endpoint="/api/commands", method="POST", status="200") >= 1
+    assert sample(text, "nlp_atomic_request_seconds_count", endpoint="/api/sessions/{session_id}", method="GET", status="404") >= 1
+    assert sample(text, "nlp_atomic_stage_seconds_count", stage="encode") >= 1
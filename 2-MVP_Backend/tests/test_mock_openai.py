@@ -0,0 +1,52 @@
+import pytest
+from unittest.mock import patch
+from openai import OpenAI
+from starlette.testclient import TestClient
+
+from benchmarks.load_test import parse_server_timing, summarize
+from benchmarks.mock_openai import create_app, make_latency_sampler
+from nlp import llm_client
+from nlp.prompt_cache import PromptCache
+
+@pytest.fixture
+def mock_client(tmp_path):
+    recordings = tmp_path / "recordings.jsonl"
+    recordings.write_text('{"prompt": "Show me Copper", "tool_calls": [{"name": "zoom", "arguments": {"factor": 2}}]}\n')
+    http_client = TestClient(create_app(recordings_path=str(recordings)))
+    client = OpenAI(api_key="mock", base_url="http://testserver/v1", http_client=http_client)
+    with patch.dict(llm_client._clients, {"OpenAI": client}), \
+            patch.object(llm_client, "prompt_cache", PromptCache(path=None)):
+        yield client
+
+def test_mock_server_replays_recordings_and_falls_back_to_fast_path(mock_client):
+    """
+    Test that the OpenAI SDK can talk to the mock server, which replays recordings
+    and otherwise answers with the fast-path commands.
+    """
+    assert llm_client.generate_commands("show me copper") == [{"command": "zoom", "params": {"factor": 2}}]
+    commands = llm_client.generate_commands("3x3x3 FCC Cu and rotate 90 degrees around y")
+    assert [c["command"] for c in commands] == ["buildStructure", "rotateCamera"]
+
+def test_mock_server_streams_tool_calls(mock_client):
+    """
+    Test that streamed replies from the mock server are reassembled by stream_commands.
+    """
+    commands = list(llm_client.stream_commands("bcc Fe then view the 110 face"))
+    assert [c["command"] for c in commands] == ["buildStructure", "setView"]
+    assert commands[0]["params"]["element"] == "Fe"
+
+def test_latency_samplers_and_report_helpers():
+    """
+    Test the latency distributions and the load-test summary helpers.
+    """
+    assert make_latency_sampler("fixed", 250, 0.5)() == 0.25
+    uniform = make_latency_sampler("uniform", 100, 0.5, seed=1)
+    assert all(0.05 <= uniform() <= 0.15 for _ in range(100))
+    with pytest.raises(ValueError):
+        make_latency_sampler("pareto", 100, 0.5)
+
+    assert parse_server_timing("nlp;dur=812.5, execute;dur=3.1") == {"nlp": 0.8125, "execute": 0.0031}
+    summary = summarize([i / 1000 for i in range(1, 101)])
+    assert summary["count"] == 100
+    assert abs(summary["p50"] - 50.5) < 1e-9
+    assert summary["p99"] > summary["p95"] > summary["p50"]
@@ -1,6 +1,7 @@
+import pickle
 import pytest
 from pydantic import ValidationError
-from models.commands import validate_commands
+from models.commands import Command, validate_commands
 
 def test_validate_commands_valid_json():
     """
@@ -68,4 +69,52 @@ def test_validate_commands_extra_field():
         }
     ]
     with pytest.raises(ValueError):
-        validate_commands(extra_field_command_list)
\ No newline at end of file
+        validate_commands(extra_field_command_list)
+
+def test_validate_commands_uses_command_as_discriminator():
+    """
+    Test that params are validated against the model named by the command,
+    not whichever union member happens to accept them.
+    """
+    commands = validate_commands([
+        {"command": "resetView", "params": {}},
+        {"command": "zoom", "params": {"factor": 2}},
+    ])
+    assert [type(c).__name__ for c in commands] == ["ResetViewCommand", "ZoomCommand"]
+    assert all(isinstance(c, Command) for c in commands)
+    assert commands[1].params.factor == 2.0
+
+    # rotateCamera params under a displayMessage command used to validate
+    # through the plain union.
+    with pytest.raises(ValueError, match="Validation error in command 0"):
+        validate_commands([{"command": "displayMessage", "params": {"axis": "x", "angle": 90}}])
+
+def test_validate_commands_reports_failing_index():
+    """
+    Test that batch validation reports the index of the first invalid command.
+    """
+    with pytest.raises(ValueError, match="Validation error in command 1: command"):
+        validate_commands([
+            {"command": "zoom", "params": {"factor": 1}},
+            {"command": "invalidCommand", "params": {}},
+        ])
+
+@pytest.mark.parametrize("command", ["buildStructure", "computeBonds"])
+def test_validate_commands_bounds_supercell(command):
+    """
+    Test that zero repeats and supercells of more than MAX_ATOMS cells fail validation.
+    """
+    with pytest.raises(ValueError, match="params.nx: Input should be greater than or equal to 1"):
+        validate_commands([{"command": command, "params": {"element": "Al", "lattice": "fcc", "nx": 0}}])
+    with pytest.raises(ValueError, match="exceeds the limit"):
+        validate_commands([{"command": command, "params": {"element": "Al", "lattice": "fcc", "nx": 100000, "ny": 100000, "nz": 100000}}])
+
+def test_validated_commands_pickle():
+    """
+    Test that validated commands survive pickling, as they do on a process pool.
+    """
+    commands = validate_commands([
+        {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc"}},
+        {"command": "zoom", "params": {"factor": 2}},
+    ])
+    assert pickle.loads(pickle.dumps(commands)) == commands
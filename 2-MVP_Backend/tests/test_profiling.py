@@ -0,0 +1,95 @@
+import os
+import tracemalloc
+import pytest
+from unittest.mock import patch
+from starlette.testclient import TestClient
+
+import app as flask_app
+import asgi
+from utils import profiling
+from utils.error_handlers import ValidationError
+
+BUILD = {"command": "buildStructure", "params": {"element": "Cu", "lattice": "fcc", "nx": 2, "ny": 2, "nz": 2}}
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+def test_requested_profile_is_off_without_profile_dir(monkeypatch):
+    """Test that the header is ignored, even if malformed, while profiling is disabled."""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", None)
+    assert profiling.requested_profile("cpu,memory", None) == frozenset()
+    assert profiling.requested_profile("bogus", None) == frozenset()
+
+def test_requested_profile_modes(profile_dir):
+    """Test header and query parsing, including the shorthand for both modes."""
+    assert profiling.requested_profile(None, None) == frozenset()
+    assert profiling.requested_profile("CPU", None) == {"cpu"}
+    assert profiling.requested_profile(None, "memory, cpu") == {"cpu", "memory"}
+    assert profiling.requested_profile("1", None) == {"cpu", "memory"}
+    with pytest.raises(ValidationError):
+        profiling.requested_profile("cpu,disk", None)
+
+def test_profile_request_writes_files(profile_dir):
+    """Test that a profiled block writes the cProfile dump and both summaries."""
+    with profiling.profile_request(frozenset({"cpu", "memory"}), "build a big block") as profile:
+        assert profiling.is_profiling()
+        data = [bytearray(1024) for _ in range(100)]
+    assert not profiling.is_profiling()
+    assert not tracemalloc.is_tracing()
+
+    names = sorted(os.listdir(profile_dir))
+    assert names == sorted([f"{profile.id}.prof", f"{profile.id}-cpu.txt", f"{profile.id}-memory.txt"])
+    memory = (profile_dir / f"{profile.id}-memory.txt").read_text()
+    assert "# request: build a big block" in memory
+    assert "peak traced memory" in memory
+    assert "test_profiling.py" in memory
+    assert len(data) == 100
+
+def test_concurrent_profile_is_skipped(profile_dir):
+    """Test that a second profile while one is running yields None instead of blocking."""
+    with profiling.profile_request(frozenset({"cpu"})) as outer:
+        with profiling.profile_request(frozenset({"cpu"})) as inner:
+            assert inner is None
+    assert outer is not None
+
+@patch('app.generate_commands')
+def test_flask_profiled_request(mock_generate_commands, profile_dir):
+    """Test that X-Profile on /api/commands returns the profile ID and writes its files."""
+    mock_generate_commands.return_value = [BUILD]
+    client = flask_app.app.test_client()
+
+    response = client.post('/api/commands', json={'prompt': 'a custom block'}, headers={'X-Profile': 'cpu,memory'})
+
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-ID']
+    assert (profile_dir / f"{profile_id}.prof").exists()
+    assert "build_structure" in (profile_dir / f"{profile_id}-cpu.txt").read_text()
+
+def test_flask_unknown_profile_mode(profile_dir):
+    client = flask_app.app.test_client()
+    response = client.post('/api/commands', json={'prompt': 'a custom block'}, headers={'X-Profile': 'gpu'})
+    assert response.status_code == 400
+
+@patch('app.generate_commands')
+def test_flask_unprofiled_request_has_no_profile(mock_generate_commands, monkeypatch):
+    mock_generate_commands.return_value = [BUILD]
+    monkeypatch.setattr(profiling, "PROFILE_DIR", None)
+    response = flask_app.app.test_client().post('/api/commands?profile=cpu', json={'prompt': 'a custom block'})
+    assert response.status_code == 200
+    assert 'X-Profile-ID' not in response.headers
+
+@patch('asgi.agenerate_commands')
+def test_asgi_profiled_request_runs_executors_inline(mock_agenerate_commands, profile_dir):
+    """Test that the ASGI app profiles via the query flag, capturing the executor work but not the awaited NLP stage."""
+    mock_agenerate_commands.return_value = [BUILD]
+    with TestClient(asgi.app) as client:
+        response = client.post('/api/commands?profile=cpu', json={'prompt': 'a custom block'})
+
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-ID']
+    summary = (profile_dir / f"{profile_id}-cpu.txt").read_text()
+    assert "build_structure" in summary
+    assert "prompt_to_commands" not in summary
+    assert not (profile_dir / f"{profile_id}-memory.txt").exists()
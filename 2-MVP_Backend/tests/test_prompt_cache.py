@@ -0,0 +1,93 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from nlp.prompt_cache import PromptCache, normalize_prompt, prompt_cache_key
+
+@pytest.fixture
+def cache(tmp_path):
+    return PromptCache(path=str(tmp_path / "prompts.sqlite3"), ttl_seconds=60, max_entries=2)
+
+def make_response(name, arguments):
+    tool_call = SimpleNamespace(function=SimpleNamespace(name=name, arguments=arguments))
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(tool_calls=[tool_call]))])
+
+def test_normalized_prompts_share_a_key():
+    """
+    Test that case and whitespace variants map to the same key, while context and model do not.
+    """
+    assert normalize_prompt("  Build   FCC Al. ") == "build fcc al"
+    key = prompt_cache_key("Build FCC Al", None, "gpt-4-0613")
+    assert prompt_cache_key("build  fcc al", [], "gpt-4-0613") == key
+    assert prompt_cache_key("build fcc al", [{"role": "user", "content": "hi"}], "gpt-4-0613") != key
+    assert prompt_cache_key("build fcc al", None, "other-model") != key
+
+def test_get_put_and_lru_eviction(cache):
+    """
+    Test that entries round-trip and the least recently used entry is evicted past max_entries.
+    """
+    cache.put("a", [{"command": "resetView", "params": {}}])
+    cache.put("b", [{"command": "zoom", "params": {"factor": 2}}])
+    assert cache.get("a") == [{"command": "resetView", "params": {}}]
+    cache.put("c", [])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+def test_entries_expire_after_ttl(cache):
+    """
+    Test that entries older than the TTL are treated as misses and deleted.
+    """
+    with patch("nlp.prompt_cache.time.time", return_value=1000.0):
+        cache.put("a", [])
+    with patch("nlp.prompt_cache.time.time", return_value=1061.0):
+        assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+def test_cache_is_shared_between_instances(tmp_path):
+    """
+    Test that two caches on the same file (as in two workers) share entries.
+    """
+    path = str(tmp_path / "shared.sqlite3")
+    PromptCache(path=path).put("k", [{"command": "resetView", "params": {}}])
+    assert PromptCache(path=path).get("k") == [{"command": "resetView", "params": {}}]
+
+def test_generate_commands_uses_cache_with_list_context(cache):
+    """
+    Test that generate_commands serves repeated prompts from the cache, including with a list context.
+    """
+    from nlp import llm_client
+
+    context = [{"role": "user", "content": "previous"}]
+    with patch.object(llm_client, "prompt_cache", cache), \
+            patch.object(llm_client.get_client().chat.completions, "create") as mock_create:
+        mock_create.return_value = make_response("rotateCamera", '{"axis": "x", "angle": 90}')
+        first = llm_client.generate_commands("Rotate around X", context)
+        second = llm_client.generate_commands("rotate   around x", context)
+
+    assert first == second == [{"command": "rotateCamera", "params": {"axis": "x", "angle": 90}}]
+    mock_create.assert_called_once()
+
+def test_invalid_llm_output_is_not_cached(cache):
+    """
+    Test that a response failing validation is not cached, for plain and streamed calls.
+    """
+    from nlp import llm_client
+
+    chunk = SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(tool_calls=[
+        SimpleNamespace(index=0, function=SimpleNamespace(name="zoom", arguments='{"factor": "big"}'))
+    ]))])
+    with patch.object(llm_client, "prompt_cache", cache), \
+            patch.object(llm_client.get_client().chat.completions, "create") as mock_create:
+        mock_create.return_value = make_response("buildStructure", '{"element": "Al", "lattice": "fcc", "nx": 0}')
+        llm_client.generate_commands("build 0x0x0 Al")
+        llm_client.generate_commands("build 0x0x0 Al")
+        mock_create.return_value = iter([chunk])
+        assert list(llm_client.stream_commands("zoom a lot")) == [{"command": "zoom", "params": {"factor": "big"}}]
+
+    assert mock_create.call_count == 3
+    assert cache.stats()["entries"] == 0
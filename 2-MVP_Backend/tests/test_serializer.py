@@ -0,0 +1,83 @@
+import pytest
+from ase.build import bulk
+from executor.serializer import serialize
+from executor.structure import _write_with_ase
+
+STRUCTURES = [
+    ("Al", "fcc", None, (2, 2, 2)),
+    ("Fe", "bcc", None, (3, 1, 1)),
+    ("NaCl", "rocksalt", 5.64, (2, 1, 2)),
+    ("Si", "diamond", None, (1, 1, 1)),
+]
+
+@pytest.mark.parametrize("fmt", ["pdb", "xyz", "cif"])
+@pytest.mark.parametrize("element,lattice,a,reps", STRUCTURES)
+def test_serialize_matches_ase_writer(fmt, element, lattice, a, reps):
+    """
+    Test that the vectorized writers are byte-identical to ase.io.write.
+    """
+    atoms = bulk(element, lattice, a=a, cubic=True) * reps
+    expected = _write_with_ase(atoms, fmt)
+    assert serialize(fmt, atoms.numbers, atoms.positions, atoms.cell.array) == expected
+
+def test_serialize_pdb_wraps_atom_index():
+    """
+    Test that PDB atom serial numbers wrap at 100000 like ASE.
+    """
+    atoms = bulk("Al", "fcc", cubic=True) * (30, 30, 28)
+    pdb = serialize("pdb", atoms.numbers, atoms.positions, atoms.cell.array)
+    assert pdb == _write_with_ase(atoms, "pdb")
+
+def test_serialize_unknown_format():
+    """
+    Test that serialize rejects unsupported formats.
+    """
+    atoms = bulk("Al", "fcc", cubic=True)
+    with pytest.raises(ValueError, match="Unsupported structure format"):
+        serialize("mol2", atoms.numbers, atoms.positions, atoms.cell.array)
+
+def test_binary_round_trip():
+    """
+    Test that the binary payload decodes to float32 positions, uint8 numbers and the cell.
+    """
+    import base64
+    import numpy as np
+    from executor.serializer import decode_binary
+
+    atoms = bulk("NaCl", "rocksalt", a=5.64, cubic=True) * (2, 2, 2)
+    payload = base64.b64decode(serialize("binary", atoms.numbers, atoms.positions, atoms.cell.array))
+    assert len(payload) == 44 + 13 * len(atoms)
+
+    numbers, positions, cell = decode_binary(payload)
+    assert numbers.dtype == np.uint8
+    assert positions.dtype == np.float32
+    np.testing.assert_array_equal(numbers, atoms.numbers)
+    np.testing.assert_allclose(positions, atoms.positions, atol=1e-5)
+    np.testing.assert_allclose(cell, atoms.cell.array, atol=1e-5)
+
+def test_decode_binary_rejects_garbage():
+    """
+    Test that decode_binary rejects payloads without the expected header.
+    """
+    from executor.serializer import decode_binary
+
+    with pytest.raises(ValueError):
+        decode_binary(b"ATOM      1   Al MOL")
+
+@pytest.mark.parametrize("fmt", ["pdb", "xyz", "cif", "binary"])
+def test_iter_serialized_chunks_join_to_serialize(fmt):
+    """
+    Test that small chunks join to the same file as serialize, PDB serial wrapping included.
+    """
+    import base64
+    from executor.serializer import iter_serialized
+
+    atoms = bulk("NaCl", "rocksalt", a=5.64, cubic=True) * (3, 2, 2)
+    chunks = list(iter_serialized(fmt, atoms.numbers, atoms.positions, atoms.cell.array, chunk_atoms=7))
+    assert len(chunks) > 2
+    expected = serialize(fmt, atoms.numbers, atoms.positions, atoms.cell.array)
+    if fmt == "binary":
+        expected = base64.b64decode(expected)
+    else:
+        expected = expected.encode("utf-8")
+    assert b"".join(chunks) == expected
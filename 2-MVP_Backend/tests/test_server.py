@@ -0,0 +1,97 @@
+import gc
+import os
+import runpy
+import pytest
+from unittest.mock import MagicMock, patch
+from starlette.testclient import TestClient
+
+import app as flask_app
+import asgi
+from executor import dispatch
+from executor.cache import structure_cache
+from nlp import llm_client
+from utils import warmup
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def cold(monkeypatch):
+    """A process that has not warmed up yet, with warm-up enabled."""
+    monkeypatch.setattr(warmup, "WARMUP_ON_START", True)
+    with patch.dict(warmup._status, {"warmedUp": False, "seconds": None, "finishedAt": None, "structures": 0, "pid": None}):
+        yield
+
+def test_parse_warmup_structures():
+    assert warmup.parse_warmup_structures("Cu:fcc:3, Fe:bcc") == [
+        {"element": "Cu", "lattice": "fcc", "nx": 3, "ny": 3, "nz": 3},
+        {"element": "Fe", "lattice": "bcc", "nx": 1, "ny": 1, "nz": 1},
+    ]
+    assert warmup.parse_warmup_structures("") == []
+    with pytest.raises(ValueError):
+        warmup.parse_warmup_structures("Cu")
+
+def test_warm_up_fills_caches_once(cold, monkeypatch):
+    """Test that warm-up caches the configured structures and Miller views, and only runs once."""
+    monkeypatch.setattr(warmup, "WARMUP_STRUCTURES", "Cu:fcc:2")
+    structure_cache.clear()
+    assert not warmup.readiness()["ready"]
+
+    warmup.warm_up()
+    status = warmup.readiness()
+    assert status["ready"]
+    assert status["warmup"]["structures"] == 1
+    assert status["warmup"]["pid"] == os.getpid()
+    assert structure_cache.stats()["entries"] == 1
+
+    from executor.view import miller_quaternion
+    hits = miller_quaternion.cache_info().hits
+    miller_quaternion(2, 1, 0)
+    assert miller_quaternion.cache_info().hits == hits + 1
+
+    with patch("executor.structure.build_structure") as build:
+        warmup.warm_up()
+    build.assert_not_called()
+    structure_cache.clear()
+
+def test_readyz_reports_warmup_in_both_apps(cold):
+    flask_client = flask_app.app.test_client()
+    with TestClient(asgi.app) as asgi_client:
+        assert flask_client.get('/readyz').status_code == 503
+        assert asgi_client.get('/readyz').status_code == 503
+        warmup._status["warmedUp"] = True
+        response = asgi_client.get('/readyz')
+    assert response.status_code == 200
+    assert response.json()["ready"]
+    assert flask_client.get('/readyz').get_json()["ready"]
+
+def test_readyz_without_warmup(monkeypatch):
+    monkeypatch.setattr(warmup, "WARMUP_ON_START", False)
+    with patch.dict(warmup._status, {"warmedUp": False}):
+        response = flask_app.app.test_client().get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json()["warmup"]["warmedUp"] is False
+
+def test_gunicorn_config_warms_master_before_fork():
+    """Test that the server config preloads the app and warms up and freezes the heap in when_ready."""
+    settings = runpy.run_path(os.path.join(BACKEND_DIR, "gunicorn.conf.py"))
+    assert settings["preload_app"] is True
+    assert settings["workers"] >= 1
+    server = MagicMock(num_workers=2)
+    try:
+        with patch("utils.warmup.warm_up", return_value=0.5) as warm_up:
+            settings["when_ready"](server)
+        warm_up.assert_called_once_with()
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+def test_fork_resets_per_process_state():
+    """Test that a forked worker does not inherit the OpenAI clients or the dispatch pool."""
+    llm_client.get_client()
+    dispatch._get_pool()
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if not llm_client._clients and dispatch._pool is None else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert llm_client._clients
@@ -0,0 +1,87 @@
+import time
+import pytest
+from executor.session import SessionStore, parse_session_id, run_session_commands, view_delta
+from models.commands import validate_commands
+from utils.error_handlers import ExecutionError, ValidationError
+
+ROTATE_Y = {"command": "rotateCamera", "params": {"axis": "y", "angle": 90}}
+BUILD_AL = {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc"}}
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    path = str(tmp_path / "sessions.sqlite3") if request.param == "sqlite" else None
+    return SessionStore(path=path, idle_seconds=60, max_sessions=2)
+
+def test_get_put_delete(store):
+    """
+    Test that session state round-trips, is returned as a copy, and can be deleted.
+    """
+    assert store.get("s1") is None
+    store.put("s1", {"view": {"zoom": 2}})
+    state = store.get("s1")
+    assert state == {"view": {"zoom": 2}}
+    state["view"]["zoom"] = 5
+    assert store.get("s1") == {"view": {"zoom": 2}}
+    assert store.delete("s1") is True
+    assert store.get("s1") is None
+    assert store.stats()["hits"] == 2
+
+def test_idle_sessions_are_evicted(store):
+    """
+    Test that sessions idle longer than idle_seconds are no longer returned.
+    """
+    store.idle_seconds = 0.05
+    store.put("s1", {"view": {}})
+    time.sleep(0.1)
+    assert store.get("s1") is None
+    assert store.stats()["sessions"] == 0
+
+def test_memory_store_is_bounded():
+    """
+    Test that the in-process tier evicts the least recently used session past max_sessions.
+    """
+    store = SessionStore(path=None, idle_seconds=60, max_sessions=2)
+    store.put("a", {})
+    store.put("b", {})
+    store.get("a")
+    store.put("c", {})
+    assert store.get("b") is None
+    assert store.get("a") == {} and store.get("c") == {}
+    assert store.stats()["evictions"] == 1
+
+def test_run_session_commands_applies_rotations_incrementally():
+    """
+    Test that camera commands continue from the session view and return only the changed fields.
+    """
+    commands = validate_commands([ROTATE_Y, BUILD_AL])
+    results, state = run_session_commands(commands, None)
+    assert set(results[0]) == {"quaternion"}
+    assert results[1].count("ATOM") == 4
+    assert state["structure"]["element"] == "Al"
+
+    # A second request rotates from where the first one left off: 180 degrees about y.
+    results, state = run_session_commands(validate_commands([ROTATE_Y]), state)
+    expected = [0.0, 1.0, 0.0, 0.0]
+    assert all(abs(q - e) < 1e-6 for q, e in zip(results[0]["quaternion"], expected))
+    assert state["view"]["zoom"] == 1
+
+def test_run_session_commands_leaves_state_on_failure():
+    """
+    Test that a failing request does not modify the session state passed in.
+    """
+    state = {"view": {"quaternion": [0, 0, 0, 1], "translation": [0, 0, 0], "zoom": 1}}
+    commands = validate_commands([ROTATE_Y, {"command": "buildStructure", "params": {"element": "Xx", "lattice": "fcc"}}])
+    with pytest.raises(ExecutionError):
+        run_session_commands(commands, state)
+    assert state["view"]["quaternion"] == [0, 0, 0, 1]
+
+def test_view_delta_and_session_id_parsing():
+    """
+    Test that deltas only contain changed fields and session IDs are validated.
+    """
+    assert view_delta({"zoom": 1, "translation": [0, 0, 0]}, {"zoom": 2, "translation": [0, 0, 0]}) == {"zoom": 2}
+    assert parse_session_id("abc-123", {"sessionId": "ignored"}) == "abc-123"
+    assert parse_session_id(None, {"sessionId": "from-body"}) == "from-body"
+    assert parse_session_id(None, {}) is None
+    with pytest.raises(ValidationError):
+        parse_session_id("bad id with spaces", None)
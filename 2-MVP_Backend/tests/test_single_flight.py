@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+import pytest
+from nlp.single_flight import SingleFlight, AsyncSingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    """
+    Test that concurrent threads with the same key run the function once and share its result.
+    """
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(timeout=5)
+        return ["result"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while flight.stats()["coalesced"] < 7:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [["result"]] * 8
+    assert flight.stats() == {"executions": 1, "coalesced": 7, "in_flight": 0}
+
+def test_errors_propagate_and_key_is_released():
+    """
+    Test that an exception reaches the caller and a later call runs again.
+    """
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: 42) == 42
+    assert flight.stats()["executions"] == 2
+
+def test_async_concurrent_calls_share_one_execution():
+    """
+    Test that concurrent coroutines with the same key await a single call.
+    """
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", slow) for _ in range(5)), flight.do("other", slow))
+
+    results = asyncio.run(main())
+    assert results == ["result"] * 6
+    assert len(calls) == 2
+    assert flight.stats() == {"executions": 2, "coalesced": 4, "in_flight": 0}
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from benchmarks.suite import LAZY_MODULES
+from nlp import llm_client
+from utils import warmup
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def loaded_after(code):
+    script = f"import sys; {code}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    env = {**os.environ, "WARMUP_ON_START": "false"}
+    env.pop("OPENAI_API_KEY", None)
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=BACKEND_DIR, env=env)
+    return [module for module in output.stdout.strip().split(",") if module]
+
+def test_importing_the_apps_defers_heavy_dependencies():
+    """Test that neither app imports ASE, SciPy or the OpenAI SDK, even without an API key."""
+    assert loaded_after("import app, asgi") == []
+
+def test_structure_requests_do_not_load_openai():
+    """Test that a fast-path request builds its structure without the OpenAI SDK."""
+    code = ("from executor.structure import build_structure; from models.commands import BuildStructureParams; "
+            "build_structure(BuildStructureParams(element='Cu', lattice='fcc'))")
+    loaded = loaded_after(code)
+    assert "ase.build" in loaded
+    assert "openai" not in loaded
+
+def test_clients_are_created_once():
+    with patch.dict(llm_client._clients, clear=True):
+        client = llm_client.get_client()
+        assert llm_client.get_client() is client
+        assert llm_client.get_async_client() is not client
+
+def test_warm_up_survives_failures():
+    """Test that warm-up logs instead of raising when a step fails."""
+    with patch.dict(llm_client._clients, clear=True), \
+            patch.dict(warmup._status, {"warmedUp": False}), \
+            patch.object(warmup, "OPENAI_API_KEY", "x"), \
+            patch("executor.structure._conventional_cell", side_effect=RuntimeError("no ASE")):
+        assert warmup.warm_up() >= 0
+        assert set(llm_client._clients) == {"OpenAI", "AsyncOpenAI"}
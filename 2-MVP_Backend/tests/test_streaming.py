@@ -0,0 +1,121 @@
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from starlette.testclient import TestClient
+
+import app as flask_app
+import asgi
+from nlp import llm_client
+from nlp.prompt_cache import PromptCache
+from utils.error_handlers import NLPError
+
+def chunk(index, name=None, arguments=None):
+    function = SimpleNamespace(name=name, arguments=arguments)
+    delta = SimpleNamespace(tool_calls=[SimpleNamespace(index=index, function=function)])
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+# Two tool calls, each split over several chunks.
+CHUNKS = [
+    chunk(0, "buildStructure", ""),
+    chunk(0, None, '{"element": "Al", '),
+    chunk(0, None, '"lattice": "fcc"}'),
+    chunk(1, "rotateCamera", '{"axis": '),
+    chunk(1, None, '"y", "angle": 90}'),
+]
+
+def parse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_stream_commands_yields_each_tool_call_when_complete(tmp_path):
+    """
+    Test that a command is yielded as soon as its arguments parse, before the stream ends,
+    and that the completed stream is cached.
+    """
+    consumed = []
+
+    def stream():
+        for c in CHUNKS:
+            consumed.append(c)
+            yield c
+
+    cache = PromptCache(path=str(tmp_path / "prompts.sqlite3"))
+    with patch.object(llm_client, "prompt_cache", cache), \
+            patch.object(llm_client.get_client().chat.completions, "create", return_value=stream()) as mock_create:
+        commands = llm_client.stream_commands("build al and rotate")
+        first = next(commands)
+        assert first == {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc"}}
+        assert len(consumed) == 3
+        assert list(commands) == [{"command": "rotateCamera", "params": {"axis": "y", "angle": 90}}]
+        assert mock_create.call_args.kwargs["stream"] is True
+
+        assert len(list(llm_client.stream_commands("build al and rotate"))) == 2
+        mock_create.assert_called_once()
+
+def test_stream_commands_without_tool_calls_raises():
+    """
+    Test that a stream with no tool calls raises NLPError.
+    """
+    empty = SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(tool_calls=None))])
+    with patch.object(llm_client, "prompt_cache", PromptCache(path=None)), \
+            patch.object(llm_client.get_client().chat.completions, "create", return_value=iter([empty])):
+        with pytest.raises(NLPError, match="did not return a tool call"):
+            list(llm_client.stream_commands("hello"))
+
+@patch('app.stream_commands')
+def test_commands_stream_endpoint(mock_stream_commands):
+    """
+    Test that /api/commands/stream sends one result event per command and a done event.
+    """
+    mock_stream_commands.return_value = iter([
+        {"command": "buildStructure", "params": {"element": "Al", "lattice": "fcc"}},
+        {"command": "rotateCamera", "params": {"axis": "y", "angle": 90}},
+    ])
+    with flask_app.app.test_client() as client:
+        response = client.post('/api/commands/stream', json={'prompt': 'build al and rotate'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = parse_events(response.get_data(as_text=True))
+    assert [name for name, _ in events] == ["result", "result", "done"]
+    assert events[0][1]["command"] == "buildStructure"
+    assert events[0][1]["result"].count("ATOM") == 4
+    assert events[1][1]["result"]["zoom"] == 1
+    assert events[2][1] == {"count": 2}
+
+@patch('app.stream_commands')
+def test_commands_stream_endpoint_stops_at_first_error(mock_stream_commands):
+    """
+    Test that an invalid command ends the stream with an error event after earlier results.
+    """
+    mock_stream_commands.return_value = iter([
+        {"command": "rotateCamera", "params": {"axis": "y", "angle": 90}},
+        {"command": "zoom", "params": {"factor": "lots"}},
+        {"command": "rotateCamera", "params": {"axis": "x", "angle": 90}},
+    ])
+    with flask_app.app.test_client() as client:
+        response = client.post('/api/commands/stream', json={'prompt': 'rotate, zoom and rotate'})
+    events = parse_events(response.get_data(as_text=True))
+    assert [name for name, _ in events] == ["result", "error"]
+    assert events[1][1]["index"] == 1
+    assert events[1][1]["type"] == "ValidationError"
+
+@patch('asgi.astream_commands')
+def test_async_commands_stream_endpoint(mock_astream_commands):
+    """
+    Test the async /api/commands/stream endpoint.
+    """
+    async def stream(prompt):
+        yield {"command": "rotateCamera", "params": {"axis": "y", "angle": 90}}
+        yield {"command": "rotateCamera", "params": {"axis": "y", "angle": 90}}
+
+    mock_astream_commands.side_effect = stream
+    with TestClient(asgi.app) as client:
+        response = client.post('/api/commands/stream', json={'prompt': 'spin it twice'})
+    events = parse_events(response.text)
+    assert [name for name, _ in events] == ["result", "result", "done"]
+    # The second rotation continues from the first.
+    assert abs(events[1][1]["result"]["quaternion"][1] - 1.0) < 1e-6
@@ -44,4 +44,41 @@ def test_build_structure_atom_count_bcc_fe():
     pdb_content = build_structure(params)
 
     assert isinstance(pdb_content, str)
-    assert count_atom_records(pdb_content) == expected_atom_count
\ No newline at end of file
+    assert count_atom_records(pdb_content) == expected_atom_count
+
+def test_build_structure_xyz_and_cif_formats():
+    """
+    Test that build_structure serializes the XYZ and CIF formats with the same atom count.
+    """
+    xyz_params = BuildStructureParams(element="Cu", lattice="fcc", nx=2, ny=1, nz=1, format="xyz")
+    xyz_content = build_structure(xyz_params)
+    assert xyz_content.splitlines()[0] == "8"
+
+    cif_params = BuildStructureParams(element="Cu", lattice="fcc", nx=2, ny=1, nz=1, format="cif")
+    cif_content = build_structure(cif_params)
+    assert cif_content.startswith("data_image0\n")
+    assert '_chemical_formula_sum              "Cu8"' in cif_content
+
+def test_build_structure_descriptor_mode():
+    """
+    Test that descriptor mode returns only the unit cell and its replication.
+    """
+    params = BuildStructureParams(element="Al", lattice="fcc", nx=50, ny=50, nz=50, mode="descriptor")
+    descriptor = build_structure(params)
+
+    assert isinstance(descriptor, dict)
+    assert descriptor["replication"] == [50, 50, 50]
+    assert descriptor["natoms"] == 4 * 50 * 50 * 50
+    assert count_atom_records(descriptor["unitCell"]) == 4
+    assert len(descriptor["cellVectors"]) == 3
+    assert abs(descriptor["cellVectors"][0][0] - 4.05) < 1e-6
+
+def test_materialize_structure_expands_descriptor():
+    """
+    Test that materialize_structure returns every atom for descriptor-mode params.
+    """
+    from executor.structure import materialize_structure
+
+    params = BuildStructureParams(element="Fe", lattice="bcc", nx=2, ny=2, nz=1, mode="descriptor")
+    content = materialize_structure(params)
+    assert count_atom_records(content) == 2 * 2 * 2 * 1
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from ase.build import bulk
+from executor.tiling import tile_positions, tile_structure
+
+@pytest.mark.parametrize("element,lattice,cubic", [
+    ("Al", "fcc", True),
+    ("Fe", "bcc", False),
+    ("Mg", "hcp", False),
+    ("NaCl", "rocksalt", True),
+])
+def test_tile_structure_matches_ase_repeat(element, lattice, cubic):
+    """
+    Test that tiling reproduces ase.Atoms.repeat exactly, including atom order.
+    """
+    kwargs = {"a": 5.64} if element == "NaCl" else {}
+    cell = bulk(element, lattice, cubic=cubic, **kwargs)
+    reps = (3, 2, 4)
+    expected = cell * reps
+
+    numbers, positions, supercell = tile_structure(cell.numbers, cell.positions, cell.cell.array, reps)
+
+    np.testing.assert_array_equal(numbers, expected.numbers)
+    np.testing.assert_array_equal(positions, expected.positions)
+    np.testing.assert_array_equal(supercell, expected.cell.array)
+
+def test_tile_positions_writes_into_preallocated_array():
+    """
+    Test that tile_positions fills the provided output array in place.
+    """
+    cell = bulk("Cu", "fcc", cubic=True)
+    out = np.zeros((4 * 2 * 2 * 2, 3))
+    result = tile_positions(cell.positions, cell.cell.array, (2, 2, 2), out=out)
+    assert result is out
+    np.testing.assert_array_equal(out, (cell * (2, 2, 2)).positions)
+
+def test_tile_positions_rejects_bad_arguments():
+    """
+    Test that tile_positions validates repetitions and output shape.
+    """
+    cell = bulk("Cu", "fcc", cubic=True)
+    with pytest.raises(ValueError, match="must be positive"):
+        tile_positions(cell.positions, cell.cell.array, (0, 1, 1))
+    with pytest.raises(ValueError, match="expected"):
+        tile_positions(cell.positions, cell.cell.array, (2, 1, 1), out=np.empty((3, 3)))
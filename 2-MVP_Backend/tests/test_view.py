@@ -1,5 +1,12 @@
 import pytest
-from executor.view import compute_set_view, compute_rotate_camera
+from executor.view import (
+    FACE_QUATERNIONS,
+    compose_rotations,
+    compute_rotate_camera,
+    compute_set_view,
+    miller_quaternion,
+    rotate_views,
+)
 from utils.error_handlers import ExecutionError
 
 def test_compute_set_view_100_face():
@@ -135,4 +142,73 @@ def test_compute_rotate_camera_zero_vector_axis():
         "zoom": 1.0
     }
     with pytest.raises(ExecutionError, match="Rotation axis cannot be a zero vector"):
-        compute_rotate_camera(initial_view, (0, 0, 0), 90)
\ No newline at end of file
+        compute_rotate_camera(initial_view, (0, 0, 0), 90)
+
+def test_compute_set_view_uses_precomputed_faces():
+    """
+    Test that the common faces come from the import-time table and callers
+    cannot modify it through the returned list.
+    """
+    view_object = compute_set_view("111")
+    assert view_object["quaternion"] == list(FACE_QUATERNIONS["111"])
+    view_object["quaternion"][0] = 42.0
+    assert compute_set_view("111")["quaternion"] == list(FACE_QUATERNIONS["111"])
+
+def test_compute_set_view_arbitrary_miller_indices():
+    """
+    Test that other Miller indices are accepted and cached, and spellings of
+    the same indices share one entry.
+    """
+    miller_quaternion.cache_clear()
+    view_object = compute_set_view("210")
+    assert compute_set_view("(2, 1, 0)") == view_object
+    assert miller_quaternion.cache_info().hits == 1
+    # Looking along [210] should bring the camera's -Z axis onto that direction.
+    qx, qy, qz, qw = view_object["quaternion"]
+    look = [-2 * (qx * qz + qw * qy), -2 * (qy * qz - qw * qx), -(1 - 2 * (qx * qx + qy * qy))]
+    expected = [2 / 5 ** 0.5, 1 / 5 ** 0.5, 0.0]
+    for i in range(3):
+        assert abs(look[i] - expected[i]) < 1e-9
+
+def test_compute_set_view_invalid_faces():
+    """
+    Test that compute_set_view raises ExecutionError for non-Miller strings and the zero vector.
+    """
+    with pytest.raises(ExecutionError, match="Invalid face provided"):
+        compute_set_view("top")
+    with pytest.raises(ExecutionError, match="cannot all be zero"):
+        compute_set_view("000")
+
+def test_compose_rotations_matches_sequential_rotations():
+    """
+    Test that the batched scan returns the same views as applying each rotation in turn.
+    """
+    initial_view = {"quaternion": [0.1, 0.2, 0.3, 0.9], "translation": [1.0, 2.0, 3.0], "zoom": 2.0}
+    axes = ["x", "y", (1, 1, 1), "z", (0.2, -1, 0.5)]
+    angles = [90, 45, 60, -30, 170]
+
+    views = compose_rotations(initial_view, axes, angles)
+
+    current = initial_view
+    assert len(views) == len(axes)
+    for view, axis, angle in zip(views, axes, angles):
+        current = compute_rotate_camera(current, axis, angle)
+        assert view["translation"] == initial_view["translation"]
+        for i in range(4):
+            assert abs(view["quaternion"][i] - current["quaternion"][i]) < 1e-12
+
+def test_rotate_views_matches_single_rotations():
+    """
+    Test that one rotation applied to many views matches rotating each view separately.
+    """
+    views = [
+        {"quaternion": [0.0, 0.0, 0.0, 1.0], "zoom": 1.0},
+        {"quaternion": list(FACE_QUATERNIONS["110"]), "zoom": 3.0},
+        {"quaternion": [0.5, 0.5, 0.5, 0.5], "zoom": 0.5},
+    ]
+    rotated = rotate_views(views, (1, 2, 3), 33)
+    for view, result in zip(views, rotated):
+        expected = compute_rotate_camera(view, (1, 2, 3), 33)
+        assert result["zoom"] == view["zoom"]
+        for i in range(4):
+            assert abs(result["quaternion"][i] - expected["quaternion"][i]) < 1e-12
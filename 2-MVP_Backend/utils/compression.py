@@ -0,0 +1,145 @@
+import gzip
+import hashlib
+from typing import List, Optional
+
+from config import GZIP_LEVEL, ZSTD_LEVEL
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available.
+    zstandard = None
+
+# Media types worth compressing when the application did not already do so.
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "chemical/")
+
+
+def available_encodings() -> List[str]:
+    """Returns the content codings this server can produce, most preferred first."""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Picks the content coding for a response from an ``Accept-Encoding`` header.
+
+    The coding with the highest q-value wins; ties go to the server's
+    preference (zstd, then gzip). ``*`` stands for every coding not listed
+    explicitly, and ``q=0`` rules a coding out.
+
+    Args:
+        accept_encoding (Optional[str]): e.g. ``"gzip, deflate, br, zstd"``.
+
+    Returns:
+        Optional[str]: "zstd", "gzip", or None to send the body uncompressed.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            weights[coding] = quality
+    wildcard = weights.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in available_encodings():
+        quality = weights.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compresses a response body.
+
+    gzip output has a zero timestamp, so the same input always gives the
+    same bytes and precompressed entries can be shared between workers.
+
+    Args:
+        data (bytes): The uncompressed body.
+        encoding (str): "gzip" or "zstd".
+
+    Returns:
+        bytes: The compressed body.
+
+    Raises:
+        ValueError: If the encoding is not available.
+    """
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def content_etag(data: bytes) -> str:
+    """
+    Computes a strong ETag from the uncompressed body.
+
+    Args:
+        data (bytes): The uncompressed body.
+
+    Returns:
+        str: A quoted ETag, e.g. ``"9f86d081884c7d659a2feaa0c55ad015"``.
+    """
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def representation_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    Derives the ETag of a compressed representation, e.g. ``"<hash>-gzip"``.
+
+    Each coding is a different sequence of bytes and needs its own strong
+    ETag; :func:`etag_matches` treats them as the same content.
+    """
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def _opaque_tag(etag: str) -> str:
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    etag = etag.strip('"')
+    for coding in ("zstd", "gzip"):
+        if etag.endswith(f"-{coding}"):
+            return etag[:-len(coding) - 1]
+    return etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluates ``If-None-Match`` with the weak comparison RFC 9110 prescribes for it.
+
+    Args:
+        if_none_match (Optional[str]): The request header, a list of ETags or ``*``.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: True if the client's copy is current and a 304 should be sent.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = _opaque_tag(etag)
+    return any(_opaque_tag(candidate) == current for candidate in if_none_match.split(","))
+
+
+def add_vary(vary: Optional[str], field: str = "Accept-Encoding") -> str:
+    """Appends ``field`` to a ``Vary`` header value unless it is already listed."""
+    fields = [f.strip() for f in (vary or "").split(",") if f.strip()]
+    if field.lower() not in (f.lower() for f in fields) and "*" not in fields:
+        fields.append(field)
+    return ", ".join(fields)
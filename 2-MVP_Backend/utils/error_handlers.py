@@ -4,4 +4,8 @@ class NLPError(Exception):
 
 class ExecutionError(Exception):
     """Custom exception for errors during command execution."""
-    pass
\ No newline at end of file
+    pass
+
+class ValidationError(Exception):
+    """Custom exception for validation errors."""
+    pass
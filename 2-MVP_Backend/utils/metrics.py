@@ -0,0 +1,237 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Sequence, Tuple, Union
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow LLM calls.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Response size buckets in bytes, 256 B to 64 MiB.
+SIZE_BUCKETS = tuple(float(4 ** i * 256) for i in range(10))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        """
+        Adds ``amount`` to the count for the given label values.
+
+        Args:
+            *label_values (str): One value per label, in declaration order.
+            amount (float): The increment.
+        """
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_labels(self.labels, label_values)} {_number(value)}"
+
+
+class Histogram:
+    """
+    Observations sorted into fixed buckets per combination of label values.
+
+    ``observe`` is one bisect and three additions under a lock, so timing a
+    stage costs well under a microsecond on top of ``time.perf_counter``.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: [per-bucket counts (last one is +Inf), sum, count].
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Records one observation.
+
+        Args:
+            value (float): The observed value, e.g. seconds or bytes.
+            *label_values (str): One value per label, in declaration order.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *label_values: str):
+        """Observes the wall-clock duration of the ``with`` block in seconds, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            series = self._series.get(label_values)
+            return series[2] if series is not None else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+        for label_values, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.labels, label_values, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labels, label_values)} {count}"
+
+
+class _Callback:
+    """A metric whose values are read from a function at scrape time."""
+
+    def __init__(self, name: str, documentation: str, kind: str, fn: Callable[[], Union[float, Dict[str, float]]], label: str):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.fn = fn
+        self.label = label
+
+    def samples(self):
+        values = self.fn()
+        if not isinstance(values, dict):
+            yield f"{self.name} {_number(values)}"
+            return
+        for label_value, value in values.items():
+            yield f"{self.name}{_labels((self.label,), (label_value,))} {_number(value)}"
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text exposition format.
+
+    Metrics are registered once by name; registering the same name again
+    returns the existing metric, so modules imported by both the Flask and
+    the ASGI app can declare their metrics unconditionally. Values are kept
+    per process: with several workers, scrape each one (or aggregate in
+    Prometheus), and executors running on a process pool are not counted.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, factory: Callable[[], object]):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(name, lambda: Counter(name, documentation, labels))
+
+    def histogram(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(name, lambda: Histogram(name, documentation, labels, buckets))
+
+    def register_callback(
+        self,
+        name: str,
+        documentation: str,
+        fn: Callable[[], Union[float, Dict[str, float]]],
+        kind: str = "gauge",
+        label: str = "",
+    ) -> None:
+        """
+        Exposes values computed at scrape time, such as the counters of the caches.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The HELP text.
+            fn (Callable): Returns one number, or a dict of numbers keyed by the value of ``label``.
+            kind (str): "gauge" or "counter".
+            label (str): The label name used when ``fn`` returns a dict.
+        """
+        self._register(name, lambda: _Callback(name, documentation, kind, fn, label))
+
+    def render(self) -> str:
+        """
+        Formats every metric for a Prometheus scrape.
+
+        A callback that raises is skipped, so one broken source cannot fail the scrape.
+
+        Returns:
+            str: The exposition text, ending with a newline.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for name, metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                continue
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+request_seconds = metrics.histogram(
+    "nlp_atomic_request_seconds", "HTTP request duration in seconds.", ("endpoint", "method", "status")
+)
+response_bytes = metrics.histogram(
+    "nlp_atomic_response_bytes", "HTTP response body size in bytes.", ("endpoint",), buckets=SIZE_BUCKETS
+)
+stage_seconds = metrics.histogram(
+    "nlp_atomic_stage_seconds",
+    "Duration of one request stage in seconds (nlp, llm, prompt_cache, validate, execute, "
+    "structure_cache, build, serialize, bonds, encode, compress).",
+    ("stage",),
+)
+executor_seconds = metrics.histogram("nlp_atomic_executor_seconds", "Command executor duration in seconds.", ("command",))
+errors_total = metrics.counter("nlp_atomic_errors_total", "Errors returned to clients, by exception type.", ("type",))
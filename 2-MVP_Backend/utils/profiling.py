@@ -0,0 +1,180 @@
+import io
+import os
+import time
+import uuid
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import FrozenSet, List, Optional
+
+from config import PROFILE_DIR, PROFILE_TOP_N
+from utils.error_handlers import ValidationError
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cpu", "memory")
+
+# One profiled request at a time per process: cProfile cannot nest on a
+# thread and tracemalloc is process-wide.
+_profile_lock = threading.Lock()
+_profiling: ContextVar[bool] = ContextVar("profiling", default=False)
+
+
+def requested_profile(header_value: Optional[str], query_value: Optional[str]) -> FrozenSet[str]:
+    """
+    Reads the profiling modes a request asks for.
+
+    Modes come from the ``X-Profile`` header or the ``profile`` query
+    parameter, e.g. "cpu", "memory" or "cpu,memory"; "1", "true" and "all"
+    select both. Without ``PROFILE_DIR`` the request is never profiled and
+    nothing is parsed.
+
+    Args:
+        header_value (Optional[str]): The ``X-Profile`` header, if present.
+        query_value (Optional[str]): The ``profile`` query parameter, if present.
+
+    Returns:
+        FrozenSet[str]: The requested modes; empty if profiling is off or not requested.
+
+    Raises:
+        ValidationError: If profiling is enabled and a mode is unknown.
+    """
+    if PROFILE_DIR is None:
+        return frozenset()
+    value = (header_value or query_value or "").strip().lower()
+    if not value:
+        return frozenset()
+    if value in ("1", "true", "all"):
+        return frozenset(PROFILE_MODES)
+    modes = frozenset(mode.strip() for mode in value.split(",") if mode.strip())
+    unknown = modes - set(PROFILE_MODES)
+    if unknown:
+        raise ValidationError(f"Unknown profile mode: {', '.join(sorted(unknown))}. Use 'cpu', 'memory' or both.")
+    return modes
+
+
+def is_profiling() -> bool:
+    """
+    Tells whether the current request is being profiled.
+
+    cProfile only sees the thread it runs on, so work that would normally be
+    handed to a thread or process pool runs inline while this is true.
+    """
+    return _profiling.get()
+
+
+class RequestProfile:
+    """Where one profiled request's results are written."""
+
+    def __init__(self, modes: FrozenSet[str], label: str, directory: str):
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self.id = f"{stamp}-{uuid.uuid4().hex[:8]}"
+        self.modes = modes
+        self.label = label
+        self.directory = directory
+        self.paths: List[str] = []
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.directory, f"{self.id}{suffix}")
+
+    def _header(self, elapsed: float) -> str:
+        return f"# {self.id}\n# request: {self.label}\n# wall time: {elapsed * 1000:.2f} ms\n\n"
+
+    def write_cpu(self, profiler: cProfile.Profile, elapsed: float) -> None:
+        # The .prof file is for pstats/snakeviz; the .txt is a readable summary.
+        path = self._path(".prof")
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+        text_path = self._path("-cpu.txt")
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(self._header(elapsed) + summary.getvalue())
+        self.paths += [path, text_path]
+
+    def write_memory(self, snapshot: tracemalloc.Snapshot, baseline: Optional[tracemalloc.Snapshot], peak: int, elapsed: float) -> None:
+        if baseline is not None:
+            stats = snapshot.compare_to(baseline, "lineno")
+            lines = [str(stat) for stat in stats[:PROFILE_TOP_N]]
+        else:
+            lines = [str(stat) for stat in snapshot.statistics("lineno")[:PROFILE_TOP_N]]
+        path = self._path("-memory.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self._header(elapsed))
+            f.write(f"# peak traced memory: {peak / 1024 / 1024:.2f} MiB\n")
+            f.write(f"# top {PROFILE_TOP_N} allocation sites still alive at the end of the request:\n")
+            f.write("\n".join(lines) + "\n")
+        self.paths.append(path)
+
+
+@contextmanager
+def profile_request(modes: FrozenSet[str], label: str = ""):
+    """
+    Runs the ``with`` block under cProfile and/or tracemalloc and writes the results to ``PROFILE_DIR``.
+
+    "cpu" writes ``<id>.prof`` (``python -m pstats`` or snakeviz) and
+    ``<id>-cpu.txt`` with the top functions by cumulative time. "memory"
+    writes ``<id>-memory.txt`` with the peak traced memory and the top
+    allocation sites still alive when the block ends. If another request is
+    already being profiled, the block runs unprofiled. With no modes this
+    costs one truth test.
+
+    Args:
+        modes (FrozenSet[str]): From :func:`requested_profile`.
+        label (str): Written at the top of each file, e.g. the prompt.
+
+    Yields:
+        Optional[RequestProfile]: The profile (its ``id`` is the file prefix),
+        or None if the block is not profiled.
+    """
+    if not modes:
+        yield None
+        return
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning("Profiling skipped: another request is already being profiled")
+        yield None
+        return
+
+    token = _profiling.set(True)
+    profiler = cProfile.Profile() if "cpu" in modes else None
+    started_tracing = False
+    baseline = None
+    try:
+        profile = RequestProfile(modes, label, PROFILE_DIR)
+        if "memory" in modes:
+            if tracemalloc.is_tracing():
+                baseline = tracemalloc.take_snapshot()
+            else:
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield profile
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed = time.perf_counter() - start
+            try:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                if profiler is not None:
+                    profile.write_cpu(profiler, elapsed)
+                if "memory" in modes:
+                    snapshot = tracemalloc.take_snapshot()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    profile.write_memory(snapshot, baseline, peak, elapsed)
+            except OSError as e:
+                logger.error(f"Could not write profile {profile.id}: {e}")
+            else:
+                logger.info(f"Wrote profile {profile.id}: {', '.join(profile.paths)}")
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        _profiling.reset(token)
+        _profile_lock.release()
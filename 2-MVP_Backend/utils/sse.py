@@ -0,0 +1,14 @@
+import json
+
+def format_sse(event: str, data) -> str:
+    """
+    Formats one Server-Sent Event.
+
+    Args:
+        event (str): The event name ("result", "error" or "done").
+        data: A JSON-serializable payload, sent on a single ``data:`` line.
+
+    Returns:
+        str: The event text, terminated by a blank line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,37 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from utils.metrics import stage_seconds
+
+class StageTimer:
+    """
+    Records how long each named stage of a request takes.
+
+    Stages are timed with ``with timer.stage("nlp"): ...``; a stage entered
+    more than once accumulates. The totals are reported to clients in a
+    ``Server-Timing`` header, which the load-test harness reads, and every
+    stage is also observed in the ``nlp_atomic_stage_seconds`` histogram.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            stage_seconds.observe(elapsed, name)
+
+    def server_timing(self) -> str:
+        """
+        Formats the recorded stages as a ``Server-Timing`` header value.
+
+        Returns:
+            str: e.g. ``"nlp;dur=812.40, validate;dur=0.05, execute;dur=3.10"`` (milliseconds).
+        """
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items())
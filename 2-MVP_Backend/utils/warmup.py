@@ -0,0 +1,140 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from config import OPENAI_API_KEY, STRUCTURE_WRITER, WARMUP_ON_START, WARMUP_STRUCTURES
+
+logger = logging.getLogger(__name__)
+
+# Miller indices whose camera views are precomputed: every direction with
+# components in -2..2, which covers what the fast path and the LLM produce
+# for "look down <hkl>" in practice.
+WARMUP_MILLER_RANGE = range(-2, 3)
+
+_lock = threading.Lock()
+_status = {"warmedUp": False, "seconds": None, "finishedAt": None, "structures": 0, "pid": None}
+
+
+def parse_warmup_structures(spec: Optional[str]) -> List[dict]:
+    """
+    Reads the ``WARMUP_STRUCTURES`` setting.
+
+    Args:
+        spec (Optional[str]): Comma-separated ``element:lattice[:n]`` entries,
+            e.g. ``"Cu:fcc:3,Fe:bcc"``; ``n`` replicates the cell n times
+            along each axis and defaults to 1.
+
+    Returns:
+        List[dict]: ``BuildStructureParams`` keyword arguments, one per entry.
+
+    Raises:
+        ValueError: If an entry is malformed.
+    """
+    structures = []
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = entry.split(":")
+        if len(parts) not in (2, 3) or not all(parts):
+            raise ValueError(f"Invalid WARMUP_STRUCTURES entry: {entry!r} (expected element:lattice[:n])")
+        n = int(parts[2]) if len(parts) == 3 else 1
+        structures.append({"element": parts[0], "lattice": parts[1], "nx": n, "ny": n, "nz": n})
+    return structures
+
+
+def warm_up() -> float:
+    """
+    Loads everything the first request would otherwise wait for.
+
+    The heavy dependencies (``ase.build``, ``ase.io`` and the OpenAI SDK)
+    are imported on first use so that importing the app stays fast. Call
+    this at boot, or set ``WARMUP_ON_START``, to pay that cost before
+    traffic arrives instead: it imports them, creates the OpenAI clients,
+    precomputes the Miller-index camera views and builds the
+    ``WARMUP_STRUCTURES`` into the structure cache. Under the preforking
+    server this runs once in the master, and the workers inherit the result.
+
+    Only the first call does the work; later calls return its duration.
+    Failures are logged, never raised, so a warm-up problem cannot stop the
+    server from starting.
+
+    Returns:
+        float: Seconds spent warming up.
+    """
+    from executor.serializer import serialize
+    from executor.structure import _conventional_cell, _write_with_ase, build_structure
+    from executor.view import miller_quaternion
+    from models.commands import BuildStructureParams
+    from nlp import llm_client
+
+    with _lock:
+        if _status["warmedUp"]:
+            return _status["seconds"]
+
+        start = time.perf_counter()
+        try:
+            cell = _conventional_cell(BuildStructureParams(element="Cu", lattice="fcc"))
+            for fmt in ("pdb", "binary"):
+                serialize(fmt, cell.numbers, cell.positions, cell.cell.array)
+            if STRUCTURE_WRITER == "ase":
+                _write_with_ase(cell, "pdb")
+        except Exception as e:
+            logger.warning(f"Structure warm-up failed: {e}")
+
+        for h in WARMUP_MILLER_RANGE:
+            for k in WARMUP_MILLER_RANGE:
+                for l in WARMUP_MILLER_RANGE:
+                    if h or k or l:
+                        miller_quaternion(h, k, l)
+
+        structures = 0
+        try:
+            for params in parse_warmup_structures(WARMUP_STRUCTURES):
+                build_structure(BuildStructureParams(**params))
+                structures += 1
+        except Exception as e:
+            logger.warning(f"Structure cache warm-up failed: {e}")
+
+        if OPENAI_API_KEY:
+            try:
+                llm_client.get_client()
+                llm_client.get_async_client()
+            except Exception as e:
+                logger.warning(f"OpenAI client warm-up failed: {e}")
+
+        elapsed = time.perf_counter() - start
+        _status.update(
+            warmedUp=True,
+            seconds=elapsed,
+            finishedAt=datetime.now(timezone.utc).isoformat(),
+            structures=structures,
+            pid=os.getpid(),
+        )
+    logger.info(f"Warm-up took {elapsed * 1000:.0f} ms ({structures} structures cached)")
+    return elapsed
+
+
+def readiness() -> dict:
+    """
+    Reports whether this process is ready for traffic, for ``GET /readyz``.
+
+    A process is ready once warm-up has finished, or straight away when
+    warm-up is not enabled. ``warmedUp`` and ``pid`` tell a worker forked
+    from a warmed master (its pid differs from the one that warmed up)
+    apart from one that warmed up itself.
+
+    Returns:
+        dict: ``ready``, ``pid`` and a copy of the warm-up status.
+    """
+    with _lock:
+        status = dict(_status)
+    warmup_pid = status.pop("pid")
+    return {
+        "ready": status["warmedUp"] or not WARMUP_ON_START,
+        "pid": os.getpid(),
+        "warmup": {**status, "pid": warmup_pid},
+    }